@@ -0,0 +1,246 @@
+"""
+Векторный бэктест сигналов паттернов (таблицы patterns.table или
+списки dict'ов) по close/high/low кадра — без цикла по сигналам.
+
+Вход в сделку — по закрытию свечи, на которой сигнал подтверждён
+(position + lookahead + window - 1, как в confirm_* пайплайна). Фигура
+к тому же известна только после подтверждения её последнего экстремума —
+через order свечей после самой поздней точки (argrelextrema смотрит
+на order свечей вперёд), поэтому вход по фигуре — не раньше этой свечи.
+Так вход не использует свечи, которых на его момент ещё не было.
+Направление: bullish и up (канал) — лонг, bearish и down — шорт;
+у neutral-паттернов все метрики сделки (включая mfe/mae) NaN.
+
+Для каждого сигнала (trades):
+- ret_{h}        — доходность по закрытию через h свечей после входа
+                   (со знаком направления), NaN за концом ряда;
+- mfe / mae      — максимальное благоприятное / неблагоприятное движение
+                   по high/low за max_bars свечей (доли цены входа, >= 0);
+- outcome        — 1 цель, -1 стоп, 0 выход по времени (закрытие
+                   max_bars-й свечи или последней доступной); стоп
+                   и цель — stop_atr / target_atr * ATR от цены входа;
+                   если обе задеты одной свечой — считается стоп;
+- r              — результат сделки в единицах риска (stop_atr * ATR).
+
+summarize(trades) — метрики по (type, direction).
+"""
+
+import numpy as np
+import pandas as pd
+
+from patterns.chart import CHART_ORDER
+from patterns.table import as_table, chart_points, is_chart_table
+
+# Горизонты форвардных доходностей (в свечах после входа)
+HORIZONS = (1, 5, 10, 20)
+# Канал (Channel) подтверждается пробоем по своему направлению: up — лонг
+DIRECTION_SIGN = {"bullish": 1.0, "bearish": -1.0, "up": 1.0, "down": -1.0}
+
+
+def _signs(directions):
+    directions = np.asarray(directions, dtype=object)
+    signs = np.full(len(directions), np.nan)
+    for direction, sign in DIRECTION_SIGN.items():
+        signs[directions == direction] = sign
+    return signs
+
+
+def forward_returns(close, entries, horizons=HORIZONS):
+    """
+    Матрица (сигналы, горизонты): close[entry + h] / close[entry] - 1,
+    NaN, если свечи entry + h нет
+    """
+    close = np.asarray(close, dtype=np.float64)
+    entries = np.asarray(entries, dtype=np.int64)
+    horizons = np.asarray(horizons, dtype=np.int64)
+    exits = entries[:, None] + horizons[None, :]
+    valid = exits < len(close)
+    out = np.full(exits.shape, np.nan)
+    base = np.broadcast_to(close[entries][:, None], exits.shape)
+    out[valid] = close[exits[valid]] / base[valid] - 1
+    return out
+
+
+def _path(values, entries, max_bars, fill):
+    # (сигналы, max_bars): значения свечей entry + 1 .. entry + max_bars,
+    # за концом ряда — fill
+    steps = entries[:, None] + np.arange(1, max_bars + 1)[None, :]
+    valid = steps < len(values)
+    out = np.full(steps.shape, fill)
+    out[valid] = values[steps[valid]]
+    return out, valid
+
+
+def _first(mask):
+    # Номер первого True в строке, max_bars — если True нет
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), mask.shape[1])
+
+
+def trade_outcomes(
+    high, low, close, atr, entries, signs, stop_atr=1.0, target_atr=2.0, max_bars=20
+):
+    """
+    MFE/MAE и исход ATR-стопа/цели для всех сигналов сразу.
+    Возвращает dict массивов: mfe, mae, outcome, exit (позиция выхода), r.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    entries = np.asarray(entries, dtype=np.int64)
+    signs = np.asarray(signs, dtype=np.float64)
+    entry = close[entries]
+    atr = np.asarray(atr, dtype=np.float64)[entries]
+    risk = stop_atr * atr
+    n = len(entries)
+
+    highs, valid = _path(high, entries, max_bars, np.nan)
+    lows, _ = _path(low, entries, max_bars, np.nan)
+    # Лонг: благоприятно — high, неблагоприятно — low; шорт — наоборот
+    long = signs[:, None] > 0
+    up = np.where(long, highs - entry[:, None], entry[:, None] - lows)
+    down = np.where(long, entry[:, None] - lows, highs - entry[:, None])
+    has_path = valid.any(axis=1)
+    mfe = np.full(n, np.nan)
+    mae = np.full(n, np.nan)
+    with np.errstate(invalid="ignore"):
+        mfe[has_path] = np.maximum(np.nanmax(up[has_path], axis=1), 0.0)
+        mae[has_path] = np.maximum(np.nanmax(down[has_path], axis=1), 0.0)
+        mfe /= entry
+        mae /= entry
+
+        stop_hit = _first(down >= risk[:, None])
+        target_hit = _first(up >= (target_atr * atr)[:, None])
+    last = valid.sum(axis=1) - 1
+    stopped = (stop_hit <= target_hit) & (stop_hit < max_bars)
+    targeted = (target_hit < stop_hit) & (target_hit < max_bars)
+    outcome = np.where(stopped, -1.0, np.where(targeted, 1.0, 0.0))
+    step = np.where(stopped, stop_hit, np.where(targeted, target_hit, last))
+    exits = entries + 1 + step
+
+    timeout = close[np.minimum(exits, len(close) - 1)] - entry
+    r = np.where(
+        stopped,
+        -1.0,
+        np.where(targeted, target_atr / stop_atr, signs * timeout / risk),
+    )
+    # Нет ни одной свечи после входа, ATR ещё не посчитан или neutral
+    undefined = ~has_path | ~(risk > 0) | np.isnan(signs)
+    # Без направления нет ни благоприятного, ни неблагоприятного движения
+    mfe[np.isnan(signs)] = np.nan
+    mae[np.isnan(signs)] = np.nan
+    outcome[undefined] = np.nan
+    r[undefined] = np.nan
+    exits = np.where(undefined, -1, exits)
+    return {"mfe": mfe, "mae": mae, "outcome": outcome, "exit": exits, "r": r}
+
+
+def backtest(
+    df,
+    patterns,
+    lookahead=1,
+    window=1,
+    order=CHART_ORDER,
+    horizons=HORIZONS,
+    stop_atr=1.0,
+    target_atr=2.0,
+    max_bars=20,
+    atr_column="atr_14",
+):
+    """
+    Результат каждого сигнала: колонки type, direction, position таблицы
+    паттернов + entry (позиция входа), ret_{h}, mfe, mae, outcome, exit, r.
+    lookahead/window — те же, что при подтверждении сигналов;
+    order — order экстремумов фигур (вход не раньше последней точки + order).
+    """
+    table = as_table(df, patterns)
+    trades = table[["type", "direction", "position"]].copy()
+    positions = table["position"].to_numpy(dtype=np.int64)
+    entries = positions + lookahead + window - 1
+    if is_chart_table(table):
+        known = chart_points(table).max(axis=1) + order
+        entries = np.maximum(entries, known)
+    inside = entries < len(df)
+    entries = np.minimum(entries, max(len(df) - 1, 0))
+    signs = _signs(table["direction"].astype(str).to_numpy())
+    trades["entry"] = np.where(inside, entries, -1)
+    if not len(df):
+        return trades
+
+    close = df["close"].to_numpy(dtype=np.float64)
+    returns = forward_returns(close, entries, horizons) * signs[:, None]
+    returns[~inside] = np.nan
+    for k, h in enumerate(horizons):
+        trades[f"ret_{h}"] = returns[:, k]
+
+    outcomes = trade_outcomes(
+        df["high"].to_numpy(dtype=np.float64),
+        df["low"].to_numpy(dtype=np.float64),
+        close,
+        df[atr_column].to_numpy(dtype=np.float64),
+        entries,
+        np.where(inside, signs, np.nan),
+        stop_atr=stop_atr,
+        target_atr=target_atr,
+        max_bars=max_bars,
+    )
+    for name, values in outcomes.items():
+        trades[name] = values
+    return trades
+
+
+def summarize(trades, by=("type", "direction")):
+    """
+    Метрики по группам: signals, hit_rate_{h} (доля ret_{h} > 0),
+    mean_ret_{h}, mfe/mae (средние), win_rate / stop_rate (доли цели /
+    стопа среди определённых исходов), expectancy_r (средний r).
+    by=() — одна строка по всем сигналам.
+    """
+    by = list(by)
+    horizons = [c[len("ret_") :] for c in trades.columns if c.startswith("ret_")]
+    columns = {}
+    for h in horizons:
+        ret = trades[f"ret_{h}"]
+        # NaN (нет свечи / neutral) не входит ни в числитель, ни в знаменатель
+        columns[f"hit_rate_{h}"] = (ret > 0).where(ret.notna())
+        columns[f"mean_ret_{h}"] = ret
+    columns["mfe"] = trades["mfe"]
+    columns["mae"] = trades["mae"]
+    outcome = trades["outcome"]
+    columns["win_rate"] = (outcome == 1).where(outcome.notna())
+    columns["stop_rate"] = (outcome == -1).where(outcome.notna())
+    columns["expectancy_r"] = trades["r"]
+    frame = pd.DataFrame(columns).astype(np.float64)
+    if not by:
+        summary = frame.mean().to_frame().T
+        summary["signals"] = len(trades)
+        return summary
+    for key in by:
+        frame[key] = trades[key].to_numpy()
+    grouped = frame.groupby(by, observed=True, sort=True)
+    summary = grouped.mean()
+    summary["signals"] = grouped.size()
+    return summary.reset_index()
+
+
+def backtest_results(df, result, tables=None, **kwargs):
+    """
+    Бэктест таблиц результата run_pipeline (по умолчанию подтверждённых
+    и отфильтрованных): одна таблица метрик с колонкой table.
+    kwargs — параметры backtest.
+    """
+    tables = tables or [
+        "confirmed_candles",
+        "confirmed_chart",
+        "filtered_candles",
+        "filtered_chart",
+    ]
+    parts = []
+    for name in tables:
+        if not len(result[name]):
+            continue
+        summary = summarize(backtest(df, result[name], **kwargs))
+        summary.insert(0, "table", name)
+        parts.append(summary)
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,185 @@
+import numpy as np
+
+from analysis.indicators import is_bearish_rsi, is_bullish_rsi, is_high_volume
+from patterns.table import as_table, select
+
+# Пороги TA-фильтров (раньше были литералами в main.py/dashboard.py)
+DEFAULT_THRESHOLDS = {
+    "volume_factor": 1.3,
+    "rsi_bullish": 35,
+    "rsi_bearish": 65,
+    "stoch_oversold": 20,
+    "stoch_overbought": 80,
+    "rsi_double_bottom": 40,
+    "rsi_double_top": 60,
+}
+
+
+# --- Условия: (df, пороги) -> булева маска по всем свечам ---
+def trend_down(df, t):
+    return (df["close"] < df["ema_20"]) & (df["ema_20"] < df["ema_50"])
+
+
+def trend_up(df, t):
+    return (df["close"] > df["ema_20"]) & (df["ema_20"] > df["ema_50"])
+
+
+def high_volume(df, t):
+    return is_high_volume(df, factor=t["volume_factor"])
+
+
+def bullish_rsi(df, t):
+    return is_bullish_rsi(df, threshold=t["rsi_bullish"])
+
+
+def bearish_rsi(df, t):
+    return is_bearish_rsi(df, threshold=t["rsi_bearish"])
+
+
+def macd_above_signal(df, t):
+    return df["macd"] > df["macd_signal"]
+
+
+def macd_below_signal(df, t):
+    return df["macd"] < df["macd_signal"]
+
+
+def close_below_bb(df, t):
+    return df["close"] < df["bb_lower"]
+
+
+def close_above_bb(df, t):
+    return df["close"] > df["bb_upper"]
+
+
+def stoch_oversold(df, t):
+    return df["stoch_k"] < t["stoch_oversold"]
+
+
+def stoch_overbought(df, t):
+    return df["stoch_k"] > t["stoch_overbought"]
+
+
+def rsi_below_double_bottom(df, t):
+    return df["rsi"] < t["rsi_double_bottom"]
+
+
+def rsi_above_double_top(df, t):
+    return df["rsi"] > t["rsi_double_top"]
+
+
+# Свечные паттерны: правила по направлению; ключ (тип, направление)
+# переопределяет правило для конкретного паттерна.
+# neutral-паттерны (нет правил) не проходят фильтр.
+CANDLE_RULES = {
+    "bullish": [
+        trend_down,
+        high_volume,
+        bullish_rsi,
+        macd_above_signal,
+        close_below_bb,
+        stoch_oversold,
+    ],
+    "bearish": [
+        trend_up,
+        high_volume,
+        bearish_rsi,
+        macd_below_signal,
+        close_above_bb,
+        stoch_overbought,
+    ],
+}
+
+# Фигуры: правила по типу (lower-case), "*" — для остальных фигур
+CHART_RULES = {
+    "doublebottom": [high_volume, rsi_below_double_bottom],
+    "doubletop": [high_volume, rsi_above_double_top],
+    "*": [high_volume],
+}
+
+
+def _thresholds(overrides):
+    unknown = set(overrides) - set(DEFAULT_THRESHOLDS)
+    if unknown:
+        raise TypeError(f"Неизвестные пороги фильтра: {sorted(unknown)}")
+    return {**DEFAULT_THRESHOLDS, **overrides}
+
+
+def compile_rules(df, rules, **thresholds):
+    """
+    Компилирует каждый набор правил в одну булеву маску по всему кадру:
+    {ключ: np.ndarray[bool]}. Одинаковые условия считаются один раз.
+    """
+    t = _thresholds(thresholds)
+    cache = {}
+    masks = {}
+    for key, conditions in rules.items():
+        mask = np.ones(len(df), dtype=bool)
+        for condition in conditions:
+            if condition not in cache:
+                cache[condition] = np.asarray(condition(df, t), dtype=bool)
+            mask &= cache[condition]
+        masks[key] = mask
+    return masks
+
+
+def _lookup(masks, *keys):
+    for key in keys:
+        if key in masks:
+            return masks[key]
+    return None
+
+
+def candle_filter_mask(df, patterns, rules=None, masks=None, **thresholds):
+    """
+    Маска прошедших фильтр свечных паттернов (список dict'ов или таблица)
+    """
+    table = as_table(df, patterns, chart=False)
+    if masks is None:
+        masks = compile_rules(df, rules or CANDLE_RULES, **thresholds)
+    positions = table["position"].to_numpy()
+    types = table["type"].astype(str).to_numpy()
+    directions = table["direction"].astype(str).to_numpy()
+    keep = np.zeros(len(table), dtype=bool)
+    groups = set(zip(types.tolist(), directions.tolist()))
+    for name, direction in groups:
+        mask = _lookup(masks, (name, direction), direction)
+        if mask is None:
+            continue
+        rows = np.flatnonzero((types == name) & (directions == direction))
+        keep[rows] = mask[positions[rows]]
+    return keep
+
+
+def chart_filter_mask(df, patterns, rules=None, masks=None, **thresholds):
+    """
+    Маска прошедших фильтр фигур; проверка по последней точке фигуры
+    """
+    table = as_table(df, patterns, chart=True)
+    if masks is None:
+        masks = compile_rules(df, rules or CHART_RULES, **thresholds)
+    positions = table["position"].to_numpy()
+    types = table["type"].astype(str).to_numpy()
+    keep = np.zeros(len(table), dtype=bool)
+    for name in set(types.tolist()):
+        mask = _lookup(masks, name.lower(), "*")
+        if mask is None:
+            continue
+        rows = np.flatnonzero(types == name)
+        keep[rows] = mask[positions[rows]]
+    return keep
+
+
+def filter_candle_patterns(df, patterns, rules=None, **thresholds):
+    """
+    TA-фильтр свечных паттернов: тренд, объём, RSI, MACD, Bollinger, Stochastic.
+    Возвращает паттерны в том же виде, в каком они пришли.
+    """
+    return select(patterns, candle_filter_mask(df, patterns, rules, **thresholds))
+
+
+def filter_chart_patterns(df, patterns, rules=None, **thresholds):
+    """
+    TA-фильтр фигур: объём и RSI (для двойных вершин/оснований)
+    """
+    return select(patterns, chart_filter_mask(df, patterns, rules, **thresholds))
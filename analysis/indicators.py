@@ -1,6 +1,8 @@
 import numpy as np
 import pandas as pd
 
+from analysis import kernels
+
 
 def add_basic_indicators(df, ema_periods=[20, 50], sma_periods=[20, 50], rsi_period=14):
     """
@@ -15,10 +17,14 @@ def add_basic_indicators(df, ema_periods=[20, 50], sma_periods=[20, 50], rsi_per
     return df
 
 
-def compute_rsi(series, window=14):
+def compute_rsi(series, window=14, backend=None):
     """
-    Быстрый RSI на numpy (без сторонних библиотек)
+    Быстрый RSI на numpy (без сторонних библиотек).
+    backend — ядро analysis.kernels ("numba", "numpy", "python") вместо pandas
     """
+    if backend is not None:
+        values = kernels.rsi(series.to_numpy(dtype=np.float64), window, backend)
+        return pd.Series(values, index=series.index)
     delta = series.diff()
     gain = np.where(delta > 0, delta, 0)
     loss = np.where(delta < 0, -delta, 0)
@@ -64,8 +70,16 @@ def is_below_ema(row, price_col="close", ema_col="ema_20"):
     return row[price_col] < row[ema_col]
 
 
+def _hlc(df):
+    # high, low, close как float64 для ядер analysis.kernels (backend=...)
+    return tuple(df[c].to_numpy(dtype=np.float64) for c in ("high", "low", "close"))
+
+
 # --- ATR (Average True Range) ---
-def compute_atr(df, period=14):
+def compute_atr(df, period=14, backend=None):
+    if backend is not None:
+        values = kernels.atr(*_hlc(df), period=period, backend=backend)
+        return pd.Series(values, index=df.index)
     high_low = df["high"] - df["low"]
     high_close = (df["high"] - df["close"].shift()).abs()
     low_close = (df["low"] - df["close"].shift()).abs()
@@ -95,7 +109,10 @@ def compute_bollinger_bands(df, n=20, k=2):
 
 
 # --- Stochastic Oscillator ---
-def compute_stochastic(df, k_period=14, d_period=3):
+def compute_stochastic(df, k_period=14, d_period=3, backend=None):
+    if backend is not None:
+        k_fast, d_slow = kernels.stochastic(*_hlc(df), k_period, d_period, backend)
+        return pd.Series(k_fast, index=df.index), pd.Series(d_slow, index=df.index)
     low_min = df["low"].rolling(window=k_period).min()
     high_max = df["high"].rolling(window=k_period).max()
     k_fast = 100 * (df["close"] - low_min) / (high_max - low_min)
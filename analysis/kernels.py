@@ -0,0 +1,345 @@
+"""
+Быстрые ядра индикаторов на массивах float64 (без промежуточных DataFrame).
+
+Бэкенды:
+- "numba"  — однопроходные циклы, скомпилированные numba (если установлена);
+- "numpy"  — векторный NumPy/SciPy (используется, когда numba нет);
+- "python" — те же циклы без JIT (медленно; для проверки логики ядер).
+
+Циклы повторяют pandas (roll_mean с суммированием Кэхэна, rolling min/max),
+поэтому "numba"/"python" побитово совпадают с analysis.indicators.
+"numpy" совпадает с ними до округления (среднее окна считается заново
+для каждой свечи, а не скользящей суммой): относительная разница < 1e-12.
+
+rsi_wilder — RSI со сглаживанием Уайлдера: первое среднее — простое среднее
+первых window изменений, дальше avg = (avg * (window - 1) + x) / window.
+"""
+
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+try:
+    from numba import njit
+except ImportError:  # numba — необязательная зависимость
+    njit = None
+
+HAVE_NUMBA = njit is not None
+DEFAULT_BACKEND = "numba" if HAVE_NUMBA else "numpy"
+
+
+# --- Циклы (чистый Python, компилируются numba при наличии) ---
+def _rolling_mean_loop(values, window, out):
+    # pandas roll_mean: Кэхэн на добавлении и удалении, min_periods = window
+    nobs = 0
+    neg_ct = 0
+    sum_x = 0.0
+    comp_add = 0.0
+    comp_remove = 0.0
+    same = 0
+    prev = values[0] if len(values) else 0.0
+    for i in range(len(values)):
+        if i >= window:
+            val = values[i - window]
+            if not math.isnan(val):
+                nobs -= 1
+                y = -val - comp_remove
+                t = sum_x + y
+                comp_remove = t - sum_x - y
+                sum_x = t
+                if np.signbit(val):
+                    neg_ct -= 1
+        val = values[i]
+        if not math.isnan(val):
+            nobs += 1
+            y = val - comp_add
+            t = sum_x + y
+            comp_add = t - sum_x - y
+            sum_x = t
+            if np.signbit(val):
+                neg_ct += 1
+            if val == prev:
+                same += 1
+            else:
+                same = 1
+            prev = val
+        if nobs >= window and nobs > 0:
+            result = sum_x / nobs
+            if same >= nobs:
+                result = prev
+            elif (neg_ct == 0 and result < 0) or (neg_ct == nobs and result > 0):
+                # Все значения окна одного знака — среднее не меняет знак
+                result = 0.0
+            out[i] = result
+        else:
+            out[i] = np.nan
+    return out
+
+
+def _rolling_extremum_loop(values, window, is_max, out):
+    # Монотонная очередь индексов (как pandas _roll_min_max)
+    queue = np.empty(len(values), dtype=np.int64)
+    head = 0
+    tail = 0
+    nobs = 0
+    for i in range(len(values)):
+        if i >= window:
+            if not math.isnan(values[i - window]):
+                nobs -= 1
+            if head < tail and queue[head] <= i - window:
+                head += 1
+        val = values[i]
+        if not math.isnan(val):
+            nobs += 1
+            while head < tail and (
+                (is_max and values[queue[tail - 1]] <= val)
+                or (not is_max and values[queue[tail - 1]] >= val)
+            ):
+                tail -= 1
+            queue[tail] = i
+            tail += 1
+        if nobs >= window and head < tail:
+            out[i] = values[queue[head]]
+        else:
+            out[i] = np.nan
+    return out
+
+
+def _true_range_loop(high, low, close, out):
+    # max(high - low, |high - prev close|, |low - prev close|), NaN пропускаются
+    for i in range(len(high)):
+        best = high[i] - low[i]
+        if i > 0:
+            for cand in (abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1])):
+                if not math.isnan(cand) and (math.isnan(best) or cand > best):
+                    best = cand
+        out[i] = best
+    return out
+
+
+def _gain_loss_loop(close, gain, loss):
+    # Как np.where(delta > 0, delta, 0) / np.where(delta < 0, -delta, 0)
+    gain[0] = 0.0
+    loss[0] = 0.0
+    for i in range(1, len(close)):
+        delta = close[i] - close[i - 1]
+        gain[i] = delta if delta > 0 else 0.0
+        loss[i] = -delta if delta < 0 else 0.0
+    return gain, loss
+
+
+def _rsi_sma_loop(avg_gain, avg_loss, out):
+    for i in range(len(avg_gain)):
+        rs = avg_gain[i] / (avg_loss[i] + 1e-10)
+        out[i] = 100 - (100 / (1 + rs))
+    return out
+
+
+def _wilder_loop(values, window, out):
+    # values[0] не участвует (изменение для первой свечи не определено)
+    n = len(values)
+    out[:] = np.nan
+    if n <= window:
+        return out
+    avg = 0.0
+    for i in range(1, window + 1):
+        avg += values[i]
+    avg /= window
+    out[window] = avg
+    for i in range(window + 1, n):
+        avg = (avg * (window - 1) + values[i]) / window
+        out[i] = avg
+    return out
+
+
+def _rsi_from_averages_loop(avg_gain, avg_loss, out):
+    for i in range(len(avg_gain)):
+        gain = avg_gain[i]
+        loss = avg_loss[i]
+        if math.isnan(gain) or math.isnan(loss):
+            out[i] = np.nan
+        elif loss == 0:
+            out[i] = 50.0 if gain == 0 else 100.0
+        else:
+            out[i] = 100 - 100 / (1 + gain / loss)
+    return out
+
+
+def _stoch_k_loop(close, low_min, high_max, out):
+    for i in range(len(close)):
+        num = 100 * (close[i] - low_min[i])
+        den = high_max[i] - low_min[i]
+        if den == 0:
+            # Плоское окно: как в NumPy 0/0 -> NaN, x/0 -> ±inf (numba
+            # с error_model="python" иначе бросит ZeroDivisionError)
+            if num == 0 or math.isnan(num):
+                out[i] = np.nan
+            else:
+                out[i] = math.copysign(math.inf, num) * math.copysign(1.0, den)
+        else:
+            out[i] = num / den
+    return out
+
+
+LOOPS = {
+    "rolling_mean": _rolling_mean_loop,
+    "rolling_extremum": _rolling_extremum_loop,
+    "true_range": _true_range_loop,
+    "gain_loss": _gain_loss_loop,
+    "rsi_sma": _rsi_sma_loop,
+    "wilder": _wilder_loop,
+    "rsi_from_averages": _rsi_from_averages_loop,
+    "stoch_k": _stoch_k_loop,
+}
+JIT_LOOPS = (
+    {name: njit(cache=True, nogil=True)(f) for name, f in LOOPS.items()}
+    if HAVE_NUMBA
+    else {}
+)
+
+
+def _loops(backend):
+    if backend == "numba":
+        if not HAVE_NUMBA:
+            raise ImportError("Бэкенд 'numba' недоступен: numba не установлена")
+        return JIT_LOOPS
+    return LOOPS
+
+
+def _array(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+# --- NumPy-реализации ---
+def _np_rolling(values, window, reducer):
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1 :] = reducer(sliding_window_view(values, window), axis=1)
+    return out
+
+
+def _np_gain_loss(close):
+    delta = np.empty_like(close)
+    delta[0] = np.nan
+    np.subtract(close[1:], close[:-1], out=delta[1:])
+    return np.where(delta > 0, delta, 0.0), np.where(delta < 0, -delta, 0.0)
+
+
+def _np_wilder(values, window):
+    out = np.full(len(values), np.nan)
+    if len(values) <= window:
+        return out
+    seed = values[1 : window + 1].mean()
+    rest = values[window + 1 :]
+    # avg[i] = a * avg[i-1] + b * x[i] — линейный фильтр первого порядка
+    a = (window - 1) / window
+    smoothed, _ = lfilter([1 / window], [1, -a], rest, zi=[a * seed])
+    out[window] = seed
+    out[window + 1 :] = smoothed
+    return out
+
+
+# --- Публичные функции ---
+def rolling_mean(values, window, backend=None):
+    values = _array(values)
+    backend = backend or DEFAULT_BACKEND
+    if backend == "numpy":
+        return _np_rolling(values, window, np.mean)
+    return _loops(backend)["rolling_mean"](values, window, np.empty_like(values))
+
+
+def rolling_min(values, window, backend=None):
+    values = _array(values)
+    backend = backend or DEFAULT_BACKEND
+    if backend == "numpy":
+        return _np_rolling(values, window, np.min)
+    loop = _loops(backend)["rolling_extremum"]
+    return loop(values, window, False, np.empty_like(values))
+
+
+def rolling_max(values, window, backend=None):
+    values = _array(values)
+    backend = backend or DEFAULT_BACKEND
+    if backend == "numpy":
+        return _np_rolling(values, window, np.max)
+    loop = _loops(backend)["rolling_extremum"]
+    return loop(values, window, True, np.empty_like(values))
+
+
+def true_range(high, low, close, backend=None):
+    high, low, close = _array(high), _array(low), _array(close)
+    backend = backend or DEFAULT_BACKEND
+    if backend == "numpy":
+        prev_close = np.r_[np.nan, close[:-1]]
+        return np.fmax(
+            np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close)
+        )
+    return _loops(backend)["true_range"](high, low, close, np.empty_like(high))
+
+
+def atr(high, low, close, period=14, backend=None):
+    """
+    ATR = compute_atr: простое скользящее среднее true range
+    """
+    return rolling_mean(true_range(high, low, close, backend), period, backend)
+
+
+def rsi(close, window=14, backend=None):
+    """
+    RSI = compute_rsi: простые скользящие средние прироста/падения
+    """
+    close = _array(close)
+    backend = backend or DEFAULT_BACKEND
+    if backend == "numpy":
+        gain, loss = _np_gain_loss(close)
+        avg_gain = _np_rolling(gain, window, np.mean)
+        avg_loss = _np_rolling(loss, window, np.mean)
+        return 100 - (100 / (1 + avg_gain / (avg_loss + 1e-10)))
+    loops = _loops(backend)
+    gain, loss = loops["gain_loss"](close, np.empty_like(close), np.empty_like(close))
+    avg_gain = loops["rolling_mean"](gain, window, np.empty_like(close))
+    avg_loss = loops["rolling_mean"](loss, window, np.empty_like(close))
+    return loops["rsi_sma"](avg_gain, avg_loss, np.empty_like(close))
+
+
+def rsi_wilder(close, window=14, backend=None):
+    """
+    RSI со сглаживанием Уайлдера; при нулевом среднем падении — 100
+    (50, если и прирост нулевой). close без NaN.
+    """
+    close = _array(close)
+    backend = backend or DEFAULT_BACKEND
+    if backend == "numpy":
+        gain, loss = _np_gain_loss(close)
+        avg_gain, avg_loss = _np_wilder(gain, window), _np_wilder(loss, window)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = 100 - 100 / (1 + avg_gain / avg_loss)
+        flat = avg_loss == 0
+        out[flat] = np.where(avg_gain[flat] == 0, 50.0, 100.0)
+        return out
+    loops = _loops(backend)
+    gain, loss = loops["gain_loss"](close, np.empty_like(close), np.empty_like(close))
+    avg_gain = loops["wilder"](gain, window, np.empty_like(close))
+    avg_loss = loops["wilder"](loss, window, np.empty_like(close))
+    return loops["rsi_from_averages"](avg_gain, avg_loss, np.empty_like(close))
+
+
+def stochastic(high, low, close, k_period=14, d_period=3, backend=None):
+    """
+    (%K, %D) = compute_stochastic
+    """
+    high, low, close = _array(high), _array(low), _array(close)
+    backend = backend or DEFAULT_BACKEND
+    low_min = rolling_min(low, k_period, backend)
+    high_max = rolling_max(high, k_period, backend)
+    # Плоское окно (high_max == low_min) — NaN, как в pandas, без предупреждений
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if backend == "numpy":
+            k_fast = 100 * (close - low_min) / (high_max - low_min)
+        else:
+            k_fast = _loops(backend)["stoch_k"](
+                close, low_min, high_max, np.empty_like(close)
+            )
+    return k_fast, rolling_mean(k_fast, d_period, backend)
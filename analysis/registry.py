@@ -0,0 +1,311 @@
+"""
+Реестр индикаторов как граф зависимостей с мемоизацией.
+
+Каждый индикатор объявляет свои входы и параметры: функция
+с @register_indicator(name) принимает параметры и возвращает
+{выходная колонка: Node}. Node — операция над другими узлами
+(или константами); одинаковые подграфы равны как ключи, поэтому
+sma_20 и bb_ma при n=20 — один и тот же узел rolling_mean(close, 20),
+а сдвиг close в ATR считается один раз для обоих отклонений.
+
+IndicatorGraph.compute вычисляет запрошенные колонки обходом
+дедуплицированного графа; результаты узлов мемоизируются по
+(узел, отпечаток данных) — отпечаток берётся только от колонок df,
+от которых узел зависит (значения + индекс).
+
+Операции повторяют арифметику analysis.indicators операция в операцию,
+поэтому колонки побитово совпадают с compute_* функциями.
+IndicatorGraph(backend=...) считает скользящие mean/min/max ядрами
+analysis.kernels: "numba"/"python" побитово совпадают с pandas,
+"numpy" — до ~1e-12 относительной ошибки.
+"""
+
+import hashlib
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from analysis import kernels
+
+
+class Node(NamedTuple):
+    op: str
+    args: tuple
+
+
+def node(op, *args):
+    return Node(op, args)
+
+
+def col(name):
+    return Node("column", (name,))
+
+
+def _kernel(func):
+    return lambda s, w, backend=None: pd.Series(
+        func(s.to_numpy(dtype=np.float64), w, backend), index=s.index
+    )
+
+
+# Операции с ядрами analysis.kernels: (аргументы, backend=...) -> Series
+KERNEL_OPS = {
+    "rolling_mean": _kernel(kernels.rolling_mean),
+    "rolling_min": _kernel(kernels.rolling_min),
+    "rolling_max": _kernel(kernels.rolling_max),
+    "rsi_wilder": _kernel(kernels.rsi_wilder),
+}
+
+# --- Операции: (вычисленные аргументы) -> Series ---
+OPS = {
+    "diff": lambda s, n: s.diff(n),
+    "shift": lambda s, n: s.shift(n),
+    "positive": lambda s: pd.Series(np.where(s > 0, s, 0), index=s.index),
+    "negative": lambda s: pd.Series(np.where(s < 0, -s, 0), index=s.index),
+    "abs": lambda s: s.abs(),
+    "row_max": lambda *series: pd.concat(series, axis=1).max(axis=1),
+    "ewm_mean": lambda s, span: s.ewm(span=span, adjust=False).mean(),
+    "rolling_mean": lambda s, w: s.rolling(window=w).mean(),
+    "rolling_std": lambda s, w: s.rolling(window=w).std(),
+    "rolling_min": lambda s, w: s.rolling(window=w).min(),
+    "rolling_max": lambda s, w: s.rolling(window=w).max(),
+    "add": lambda a, b: a + b,
+    "sub": lambda a, b: a - b,
+    "mul": lambda a, b: a * b,
+    "div": lambda a, b: a / b,
+    "rsi_wilder": KERNEL_OPS["rsi_wilder"],
+}
+
+INDICATORS = {}
+
+
+def register_indicator(name):
+    """
+    Регистрирует индикатор: функция(**параметры) -> {колонка: Node}
+    """
+
+    def decorator(func):
+        INDICATORS[name] = func
+        return func
+
+    return decorator
+
+
+@register_indicator("ema")
+def ema(period=20, source="close"):
+    return {f"ema_{period}": node("ewm_mean", col(source), period)}
+
+
+@register_indicator("sma")
+def sma(period=20, source="close"):
+    return {f"sma_{period}": node("rolling_mean", col(source), period)}
+
+
+@register_indicator("volume_ma")
+def volume_ma(period=20):
+    return {f"volume_ma_{period}": node("rolling_mean", col("volume"), period)}
+
+
+@register_indicator("rsi")
+def rsi(window=14, source="close"):
+    # Как compute_rsi: средние прироста/падения и rs с защитой от нуля
+    delta = node("diff", col(source), 1)
+    avg_gain = node("rolling_mean", node("positive", delta), window)
+    avg_loss = node("rolling_mean", node("negative", delta), window)
+    rs = node("div", avg_gain, node("add", avg_loss, 1e-10))
+    return {"rsi": node("sub", 100, node("div", 100, node("add", 1, rs)))}
+
+
+@register_indicator("rsi_wilder")
+def rsi_wilder(window=14, source="close"):
+    # Сглаживание Уайлдера — ядро analysis.kernels (numba или NumPy)
+    return {f"rsi_wilder_{window}": node("rsi_wilder", col(source), window)}
+
+
+@register_indicator("atr")
+def atr(period=14):
+    prev_close = node("shift", col("close"), 1)
+    true_range = node(
+        "row_max",
+        node("sub", col("high"), col("low")),
+        node("abs", node("sub", col("high"), prev_close)),
+        node("abs", node("sub", col("low"), prev_close)),
+    )
+    return {f"atr_{period}": node("rolling_mean", true_range, period)}
+
+
+@register_indicator("macd")
+def macd(fast=12, slow=26, signal=9):
+    line = node(
+        "sub",
+        node("ewm_mean", col("close"), fast),
+        node("ewm_mean", col("close"), slow),
+    )
+    signal_line = node("ewm_mean", line, signal)
+    return {
+        "macd": line,
+        "macd_signal": signal_line,
+        "macd_hist": node("sub", line, signal_line),
+    }
+
+
+@register_indicator("bollinger")
+def bollinger(n=20, k=2):
+    ma = node("rolling_mean", col("close"), n)
+    width = node("mul", k, node("rolling_std", col("close"), n))
+    return {
+        "bb_upper": node("add", ma, width),
+        "bb_ma": ma,
+        "bb_lower": node("sub", ma, width),
+    }
+
+
+@register_indicator("stochastic")
+def stochastic(k_period=14, d_period=3):
+    low_min = node("rolling_min", col("low"), k_period)
+    high_max = node("rolling_max", col("high"), k_period)
+    k_fast = node(
+        "div",
+        node("mul", 100, node("sub", col("close"), low_min)),
+        node("sub", high_max, low_min),
+    )
+    return {"stoch_k": k_fast, "stoch_d": node("rolling_mean", k_fast, d_period)}
+
+
+# Колонки пайплайна main.py: (индикатор, параметры)
+PIPELINE_INDICATORS = [
+    ("ema", {"period": 20}),
+    ("ema", {"period": 50}),
+    ("sma", {"period": 20}),
+    ("sma", {"period": 50}),
+    ("rsi", {"window": 14}),
+    ("volume_ma", {"period": 20}),
+    ("atr", {"period": 14}),
+    ("macd", {}),
+    ("bollinger", {}),
+    ("stochastic", {}),
+]
+
+
+def build_columns(specs):
+    """
+    [(индикатор, параметры)] -> {колонка: Node}
+    """
+    columns = {}
+    for name, params in specs:
+        columns.update(INDICATORS[name](**params))
+    return columns
+
+
+def _hash_values(digest, values):
+    values = np.asarray(values)
+    if values.dtype.kind in "biufcmM":
+        # Числа и даты хэшируются как сырые байты (без поэлементных хэшей)
+        digest.update(str(values.dtype).encode())
+        digest.update(np.ascontiguousarray(values).tobytes())
+    else:
+        hashed = pd.util.hash_pandas_object(pd.Series(values), index=False)
+        digest.update(hashed.to_numpy().tobytes())
+
+
+def fingerprint(df, columns):
+    """
+    Отпечаток данных: хэш значений колонок и индекса df
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(df.index, pd.RangeIndex):
+        index = df.index
+        digest.update(repr((index.start, index.stop, index.step)).encode())
+    else:
+        _hash_values(digest, df.index)
+    for name in sorted(columns):
+        digest.update(name.encode())
+        _hash_values(digest, df[name].to_numpy())
+    return digest.hexdigest()
+
+
+class IndicatorGraph:
+    """
+    Вычислитель графа индикаторов; memo можно разделять между вызовами
+    (и кадрами): ключ включает отпечаток исходных колонок.
+    backend — ядро analysis.kernels для операций KERNEL_OPS (None — pandas).
+    """
+
+    def __init__(self, memo=None, backend=None):
+        self.memo = {} if memo is None else memo
+        self.backend = backend
+        self._sources = {}
+
+    def sources(self, item):
+        """
+        Колонки df, от которых зависит узел
+        """
+        if not isinstance(item, Node):
+            return frozenset()
+        if item not in self._sources:
+            if item.op == "column":
+                found = frozenset(item.args)
+            else:
+                found = frozenset().union(*(self.sources(a) for a in item.args))
+            self._sources[item] = found
+        return self._sources[item]
+
+    def compute(self, df, columns):
+        """
+        {колонка: Node} (или список спецификаций) -> {колонка: Series}
+        """
+        if not isinstance(columns, dict):
+            columns = build_columns(columns)
+        prints = {}
+        return {
+            name: self._evaluate(df, item, prints) for name, item in columns.items()
+        }
+
+    def _evaluate(self, df, item, prints):
+        if not isinstance(item, Node):
+            return item
+        if item.op == "column":
+            return df[item.args[0]]
+        # Отпечаток каждой исходной колонки считается один раз за compute
+        for name in self.sources(item) - prints.keys():
+            prints[name] = fingerprint(df, [name])
+        key = (
+            item,
+            self.backend,
+            tuple(prints[name] for name in sorted(self.sources(item))),
+        )
+        if key not in self.memo:
+            args = [self._evaluate(df, a, prints) for a in item.args]
+            if self.backend is not None and item.op in KERNEL_OPS:
+                self.memo[key] = KERNEL_OPS[item.op](*args, backend=self.backend)
+            else:
+                self.memo[key] = OPS[item.op](*args)
+        return self.memo[key]
+
+
+def assign_columns(df, columns, dtype=None):
+    """
+    Записывает {колонка: значения} в df. С dtype (например np.float32)
+    значения приводятся на месте в один заранее выделенный блок,
+    который добавляется в df одной операцией.
+    """
+    if dtype is None:
+        for name, values in columns.items():
+            df[name] = values
+        return df
+    names = list(columns)
+    block = np.empty((len(df), len(names)), dtype=dtype, order="F")
+    for j, name in enumerate(names):
+        np.copyto(block[:, j], np.asarray(columns[name]), casting="same_kind")
+    df[names] = block
+    return df
+
+
+def add_indicators(df, specs=PIPELINE_INDICATORS, graph=None, dtype=None, backend=None):
+    """
+    Добавляет в df колонки индикаторов из specs (по умолчанию — как в main.py).
+    dtype — тип хранения колонок (None — как посчитано, float64).
+    backend — ядро analysis.kernels для нового графа (см. IndicatorGraph).
+    """
+    graph = graph or IndicatorGraph(backend=backend)
+    return assign_columns(df, graph.compute(df, specs), dtype=dtype)
@@ -0,0 +1,410 @@
+"""
+Инкрементальные (стриминговые) индикаторы для живых свечей.
+
+Каждый объект хранит минимальное состояние и обновляется одной свечой
+через update(bar) за O(1) (скользящие окна — O(1) амортизированно,
+память O(window)). Арифметика повторяет pandas (ewm adjust=False,
+rolling mean/std/min/max) операция в операцию, поэтому значения
+побитово совпадают с батчевыми функциями analysis.indicators.
+
+seed(df) прогоняет историю через update: состояние скользящих сумм
+в pandas накапливается с начала ряда, поэтому для побитового совпадения
+историю нужно проиграть целиком (один раз при старте).
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+# pandas: операция считается плохо обусловленной, если осталось ~3 знака
+_INV_COND_TOL = np.finfo(np.float64).eps * 1e3
+NaN = float("nan")
+
+
+def _clean(value):
+    """
+    Как pandas перед rolling/ewm: inf -> NaN
+    """
+    value = float(value)
+    return NaN if math.isinf(value) else value
+
+
+def _div(a, b):
+    """
+    Деление по правилам IEEE (как numpy), без ZeroDivisionError
+    """
+    if b == 0:
+        if math.isnan(a) or a == 0:
+            return NaN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class RollingMean:
+    """
+    Скользящее среднее = Series.rolling(window).mean()
+    (суммирование Кэхэна, как pandas roll_mean)
+    """
+
+    def __init__(self, window, min_periods=None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque()
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = None
+        self.value = NaN
+
+    def _add(self, val):
+        if self.prev_value is None:
+            self.prev_value = val
+        if not math.isnan(val):
+            self.nobs += 1
+            y = val - self.compensation_add
+            t = self.sum_x + y
+            self.compensation_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, val) < 0:
+                self.neg_ct += 1
+            if val == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = val
+
+    def _remove(self, val):
+        if not math.isnan(val):
+            self.nobs -= 1
+            y = -val - self.compensation_remove
+            t = self.sum_x + y
+            self.compensation_remove = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, val) < 0:
+                self.neg_ct -= 1
+
+    def add(self, value):
+        val = _clean(value)
+        if len(self.values) == self.window:
+            self._remove(self.values.popleft())
+        self.values.append(val)
+        self._add(val)
+        nobs = self.nobs
+        if nobs >= self.min_periods and nobs > 0:
+            result = self.sum_x / nobs
+            if self.num_consecutive_same_value >= nobs:
+                result = self.prev_value
+            elif (self.neg_ct == 0 and result < 0) or (
+                self.neg_ct == nobs and result > 0
+            ):
+                # Все значения окна одного знака — среднее не меняет знак
+                result = 0.0
+        else:
+            result = NaN
+        self.value = result
+        return result
+
+
+class RollingStd:
+    """
+    Скользящее стандартное отклонение = Series.rolling(window).std(ddof)
+    (Уэлфорд + Кэхэн, как pandas roll_var)
+    """
+
+    def __init__(self, window, ddof=1, min_periods=None):
+        self.window = window
+        self.ddof = ddof
+        self.min_periods = max(window if min_periods is None else min_periods, 1)
+        self.values = deque()
+        self.nobs = 0.0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.numerically_unstable = False
+        self.value = NaN
+
+    def _add(self, val):
+        if math.isnan(val):
+            return
+        prev_m2 = self.ssqdm_x
+        self.nobs += 1
+        prev_mean = self.mean_x - self.compensation_add
+        y = val - self.compensation_add
+        t = y - self.mean_x
+        self.compensation_add = t + self.mean_x - y
+        if self.nobs:
+            self.mean_x = self.mean_x + t / self.nobs
+        else:
+            self.mean_x = 0.0
+        self.ssqdm_x = self.ssqdm_x + (val - prev_mean) * (val - self.mean_x)
+        if prev_m2 * _INV_COND_TOL > self.ssqdm_x:
+            self.numerically_unstable = True
+
+    def _remove(self, val):
+        if math.isnan(val):
+            return
+        prev_m2 = self.ssqdm_x
+        self.nobs -= 1
+        if self.nobs:
+            prev_mean = self.mean_x - self.compensation_remove
+            y = val - self.compensation_remove
+            t = y - self.mean_x
+            self.compensation_remove = t + self.mean_x - y
+            self.mean_x = self.mean_x - t / self.nobs
+            self.ssqdm_x = self.ssqdm_x - (val - prev_mean) * (val - self.mean_x)
+            if prev_m2 * _INV_COND_TOL > self.ssqdm_x:
+                self.numerically_unstable = True
+        else:
+            self.mean_x = 0.0
+            self.ssqdm_x = 0.0
+            self.numerically_unstable = False
+
+    def add(self, value):
+        val = _clean(value)
+        first = not self.values
+        if len(self.values) == self.window:
+            self._remove(self.values.popleft())
+        self.values.append(val)
+        self._add(val)
+        if first or self.numerically_unstable:
+            # Пересчёт окна с нуля — O(window), как в pandas
+            self.nobs = self.mean_x = self.ssqdm_x = 0.0
+            self.compensation_add = self.compensation_remove = 0.0
+            for v in self.values:
+                self._add(v)
+            self.numerically_unstable = False
+        if self.nobs >= self.min_periods and self.nobs > self.ddof:
+            var = self.ssqdm_x / (self.nobs - self.ddof)
+            result = 0.0 if var < 0 else math.sqrt(var)
+        else:
+            result = NaN
+        self.value = result
+        return result
+
+
+class RollingExtremum:
+    """
+    Скользящий max/min = Series.rolling(window).max()/.min()
+    (монотонная очередь, NaN пропускаются, нужно min_periods значений)
+    """
+
+    def __init__(self, window, is_max=True, min_periods=None):
+        self.window = window
+        self.is_max = is_max
+        self.min_periods = max(window if min_periods is None else min_periods, 1)
+        self.candidates = deque()  # (номер, значение)
+        self.valid = deque()  # номера не-NaN значений в окне
+        self.count = 0
+        self.value = NaN
+
+    def add(self, value):
+        val = _clean(value)
+        i = self.count
+        self.count += 1
+        start = i - self.window + 1
+        while self.candidates and self.candidates[0][0] < start:
+            self.candidates.popleft()
+        while self.valid and self.valid[0] < start:
+            self.valid.popleft()
+        if not math.isnan(val):
+            self.valid.append(i)
+            if self.is_max:
+                while self.candidates and val >= self.candidates[-1][1]:
+                    self.candidates.pop()
+            else:
+                while self.candidates and val <= self.candidates[-1][1]:
+                    self.candidates.pop()
+            self.candidates.append((i, val))
+        if self.candidates and len(self.valid) >= self.min_periods:
+            result = self.candidates[0][1]
+        else:
+            result = NaN
+        self.value = result
+        return result
+
+
+class EWMean:
+    """
+    Экспоненциальное среднее = Series.ewm(span, adjust=False).mean()
+    """
+
+    def __init__(self, span):
+        self.com = (span - 1) / 2
+        self.alpha = 1.0 / (1.0 + self.com)
+        self.old_wt_factor = 1.0 - self.alpha
+        self.old_wt = 1.0
+        self.weighted = None
+        self.nobs = 0
+        self.value = NaN
+
+    def add(self, value):
+        cur = _clean(value)
+        is_observation = not math.isnan(cur)
+        self.nobs += is_observation
+        if self.weighted is None:
+            self.weighted = cur
+        elif not math.isnan(self.weighted):
+            self.old_wt *= self.old_wt_factor
+            if is_observation:
+                if self.weighted != cur:
+                    new_wt = self.alpha
+                    if self.com == 1:
+                        new_wt = 1.0 - self.old_wt
+                    weighted = self.old_wt * self.weighted + new_wt * cur
+                    self.weighted = weighted / (self.old_wt + new_wt)
+                self.old_wt = 1.0
+        elif is_observation:
+            self.weighted = cur
+        self.value = self.weighted if self.nobs >= 1 else NaN
+        return self.value
+
+
+# --- Индикаторы: update(bar) со свечой (dict / строка DataFrame) ---
+class EMA:
+    def __init__(self, period=20, column="close"):
+        self.column = column
+        self._ema = EWMean(period)
+
+    def update(self, bar):
+        return self._ema.add(bar[self.column])
+
+
+class SMA:
+    def __init__(self, period=20, column="close"):
+        self.column = column
+        self._mean = RollingMean(period)
+
+    def update(self, bar):
+        return self._mean.add(bar[self.column])
+
+
+class VolumeMA(SMA):
+    def __init__(self, period=20):
+        super().__init__(period, column="volume")
+
+
+class RSI:
+    """
+    RSI как в compute_rsi: простые скользящие средние роста и падения
+    """
+
+    def __init__(self, window=14, column="close"):
+        self.column = column
+        self.prev_close = None
+        self._gain = RollingMean(window)
+        self._loss = RollingMean(window)
+
+    def update(self, bar):
+        close = float(bar[self.column])
+        delta = NaN if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        avg_gain = self._gain.add(delta if delta > 0 else 0.0)
+        avg_loss = self._loss.add(-delta if delta < 0 else 0.0)
+        rs = avg_gain / (avg_loss + 1e-10)
+        return 100 - (100 / (1 + rs))
+
+
+class ATR:
+    def __init__(self, period=14):
+        self.prev_close = NaN
+        self._mean = RollingMean(period)
+
+    def update(self, bar):
+        high, low = float(bar["high"]), float(bar["low"])
+        ranges = [
+            high - low,
+            abs(high - self.prev_close),
+            abs(low - self.prev_close),
+        ]
+        ranges = [r for r in ranges if not math.isnan(r)]
+        true_range = max(ranges) if ranges else NaN
+        self.prev_close = float(bar["close"])
+        return self._mean.add(true_range)
+
+
+class MACD:
+    def __init__(self, fast=12, slow=26, signal=9):
+        self._fast = EWMean(fast)
+        self._slow = EWMean(slow)
+        self._signal = EWMean(signal)
+
+    def update(self, bar):
+        close = bar["close"]
+        macd = self._fast.add(close) - self._slow.add(close)
+        signal_line = self._signal.add(macd)
+        return macd, signal_line, macd - signal_line
+
+
+class BollingerBands:
+    def __init__(self, n=20, k=2):
+        self.k = k
+        self._ma = RollingMean(n)
+        self._std = RollingStd(n)
+
+    def update(self, bar):
+        ma = self._ma.add(bar["close"])
+        std = self._std.add(bar["close"])
+        return ma + self.k * std, ma, ma - self.k * std
+
+
+class Stochastic:
+    def __init__(self, k_period=14, d_period=3):
+        self._low = RollingExtremum(k_period, is_max=False)
+        self._high = RollingExtremum(k_period, is_max=True)
+        self._d = RollingMean(d_period)
+
+    def update(self, bar):
+        low_min = self._low.add(bar["low"])
+        high_max = self._high.add(bar["high"])
+        k_fast = _div(100 * (float(bar["close"]) - low_min), high_max - low_min)
+        return k_fast, self._d.add(k_fast)
+
+
+class IndicatorSet:
+    """
+    Полный набор индикаторов пайплайна main.py для живых свечей.
+    update(bar) возвращает dict с теми же колонками, что и батчевый расчёт
+    (add_basic_indicators + atr_14 + MACD + Bollinger + Stochastic).
+    """
+
+    def __init__(self, ema_periods=None, sma_periods=None, rsi_period=14):
+        # Периоды по умолчанию — как у add_basic_indicators
+        ema_periods = [20, 50] if ema_periods is None else ema_periods
+        sma_periods = [20, 50] if sma_periods is None else sma_periods
+        self.emas = {f"ema_{p}": EMA(p) for p in ema_periods}
+        self.smas = {f"sma_{p}": SMA(p) for p in sma_periods}
+        self.rsi = RSI(rsi_period)
+        self.volume_ma = VolumeMA(20)
+        self.atr = ATR(14)
+        self.macd = MACD()
+        self.bollinger = BollingerBands()
+        self.stochastic = Stochastic()
+
+    def update(self, bar):
+        out = {}
+        for col, ind in self.emas.items():
+            out[col] = ind.update(bar)
+        for col, ind in self.smas.items():
+            out[col] = ind.update(bar)
+        out["rsi"] = self.rsi.update(bar)
+        out["volume_ma_20"] = self.volume_ma.update(bar)
+        out["atr_14"] = self.atr.update(bar)
+        out["macd"], out["macd_signal"], out["macd_hist"] = self.macd.update(bar)
+        out["bb_upper"], out["bb_ma"], out["bb_lower"] = self.bollinger.update(bar)
+        out["stoch_k"], out["stoch_d"] = self.stochastic.update(bar)
+        return out
+
+    def seed(self, df):
+        """
+        Прогоняет историю (батч) через состояние; возвращает последние значения
+        """
+        out = {}
+        columns = ["open", "high", "low", "close", "volume"]
+        for values in zip(*(df[c].to_numpy(dtype=np.float64) for c in columns)):
+            out = self.update(dict(zip(columns, values)))
+        return out
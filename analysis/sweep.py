@@ -0,0 +1,314 @@
+"""
+Перебор параметров детекторов и порогов фильтра (сетка или случайный
+поиск) с оценкой каждой точки бэктестом analysis.backtest.
+
+Точка — dict параметров:
+- "<детектор>.<параметр>" — параметр detect_<детектор> из
+  patterns.candlestick / patterns.chart ("hammer.body_ratio",
+  "double_top.threshold", "channel.min_length", ...);
+- "order"                 — order экстремумов для всех фигур;
+- "lookahead", "window"   — подтверждение (как в run_pipeline);
+- ключи DEFAULT_THRESHOLDS — пороги analysis.filters.
+
+Общие вычисления делаются один раз на процесс (SweepContext):
+геометрия свечей (candle_features), экстремумы по каждому order
+(Swings), а также результаты детекторов, подтверждение с бэктестом
+и маски фильтра — по своим параметрам. Точки, отличающиеся только
+порогами фильтра, лишь отбирают строки готового бэктеста. Точки
+упорядочиваются так, что соседние (один пакет воркера) делят параметры
+детекторов. Бэктест фигур получает order точки: вход не раньше
+подтверждения последнего экстремума (см. analysis.backtest).
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analysis import filters, registry
+from analysis.backtest import backtest, summarize
+from analysis.registry import PIPELINE_INDICATORS
+from patterns import candlestick, chart
+from patterns.chart import CHART_ORDER
+from patterns.swings import Swings
+from patterns.table import concat_tables, take
+
+# Детекторы в порядке find_all_patterns (имя без detect_)
+CANDLE_DETECTORS = (
+    "hammer",
+    "inverted_hammer",
+    "engulfing",
+    "doji",
+    "morning_star",
+    "evening_star",
+    "shooting_star",
+    "hanging_man",
+    "harami",
+    "three_white_soldiers",
+    "three_black_crows",
+    "piercing_line",
+    "dark_cloud_cover",
+    "spinning_top",
+    "marubozu",
+    "tweezer_top",
+    "tweezer_bottom",
+)
+CHART_DETECTORS = (
+    "double_top",
+    "double_bottom",
+    "head_and_shoulders",
+    "inverse_head_and_shoulders",
+    "triple_top",
+    "triple_bottom",
+    "ascending_triangle",
+    "descending_triangle",
+    "symmetrical_triangle",
+    "channel",
+)
+CONFIRM_PARAMS = ("lookahead", "window")
+ORDER_PARAM = "order"
+
+
+def grid(space):
+    """
+    Все сочетания значений: space = {параметр: список значений}
+    """
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*space.values())]
+
+
+def random_points(space, n, seed=0):
+    """
+    n случайных точек: список — выбор из значений, кортеж (low, high) —
+    равномерно (целое, если обе границы целые)
+    """
+    rng = np.random.default_rng(seed)
+    points = [{} for _ in range(n)]
+    for key, values in space.items():
+        if isinstance(values, tuple):
+            low, high = values
+            if isinstance(low, int) and isinstance(high, int):
+                sample = rng.integers(low, high + 1, size=n).tolist()
+            else:
+                sample = rng.uniform(low, high, size=n).tolist()
+        else:
+            sample = [values[i] for i in rng.integers(len(values), size=n)]
+        for point, value in zip(points, sample):
+            point[key] = value
+    return points
+
+
+def split_point(point):
+    """
+    Точка -> (параметры детекторов {детектор: {параметр: значение}},
+    order, параметры подтверждения, пороги фильтра)
+    """
+    detectors, confirm, thresholds = {}, {}, {}
+    order = CHART_ORDER
+    for key, value in point.items():
+        if "." in key:
+            name, param = key.split(".", 1)
+            if name not in CANDLE_DETECTORS + CHART_DETECTORS:
+                raise TypeError(f"Неизвестный детектор: {name}")
+            detectors.setdefault(name, {})[param] = value
+        elif key == ORDER_PARAM:
+            order = value
+        elif key in CONFIRM_PARAMS:
+            confirm[key] = value
+        elif key in filters.DEFAULT_THRESHOLDS:
+            thresholds[key] = value
+        else:
+            raise TypeError(f"Неизвестный параметр перебора: {key}")
+    return detectors, order, confirm, thresholds
+
+
+def _check_backtest_kwargs(backtest_kwargs):
+    # order и подтверждение задаются точкой перебора, а не общими kwargs
+    clash = sorted(set(backtest_kwargs) & {ORDER_PARAM, *CONFIRM_PARAMS})
+    if clash:
+        raise TypeError(
+            f"{', '.join(clash)}: задаются точками перебора, не параметрами backtest"
+        )
+
+
+def _with_indicators(df):
+    if not set(registry.build_columns(PIPELINE_INDICATORS)) <= set(df.columns):
+        registry.add_indicators(df, PIPELINE_INDICATORS)
+    return df
+
+
+def _key(params):
+    return tuple(sorted(params.items()))
+
+
+class SweepContext:
+    """
+    Кадр с индикаторами и кэши общих вычислений для оценки точек
+    """
+
+    def __init__(self, df, stage="filtered", **backtest_kwargs):
+        _check_backtest_kwargs(backtest_kwargs)
+        self.df = _with_indicators(df)
+        self.stage = stage
+        self.backtest_kwargs = backtest_kwargs
+        self.features = candlestick.candle_features(df)
+        self.swings = Swings(df)
+        self._detections = {}
+        self._confirmed = {}
+        self._masks = {}
+
+    def _detect(self, name, params, order=None):
+        # Результат детектора зависит только от его параметров (и order)
+        key = (name, _key(params), order)
+        if key not in self._detections:
+            if order is None:
+                self._detections[key] = getattr(candlestick, f"detect_{name}")(
+                    self.df, **params, features=self.features, columnar=True
+                )
+            else:
+                self._detections[key] = getattr(chart, f"detect_{name}")(
+                    self.df, **params, order=order, swings=self.swings, columnar=True
+                )
+        return self._detections[key]
+
+    def patterns(self, detectors, order):
+        """
+        (таблица свечных паттернов, таблица фигур) для параметров детекторов
+        """
+        candles = [self._detect(n, detectors.get(n, {})) for n in CANDLE_DETECTORS]
+        charts = [self._detect(n, detectors.get(n, {}), order) for n in CHART_DETECTORS]
+        return concat_tables(candles), concat_tables(charts)
+
+    def masks(self, rules, thresholds):
+        key = (id(rules), _key(thresholds))
+        if key not in self._masks:
+            self._masks[key] = filters.compile_rules(self.df, rules, **thresholds)
+        return self._masks[key]
+
+    def confirmed(self, detectors, order, confirm):
+        """
+        Подтверждённые (свечи, фигуры) и бэктест всех их сигналов (одна
+        таблица, сначала свечи): TA-фильтр дальше только отбирает строки
+        """
+        key = (
+            tuple(sorted((name, _key(params)) for name, params in detectors.items())),
+            order,
+            _key(confirm),
+        )
+        if key not in self._confirmed:
+            candles, charts = self.patterns(detectors, order)
+            candles = candlestick.confirm_candlestick_patterns(
+                self.df, candles, **confirm
+            )
+            charts = chart.confirm_chart_patterns(self.df, charts, **confirm)
+            trades = concat_tables(
+                [
+                    backtest(
+                        self.df, table, **confirm, order=order, **self.backtest_kwargs
+                    )
+                    for table in (candles, charts)
+                    if len(table)
+                ]
+            )
+            self._confirmed[key] = candles, charts, trades
+        return self._confirmed[key]
+
+    def evaluate(self, point):
+        """
+        Метрики бэктеста (summarize по всем сигналам) для одной точки
+        """
+        detectors, order, confirm, thresholds = split_point(point)
+        candles, charts, trades = self.confirmed(detectors, order, confirm)
+        candle_keep = np.ones(len(candles), dtype=bool)
+        chart_keep = np.ones(len(charts), dtype=bool)
+        if self.stage == "filtered":
+            if len(candles):
+                candle_keep = filters.candle_filter_mask(
+                    self.df, candles, masks=self.masks(filters.CANDLE_RULES, thresholds)
+                )
+            if len(charts):
+                chart_keep = filters.chart_filter_mask(
+                    self.df, charts, masks=self.masks(filters.CHART_RULES, thresholds)
+                )
+        row = {"candles": int(candle_keep.sum()), "charts": int(chart_keep.sum())}
+        keep = np.concatenate([candle_keep, chart_keep])
+        if keep.any():
+            row.update(summarize(take(trades, keep), by=()).iloc[0].to_dict())
+        row["signals"] = row["candles"] + row["charts"]
+        return row
+
+
+# Контекст воркера: кадр передаётся один раз при старте процесса
+_CONTEXT = None
+
+
+def _init_worker(df, stage, backtest_kwargs):
+    global _CONTEXT
+    _CONTEXT = SweepContext(df, stage=stage, **backtest_kwargs)
+
+
+def _evaluate_chunk(chunk):
+    return [(i, _CONTEXT.evaluate(point)) for i, point in chunk]
+
+
+def _detector_order(point):
+    # Параметры детекторов, order и подтверждения; пороги фильтра не влияют
+    detectors, order, confirm, _ = split_point(point)
+    detectors = sorted((name, _key(params)) for name, params in detectors.items())
+    return repr((order, detectors, _key(confirm)))
+
+
+def run_sweep(
+    df,
+    points,
+    max_workers=None,
+    chunks_per_worker=4,
+    sort_by="expectancy_r",
+    min_signals=30,
+    stage="filtered",
+    **backtest_kwargs,
+):
+    """
+    Оценка точек на пуле процессов. Возвращает таблицу: параметры точки,
+    candles/charts/signals и метрики summarize, по убыванию sort_by;
+    точки с числом сигналов < min_signals — в конце.
+    stage — "filtered" (после TA-фильтра) или "confirmed".
+    backtest_kwargs — параметры analysis.backtest.backtest, кроме order,
+    lookahead и window (они — параметры точек).
+    """
+    points = list(points)
+    if stage not in ("filtered", "confirmed"):
+        raise ValueError(f"Неизвестный stage: {stage}")
+    _check_backtest_kwargs(backtest_kwargs)
+    for point in points:
+        split_point(point)
+    max_workers = max_workers or os.cpu_count() or 1
+    # Индикаторы — один раз до рассылки кадра воркерам
+    df = _with_indicators(df)
+    ordered = sorted(enumerate(points), key=lambda item: _detector_order(item[1]))
+
+    if max_workers == 1:
+        context = SweepContext(df, stage=stage, **backtest_kwargs)
+        rows = [(i, context.evaluate(point)) for i, point in ordered]
+    else:
+        # Пакеты — подряд идущие точки: у них общие результаты детекторов
+        size = -(-len(ordered) // (max_workers * chunks_per_worker)) or 1
+        chunks = [ordered[i : i + size] for i in range(0, len(ordered), size)]
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(df, stage, backtest_kwargs),
+        ) as pool:
+            rows = [row for chunk in pool.map(_evaluate_chunk, chunks) for row in chunk]
+
+    rows.sort()
+    table = pd.concat(
+        [pd.DataFrame(points), pd.DataFrame([row for _, row in rows])], axis=1
+    )
+    if not len(table) or sort_by not in table:
+        return table
+    eligible = table["signals"] >= min_signals
+    order = np.lexsort((-table[sort_by].fillna(-np.inf).to_numpy(), ~eligible))
+    return table.iloc[order].reset_index(drop=True)
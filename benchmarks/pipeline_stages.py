@@ -0,0 +1,231 @@
+"""
+Бенчмарк этапов пайплайна на синтетических кадрах (benchmarks.synthetic):
+индикаторы (add_basic_indicators и каждая compute_*), каждый detect_*
+из patterns.candlestick и patterns.chart, оба confirm_*, TA-фильтр
+и построение фигуры plot_patterns.
+
+    python -m benchmarks.pipeline_stages --output stages.json
+    python -m benchmarks.pipeline_stages --sizes 1000 100000 \
+        --output new.json --compare old.json
+
+Каждый этап запускается на своих входах, подготовленных заранее (время
+подготовки не учитывается); результат — лучшее время из до --repeat
+запусков (повторы — пока суммарное время этапа меньше --budget секунд).
+JSON: meta (коммит, версии, платформа) и results — строка на (bars, stage).
+--compare печатает отношение времени к прошлому файлу по общим строкам.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+import pandas as pd
+
+from analysis import filters, indicators
+from analysis.sweep import CANDLE_DETECTORS, CHART_DETECTORS
+from benchmarks.synthetic import synthetic_ohlcv
+from patterns import candlestick, chart
+from patterns.swings import Swings
+from pipeline import CHART_ORDER, add_indicators
+from visualization.plotter import plot_patterns
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+# plot_patterns без прореживания строит trace на каждую свечу: выше этого
+# размера этап пропускается (или задайте --max-points)
+PLOT_LIMIT = 1_000_000
+
+INDICATOR_STAGES = {
+    "add_basic_indicators": lambda df: indicators.add_basic_indicators(df),
+    "compute_rsi": lambda df: indicators.compute_rsi(df["close"]),
+    "compute_atr": indicators.compute_atr,
+    "compute_macd": indicators.compute_macd,
+    "compute_bollinger_bands": indicators.compute_bollinger_bands,
+    "compute_stochastic": indicators.compute_stochastic,
+}
+
+
+def _measure(func, repeat, budget):
+    """
+    (лучшее время, число запусков): не больше repeat запусков и не дольше
+    budget секунд суммарно (минимум один запуск)
+    """
+    times = []
+    while len(times) < repeat and (not times or sum(times) < budget):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times), len(times)
+
+
+def stages(df, max_points=None, plot_limit=PLOT_LIMIT):
+    """
+    Упорядоченный список (этап, функция без аргументов) для кадра df.
+    Входы этапов (индикаторы, признаки свечей, экстремумы, таблицы
+    паттернов) считаются здесь, до замеров.
+    """
+    ohlcv = df.copy()
+    out = [
+        (f"indicators.{name}", lambda f=func: f(ohlcv))
+        for name, func in INDICATOR_STAGES.items()
+    ]
+    out.append(("pipeline.add_indicators", lambda: add_indicators(ohlcv.copy())))
+
+    add_indicators(df)
+    features = candlestick.candle_features(df)
+    out.append(("candlestick.candle_features", lambda: candlestick.candle_features(df)))
+    for name in CANDLE_DETECTORS:
+        detect = getattr(candlestick, f"detect_{name}")
+        out.append(
+            (
+                f"candlestick.detect_{name}",
+                lambda d=detect: d(df, features=features, columnar=True),
+            )
+        )
+
+    def find_swings():
+        swings = Swings(df)
+        swings.maxima(CHART_ORDER)
+        swings.minima(CHART_ORDER)
+        return swings
+
+    swings = find_swings()
+    out.append(("chart.swings", find_swings))
+    for name in CHART_DETECTORS:
+        detect = getattr(chart, f"detect_{name}")
+        out.append(
+            (
+                f"chart.detect_{name}",
+                lambda d=detect: d(df, order=CHART_ORDER, swings=swings, columnar=True),
+            )
+        )
+
+    candle_patterns = candlestick.find_all_patterns(df, columnar=True)
+    chart_patterns = chart.find_all_patterns(df, columnar=True)
+    confirmed_candles = candlestick.confirm_candlestick_patterns(df, candle_patterns)
+    confirmed_chart = chart.confirm_chart_patterns(df, chart_patterns)
+    out += [
+        (
+            "candlestick.confirm_candlestick_patterns",
+            lambda: candlestick.confirm_candlestick_patterns(df, candle_patterns),
+        ),
+        (
+            "chart.confirm_chart_patterns",
+            lambda: chart.confirm_chart_patterns(df, chart_patterns),
+        ),
+        (
+            "filters.filter_candle_patterns",
+            lambda: filters.filter_candle_patterns(df, confirmed_candles),
+        ),
+        (
+            "filters.filter_chart_patterns",
+            lambda: filters.filter_chart_patterns(df, confirmed_chart),
+        ),
+    ]
+
+    if max_points is not None or len(df) <= plot_limit:
+        filtered_candles = filters.filter_candle_patterns(df, confirmed_candles)
+        filtered_chart = filters.filter_chart_patterns(df, confirmed_chart)
+        out.append(
+            (
+                "plotter.plot_patterns",
+                lambda: plot_patterns(
+                    df, filtered_candles, filtered_chart, max_points=max_points
+                ),
+            )
+        )
+    return out
+
+
+def bench_stages(n, seed=0, repeat=3, budget=1.0, max_points=None):
+    """
+    Строки {bars, stage, best_s, runs, bars_per_s} для кадра из n свечей
+    """
+    df = synthetic_ohlcv(n, seed=seed)
+    rows = []
+    for stage, func in stages(df, max_points=max_points):
+        best, runs = _measure(func, repeat, budget)
+        rows.append(
+            {
+                "bars": n,
+                "stage": stage,
+                "best_s": round(best, 6),
+                "runs": runs,
+                "bars_per_s": round(n / best) if best > 0 else None,
+            }
+        )
+    return rows
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        "commit": _commit(),
+        "created": datetime.datetime.now(datetime.UTC).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(old_rows, new_rows):
+    """
+    Таблица (bars, stage, old_s, new_s, ratio) по общим строкам;
+    ratio > 1 — новый замер медленнее
+    """
+    old = pd.DataFrame(old_rows)[["bars", "stage", "best_s"]]
+    new = pd.DataFrame(new_rows)[["bars", "stage", "best_s"]]
+    table = old.merge(new, on=["bars", "stage"], suffixes=("_old", "_new"))
+    table = table.rename(columns={"best_s_old": "old_s", "best_s_new": "new_s"})
+    table["ratio"] = table["new_s"] / table["old_s"]
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=1.0)
+    parser.add_argument("--max-points", type=int, default=None)
+    parser.add_argument("--output", default=None, help="JSON с результатами")
+    parser.add_argument("--compare", default=None, help="JSON прошлого прогона")
+    args = parser.parse_args(argv)
+    rows = []
+    for n in args.sizes:
+        for row in bench_stages(
+            n, args.seed, args.repeat, args.budget, max_points=args.max_points
+        ):
+            rows.append(row)
+            print(f"{n:>9} {row['stage']:<45} {row['best_s']:>10.4f}s")
+    report = {"meta": {**environment(), "seed": args.seed}, "results": rows}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        print(compare(previous["results"], rows).to_string(index=False))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Бенчмарк plot_patterns: время построения фигуры и размер сериализованного
+JSON для бэкендов svg/webgl на синтетических кадрах.
+
+    python -m benchmarks.plot_backends --sizes 10000 100000 1000000 \
+        --output plot_backends.json
+
+Паттерны — отфильтрованные таблицы run_pipeline того же кадра.
+--max-points включает прореживание серий (visualization.lod).
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks.synthetic import synthetic_ohlcv
+from pipeline import run_pipeline
+from visualization.plotter import RENDER_BACKENDS, plot_patterns
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def bench_plot(df, result, render, max_points=None):
+    """
+    {bars, render, build_s, serialize_s, json_bytes, traces} для одного
+    построения фигуры; result — таблицы run_pipeline(df)
+    """
+    fig, build = _timed(
+        plot_patterns,
+        df,
+        result["filtered_candles"],
+        result["filtered_chart"],
+        max_points=max_points,
+        render=render,
+    )
+    payload, serialize = _timed(fig.to_json)
+    return {
+        "bars": len(df),
+        "render": render,
+        "max_points": max_points,
+        "build_s": round(build, 4),
+        "serialize_s": round(serialize, 4),
+        "json_bytes": len(payload),
+        "traces": len(fig.data),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--max-points", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="JSON с результатами")
+    args = parser.parse_args(argv)
+    rows = []
+    for n in args.sizes:
+        df = synthetic_ohlcv(n, seed=args.seed)
+        result = run_pipeline(df)
+        for render in RENDER_BACKENDS:
+            row = bench_plot(df, result, render, args.max_points)
+            rows.append(row)
+            print(
+                f"{n:>9} {render:>6}: build {row['build_s']:.2f}s, "
+                f"to_json {row['serialize_s']:.2f}s, "
+                f"{row['json_bytes'] / 2**20:.1f} MB, {row['traces']} traces"
+            )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Синтетический OHLCV для бенчмарков: воспроизводимое (seed) случайное
+блуждание с кластеризацией волатильности, тенями свечей и объёмом,
+растущим вместе с размахом свечи.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+from storage.ohlcv import TIME_COLUMN
+
+
+def synthetic_ohlcv(
+    n,
+    seed=0,
+    start="2020-01-01",
+    freq="15min",
+    price=30000.0,
+    volatility=0.004,
+    reversion=1e-4,
+):
+    """
+    Кадр из n свечей с колонками datetime, open, high, low, close, volume
+    """
+    rng = np.random.default_rng(seed)
+    # Волатильность — AR(1)-процесс в логарифме (спокойные/бурные периоды)
+    log_vol = lfilter([0.2], [1.0, -0.98], rng.normal(0.0, 0.3, n))
+    sigma = volatility * np.exp(log_vol)
+    # Лог-цена — блуждание со слабым возвратом к price (без ухода в 0/inf
+    # на миллионах свечей)
+    returns = rng.normal(0.0, 1.0, n) * sigma
+    close = price * np.exp(lfilter([1.0], [1.0, -(1.0 - reversion)], returns))
+    open_ = np.r_[price, close[:-1]] * np.exp(rng.normal(0.0, 0.1, n) * sigma)
+    body_high = np.maximum(open_, close)
+    body_low = np.minimum(open_, close)
+    high = body_high * np.exp(np.abs(rng.normal(0.0, 0.7, n)) * sigma)
+    low = body_low * np.exp(-np.abs(rng.normal(0.0, 0.7, n)) * sigma)
+    span = (high - low) / close
+    volume = rng.lognormal(3.0, 0.5, n) * (1.0 + span / volatility)
+    return pd.DataFrame(
+        {
+            TIME_COLUMN: pd.date_range(start, periods=n, freq=freq),
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+        }
+    )
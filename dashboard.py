@@ -1,84 +1,114 @@
+import os
+import re
+
 import dash
 import pandas as pd
-from dash import dcc, html
-
-from analysis import indicators
-from analysis.indicators import (compute_atr, compute_bollinger_bands,
-                                 compute_macd, compute_stochastic)
-from patterns import candlestick, chart
-from visualization.plotter import plot_patterns
-
-# 1. Загрузка и обработка данных (копия твоего pipeline)
-df = pd.read_csv("data/df_high.csv", parse_dates=["datetime"])
-df = indicators.add_basic_indicators(
-    df, ema_periods=[20, 50], sma_periods=[20, 50], rsi_period=14
+import plotly.graph_objects as go
+from dash import Input, Output, Patch, State, dcc, html
+
+from visualization.plotter import (
+    marker_y,
+    plot_patterns,
+    series_traces,
+    series_updates,
 )
+from visualization.snapshot import Snapshot
 
-df["atr_14"] = compute_atr(df)
-df["macd"], df["macd_signal"], df["macd_hist"] = compute_macd(df)
-df["bb_upper"], df["bb_ma"], df["bb_lower"] = compute_bollinger_bands(df)
-df["stoch_k"], df["stoch_d"] = compute_stochastic(df)
-
-candle_patterns = candlestick.find_all_patterns(df)
-chart_patterns = chart.find_all_patterns(df)
-confirmed_candles = candlestick.confirm_candlestick_patterns(df, candle_patterns)
-confirmed_chart = chart.confirm_chart_patterns(df, chart_patterns)
-
-# Фильтрация как раньше (по желанию: можешь добавить интерактивность позже!)
-filtered_candle_patterns = []
-for p in confirmed_candles:
-    idx = p["index"] if isinstance(p["index"], int) else df.index.get_loc(p["index"])
-    row = df.iloc[idx]
-    macd_ok = (
-        row["macd"] > row["macd_signal"]
-        if p["direction"] == "bullish"
-        else row["macd"] < row["macd_signal"]
-    )
-    boll_ok = (
-        (row["close"] < row["bb_lower"])
-        if p["direction"] == "bullish"
-        else (row["close"] > row["bb_upper"])
-    )
-    stoch_ok = (
-        (row["stoch_k"] < 20) if p["direction"] == "bullish" else (row["stoch_k"] > 80)
+# Точек на серию в видимом окне: объём ответа не зависит от длины истории
+MAX_POINTS = 3000
+# Запас по бокам видимого окна (в его ширинах) — панорамирование
+# не упирается в пустоту до следующего ответа сервера
+RANGE_PADDING = 0.5
+
+# DASHBOARD_SNAPSHOT=<каталог> — готовый снимок (export_snapshot.py):
+# старт без анализа, данные читаются с диска (memmap/тайлы). Так дашборд
+# запускается за gunicorn с несколькими воркерами.
+SNAPSHOT_PATH = os.environ.get("DASHBOARD_SNAPSHOT")
+# DASHBOARD_LIVE=<скорость> — live-демо: первая часть истории рисуется
+# сразу, остальное проигрывается (live.sources.ReplaySource) со скоростью
+# <скорость> x реальное время; по таймеру серии пересобираются из истории
+# движка для текущего видимого диапазона
+LIVE_SPEED = os.environ.get("DASHBOARD_LIVE")
+LIVE_HISTORY = 0.5
+LIVE_INTERVAL_MS = 500
+
+if SNAPSHOT_PATH:
+    snapshot = Snapshot(SNAPSHOT_PATH)
+    fig = snapshot.figure()
+    range_updates = snapshot.updates
+else:
+    # pipeline и live импортируются только здесь: воркеры со снимком
+    # не тянут анализ (numba и т.п.) при старте
+    from pipeline import run_pipeline
+    from storage.cache import from_env
+    from storage.ohlcv import TIME_COLUMN, load_ohlcv
+
+    # 1. Загрузка и обработка данных (тот же pipeline, что и в main.py)
+    df = load_ohlcv("data/df_high.csv")
+    if LIVE_SPEED:
+        from live.engine import LiveEngine, start_in_thread
+        from live.pubsub import LiveFeed, PubSub
+        from live.sources import ReplaySource
+
+        replay = ReplaySource(
+            df, speed=float(LIVE_SPEED), start=int(len(df) * LIVE_HISTORY)
+        )
+        df = df.iloc[: replay.start].copy()
+    # Кэш результатов (storage.cache, PIPELINE_CACHE): тёплый перезапуск
+    # читает индикаторы и паттерны с диска
+    result = run_pipeline(df, cache=from_env())
+    filtered_candle_patterns = result["filtered_candles"]
+    filtered_chart_patterns = result["filtered_chart"]
+
+    # --- График: plot_patterns (новая опция: return_fig=True) ---
+    # WebGL-линии: панорамирование длинной истории без перерисовки SVG.
+    # Серии прорежены до MAX_POINTS, маркеры паттернов — полностью.
+    fig = plot_patterns(
+        df,
+        filtered_candle_patterns,
+        filtered_chart_patterns,
+        return_fig=True,
+        render="webgl",
+        max_points=MAX_POINTS,
     )
-    if p["direction"] == "bullish":
-        trend_down = row["close"] < row["ema_20"] and row["ema_20"] < row["ema_50"]
-        high_volume = indicators.is_high_volume(row, factor=1.3)
-        rsi_ok = indicators.is_bullish_rsi(row, threshold=35)
-        if trend_down and high_volume and rsi_ok and macd_ok and boll_ok and stoch_ok:
-            filtered_candle_patterns.append(p)
-    elif p["direction"] == "bearish":
-        trend_up = row["close"] > row["ema_20"] and row["ema_20"] > row["ema_50"]
-        high_volume = indicators.is_high_volume(row, factor=1.3)
-        rsi_ok = indicators.is_bearish_rsi(row, threshold=65)
-        if trend_up and high_volume and rsi_ok and macd_ok and boll_ok and stoch_ok:
-            filtered_candle_patterns.append(p)
-
-filtered_chart_patterns = []
-for p in confirmed_chart:
-    idx = p["indices"][-1]
-    row = df.iloc[idx]
-    t = p["type"].lower()
-    if t == "doublebottom":
-        high_volume = indicators.is_high_volume(row, factor=1.3)
-        rsi_ok = row["rsi"] < 40
-        if high_volume and rsi_ok:
-            filtered_chart_patterns.append(p)
-    elif t == "doubletop":
-        high_volume = indicators.is_high_volume(row, factor=1.3)
-        rsi_ok = row["rsi"] > 60
-        if high_volume and rsi_ok:
-            filtered_chart_patterns.append(p)
+    # Зум пользователя сохраняется при частичных обновлениях фигуры
+    fig.update_layout(uirevision="range")
+    SERIES = series_traces(fig)
+
+    if LIVE_SPEED:
+        # Подтверждённые live-сигналы, прошедшие TA-фильтр
+        fig.add_trace(
+            go.Scattergl(
+                x=[],
+                y=[],
+                mode="markers",
+                name="Live signals",
+                marker={
+                    "symbol": "star",
+                    "size": 18,
+                    "color": "gold",
+                    "line": {"width": 1},
+                },
+                hovertext=[],
+            ),
+            row=1,
+            col=1,
+        )
+        LIVE_TRACE = len(fig.data) - 1
+        bus = PubSub()
+        feed = LiveFeed(bus, topics=("bar", "confirmed"))
+        engine = LiveEngine(replay, bus)
+        engine.seed(df)
+        start_in_thread(engine)
+
+        def range_updates(x_range):
+            return series_updates(engine.frame(), SERIES, MAX_POINTS, x_range)
+
     else:
-        high_volume = indicators.is_high_volume(row, factor=1.3)
-        if high_volume:
-            filtered_chart_patterns.append(p)
 
-# --- График: plot_patterns (новая опция: return_fig=True) ---
-fig = plot_patterns(
-    df, filtered_candle_patterns, filtered_chart_patterns, return_fig=True
-)
+        def range_updates(x_range):
+            return series_updates(df, SERIES, MAX_POINTS, x_range)
+
 
 # === Dash App ===
 app = dash.Dash(__name__)
@@ -92,6 +122,16 @@ app.layout = html.Div(
             style={"height": "1000px", "background": "#1c1e2c"},
             config={"displayModeBar": True, "displaylogo": False},
         ),
+        *(
+            [
+                dcc.Interval(id="live-tick", interval=LIVE_INTERVAL_MS),
+                dcc.Store(id="live-seq", data=0),
+                # Видимый диапазон X (None — весь ряд) для пересборки серий
+                dcc.Store(id="live-range", data=None),
+            ]
+            if LIVE_SPEED
+            else []
+        ),
         html.Div(
             "v0.1 demo",
             style={"color": "#888", "textAlign": "center", "paddingTop": "8px"},
@@ -99,6 +139,110 @@ app.layout = html.Div(
     ],
     style={"background": "#151720", "padding": "30px"},
 )
+# WSGI-приложение для gunicorn: gunicorn dashboard:server
+server = app.server
+
+# Оси X общие: диапазон может прийти от любой из xaxis, xaxis2, ...
+RANGE_KEY = re.compile(r"xaxis\d*\.(range(\[[01]\])?|autorange)$")
+
+
+def visible_range(relayout):
+    """
+    Диапазон X из relayoutData: (начало, конец), None — весь ряд
+    (автомасштаб), False — событие не меняет диапазон X
+    """
+    found = {}
+    for key, value in (relayout or {}).items():
+        match = RANGE_KEY.match(key)
+        if not match:
+            continue
+        prop = match.group(1)
+        if prop == "autorange":
+            return None
+        if prop == "range":
+            found[0], found[1] = value
+        else:
+            found[int(prop[-2])] = value
+    if len(found) < 2:
+        return False
+    start, end = pd.Timestamp(found[0]), pd.Timestamp(found[1])
+    pad = (end - start) * RANGE_PADDING
+    return start - pad, end + pad
+
+
+@app.callback(
+    Output("main-graph", "figure"),
+    Input("main-graph", "relayoutData"),
+    prevent_initial_call=True,
+)
+def update_visible_range(relayout):
+    # Частичное обновление: только данные серий, маркеры и оформление на месте
+    x_range = visible_range(relayout)
+    if x_range is False:
+        return dash.no_update
+    patched = Patch()
+    for i, props in range_updates(x_range).items():
+        for prop, values in props.items():
+            patched["data"][i][prop] = values
+    return patched
+
+
+if LIVE_SPEED and not SNAPSHOT_PATH:
+
+    @app.callback(
+        Output("live-range", "data"),
+        Input("main-graph", "relayoutData"),
+        prevent_initial_call=True,
+    )
+    def remember_range(relayout):
+        x_range = visible_range(relayout)
+        if x_range is False:
+            return dash.no_update
+        return None if x_range is None else [str(t) for t in x_range]
+
+    @app.callback(
+        Output("main-graph", "figure", allow_duplicate=True),
+        Output("live-seq", "data"),
+        Input("live-tick", "n_intervals"),
+        State("live-seq", "data"),
+        State("live-range", "data"),
+        prevent_initial_call=True,
+    )
+    def push_live_updates(_, seq, live_range):
+        # С новыми свечами серии заново режутся из истории под видимый
+        # диапазон (как в update_visible_range): дописывание в конец
+        # после зума давало бы немонотонный x. Сигналы дописываются
+        # в trace "Live signals"; фигура целиком не пересобирается.
+        seq, messages = feed.since(seq)
+        if not messages:
+            return dash.no_update, dash.no_update
+        patched = Patch()
+        if any(topic == "bar" for topic, _ in messages):
+            x_range = None
+            if live_range is not None:
+                x_range = tuple(pd.Timestamp(t) for t in live_range)
+            for i, props in range_updates(x_range).items():
+                for prop, values in props.items():
+                    patched["data"][i][prop] = values
+        signals = [
+            message
+            for topic, message in messages
+            if topic == "confirmed" and message["filtered"]
+        ]
+        if signals:
+            # Поток движка дописывает историю: срезы берутся под её lock
+            views = engine.history.views(["high", "low", TIME_COLUMN])
+            highs, lows, times = views["high"], views["low"], views[TIME_COLUMN]
+            for signal in signals:
+                p = signal["position"]
+                y = marker_y(signal["direction"], p, highs, lows, 0.02)
+                patched["data"][LIVE_TRACE]["x"].append(pd.Timestamp(times[p]))
+                patched["data"][LIVE_TRACE]["y"].append(float(y))
+                patched["data"][LIVE_TRACE]["hovertext"].append(
+                    f"{signal['type']} ({signal['direction']})"
+                )
+        return patched, seq
+
 
 if __name__ == "__main__":
     app.run(debug=True)
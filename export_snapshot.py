@@ -0,0 +1,32 @@
+"""
+Экспорт статического снимка дашборда (visualization.snapshot):
+
+    python export_snapshot.py data/df_high.csv snapshots/df_high
+    DASHBOARD_SNAPSHOT=snapshots/df_high gunicorn -w 4 dashboard:server
+"""
+
+import argparse
+
+from pipeline import run_pipeline
+from storage.ohlcv import load_ohlcv
+from visualization.snapshot import export_snapshot
+
+parser = argparse.ArgumentParser(description="Экспорт снимка дашборда")
+parser.add_argument("csv_path")
+parser.add_argument("path")
+parser.add_argument("--max-points", type=int, default=3000)
+parser.add_argument("--render", default="webgl")
+args = parser.parse_args()
+
+# Тот же pipeline, что и в main.py; маркеры — отфильтрованные сигналы
+df = load_ohlcv(args.csv_path)
+result = run_pipeline(df)
+meta = export_snapshot(
+    df,
+    result["filtered_candles"],
+    result["filtered_chart"],
+    args.path,
+    max_points=args.max_points,
+    render=args.render,
+)
+print(f"{args.path}: {meta['rows']} свечей, {meta['levels']} уровней тайлов")
@@ -0,0 +1,253 @@
+"""
+Live-обработка свечей: источник -> инкрементальные индикаторы и паттерны
+-> подтверждение и TA-фильтр -> pub/sub.
+
+На каждую свечу публикуются сообщения (темы):
+- "bar"       — свеча с индикаторами и позицией (сквозной номер);
+- "signal"    — новый паттерн (свечной или фигура) на момент обнаружения;
+- "confirmed" — паттерн, подтверждённый через lookahead + window - 1
+                свечей после сигнальной; поле "filtered" — прошёл ли
+                TA-фильтр analysis.filters.
+
+Индикаторы (analysis.streaming) и детекторы (patterns.streaming)
+совпадают с батчевым run_pipeline на той же истории, кроме фигур
+на ещё не подтверждённых экстремумах у правого края.
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+
+import numpy as np
+import pandas as pd
+
+from analysis import filters
+from analysis.registry import PIPELINE_INDICATORS, build_columns
+from analysis.streaming import IndicatorSet
+from live.pubsub import PubSub
+from patterns.candlestick import confirm_mask
+from patterns.chart import get_confirm_rule
+from patterns.streaming import StreamingPatternDetector
+from patterns.table import candle_table, chart_points, chart_table
+from storage.ohlcv import TIME_COLUMN
+from storage.resample import OHLCV_COLUMNS
+
+INDICATOR_COLUMNS = list(build_columns(PIPELINE_INDICATORS))
+
+
+class History:
+    """
+    Растущие колонки (удвоение ёмкости): добавление за O(1) амортизированно,
+    срезы — представления без копирования.
+
+    Пишет один поток (движок), читать можно из других (колбэки Dash):
+    append и чтения идут под lock. Уже записанные строки не меняются,
+    поэтому выданные срезы остаются верными и после новых append.
+    """
+
+    def __init__(self, columns, capacity=1024):
+        self.columns = list(columns)
+        self.rows = 0
+        self.lock = threading.Lock()
+        self._data = {c: self._empty(c, capacity) for c in self.columns}
+
+    @staticmethod
+    def _empty(column, capacity):
+        dtype = "datetime64[ns]" if column == TIME_COLUMN else np.float64
+        return np.empty(capacity, dtype=dtype)
+
+    def append(self, row):
+        with self.lock:
+            capacity = len(self._data[self.columns[0]])
+            if self.rows == capacity:
+                for c in self.columns:
+                    grown = self._empty(c, 2 * capacity)
+                    grown[:capacity] = self._data[c]
+                    self._data[c] = grown
+            for c in self.columns:
+                self._data[c][self.rows] = row[c]
+            self.rows += 1
+
+    def view(self, column, start=0, stop=None):
+        return self.views([column], start, stop)[column]
+
+    def views(self, columns, start=0, stop=None):
+        """
+        Срезы [start, stop) нескольких колонок на одно и то же число строк
+        """
+        with self.lock:
+            stop = self.rows if stop is None else min(stop, self.rows)
+            return {c: self._data[c][start:stop] for c in columns}
+
+    def take(self, positions, columns=None):
+        """
+        Строки по списку позиций как DataFrame (RangeIndex)
+        """
+        columns = self.columns if columns is None else columns
+        with self.lock:
+            data = {c: self._data[c][positions] for c in columns}
+        return pd.DataFrame(data)
+
+    def frame(self, start=0, stop=None, columns=None):
+        """
+        Копия строк [start, stop) как DataFrame (индекс — позиции)
+        """
+        columns = self.columns if columns is None else columns
+        with self.lock:
+            stop = self.rows if stop is None else min(stop, self.rows)
+            data = {c: self._data[c][start:stop].copy() for c in columns}
+        return pd.DataFrame(data, index=pd.RangeIndex(start, stop))
+
+
+class LiveEngine:
+    """
+    Инкрементальный pipeline: process(bar) на каждую свечу, run() —
+    асинхронное чтение источника (live.sources) до его конца.
+    lookahead/window/thresholds — как у pipeline.run_pipeline.
+    """
+
+    def __init__(
+        self, source=None, bus=None, lookahead=1, window=1, order=5, **thresholds
+    ):
+        self.source = source
+        self.bus = bus or PubSub()
+        self.lookahead = lookahead
+        self.window = window
+        self.thresholds = thresholds
+        self.indicators = IndicatorSet()
+        self.detector = StreamingPatternDetector(order=order)
+        self.history = History([TIME_COLUMN] + OHLCV_COLUMNS + INDICATOR_COLUMNS)
+        # Очередь подтверждения: (позиция свечи подтверждения, №, вид, паттерн)
+        self._pending = []
+        self._seq = itertools.count()
+
+    def process(self, bar, publish=True):
+        """
+        Обрабатывает свечу; возвращает [(тема, сообщение)] (и публикует их)
+        """
+        position = self.history.rows
+        row = {TIME_COLUMN: pd.Timestamp(bar[TIME_COLUMN])}
+        row.update({c: float(bar[c]) for c in OHLCV_COLUMNS})
+        row.update(self.indicators.update(row))
+        self.history.append(row)
+        events = [("bar", {"position": position, **row})]
+
+        candles, charts = self.detector.update(row, position)
+        span = self.lookahead + self.window - 1
+        for kind, patterns in (("candle", candles), ("chart", charts)):
+            for pattern in patterns:
+                signal = _signal(kind, pattern)
+                events.append(("signal", signal))
+                due = signal["position"] + span
+                heapq.heappush(self._pending, (due, next(self._seq), signal))
+
+        due = []
+        while self._pending and self._pending[0][0] <= position:
+            due.append(heapq.heappop(self._pending)[2])
+        if due:
+            events += self._resolve(due)
+
+        if publish:
+            for topic, message in events:
+                self.bus.publish(topic, message)
+        return events
+
+    def seed(self, df):
+        """
+        Прогоняет историю без публикации (состояние как после live-потока)
+        """
+        for bar in df[[TIME_COLUMN] + OHLCV_COLUMNS].to_dict("records"):
+            self.process(bar, publish=False)
+
+    async def run(self):
+        async for bar in self.source:
+            self.process(bar)
+
+    def frame(self):
+        """
+        Вся история с индикаторами (как df после run_pipeline)
+        """
+        return self.history.frame()
+
+    # --- Подтверждение и фильтр: те же правила, что в батче ---
+    def _resolve(self, signals):
+        events = []
+        for kind, confirm in (
+            ("candle", self._confirm_candles),
+            ("chart", self._confirm_charts),
+        ):
+            group = [s for s in signals if s["kind"] == kind]
+            if not group:
+                continue
+            confirmed = [s for s, ok in zip(group, confirm(group)) if ok]
+            if not confirmed:
+                continue
+            for signal, ok in zip(confirmed, self._filter(kind, confirmed)):
+                events.append(("confirmed", {**signal, "filtered": bool(ok)}))
+        return events
+
+    def _confirm_candles(self, signals):
+        # Все свечные сигналы в очереди на этой свече — с одной позиции
+        p = signals[0]["position"]
+        rows = self.history.frame(
+            p, p + self.lookahead + self.window, ["high", "low", "close"]
+        ).reset_index(drop=True)
+        positions = np.zeros(len(signals), dtype=np.int64)
+        directions = [s["direction"] for s in signals]
+        return confirm_mask(rows, positions, directions, self.lookahead, self.window)
+
+    def _confirm_charts(self, signals):
+        high, low = self.history.view("high"), self.history.view("low")
+        confirmed = []
+        for signal in signals:
+            table = chart_table(signal["type"], signal["direction"], [signal["points"]])
+            upper, lower = get_confirm_rule(signal["type"])(
+                high, low, chart_points(table), np.array([signal["direction"]])
+            )
+            start = signal["position"] + self.lookahead
+            closes = self.history.view("close", start, start + self.window)
+            confirmed.append(closes.max() > upper[0] or closes.min() < lower[0])
+        return confirmed
+
+    def _filter(self, kind, signals):
+        # Условия фильтра построчные: достаточно сигнальных свечей
+        rows = sorted({s["position"] for s in signals})
+        frame = self.history.take(rows)
+        local = np.searchsorted(rows, [s["position"] for s in signals])
+        types = [s["type"] for s in signals]
+        directions = [s["direction"] for s in signals]
+        if kind == "candle":
+            table = candle_table(frame, local, types, directions)
+            return filters.candle_filter_mask(frame, table, **self.thresholds)
+        table = chart_table(types, directions, [[i] for i in local.tolist()])
+        return filters.chart_filter_mask(frame, table, **self.thresholds)
+
+
+def _signal(kind, pattern):
+    if kind == "candle":
+        position = int(pattern["index"])
+        points = [position]
+    else:
+        points = [int(i) for i in pattern["indices"]]
+        # Сигнальная точка фигуры — последняя (как в patterns.table)
+        position = points[-1]
+    return {
+        "kind": kind,
+        "type": pattern["type"],
+        "direction": pattern["direction"],
+        "position": position,
+        "points": points,
+    }
+
+
+def start_in_thread(engine):
+    """
+    Запускает engine.run() в отдельном потоке со своим циклом событий
+    (для синхронных приложений вроде Dash). Возвращает поток.
+    """
+    thread = threading.Thread(
+        target=asyncio.run, args=(engine.run(),), name="live-engine", daemon=True
+    )
+    thread.start()
+    return thread
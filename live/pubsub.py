@@ -0,0 +1,77 @@
+"""
+Внутрипроцессный pub/sub для live-событий.
+
+Подписчики двух видов:
+- асинхронные — subscribe(topic) -> asyncio.Queue (ограниченная: при
+  переполнении выбрасывается самое старое сообщение, медленный
+  подписчик не тормозит ingestion);
+- синхронные — add_listener(topic, callback), вызываются в потоке
+  цикла событий (LiveFeed — буфер для чтения из других потоков, Dash).
+"""
+
+import asyncio
+import itertools
+import threading
+from collections import deque
+
+# Все темы: publish(topic) доставляется и подписчикам "*"
+ALL_TOPICS = "*"
+
+
+class PubSub:
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._queues = {}
+        self._listeners = {}
+
+    def subscribe(self, topic=ALL_TOPICS, maxsize=None):
+        queue = asyncio.Queue(maxsize or self.maxsize)
+        self._queues.setdefault(topic, []).append(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        for queues in self._queues.values():
+            if queue in queues:
+                queues.remove(queue)
+
+    def add_listener(self, topic, callback):
+        self._listeners.setdefault(topic, []).append(callback)
+
+    def remove_listener(self, topic, callback):
+        self._listeners.get(topic, []).remove(callback)
+
+    def publish(self, topic, message):
+        for key in (topic, ALL_TOPICS):
+            for queue in self._queues.get(key, []):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait((topic, message))
+            for callback in self._listeners.get(key, []):
+                callback(topic, message)
+
+
+class LiveFeed:
+    """
+    Потокобезопасный буфер последних сообщений с порядковыми номерами:
+    since(seq) отдаёт всё новее seq (для опроса из Dash-колбэка).
+    """
+
+    def __init__(self, bus, topics=(ALL_TOPICS,), maxlen=10000):
+        self._items = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        for topic in topics:
+            bus.add_listener(topic, self._on_message)
+
+    def _on_message(self, topic, message):
+        with self._lock:
+            self._items.append((next(self._seq), topic, message))
+
+    def since(self, seq=0):
+        """
+        (последний номер, [(topic, message)] с номером > seq)
+        """
+        with self._lock:
+            items = [item for item in self._items if item[0] > seq]
+            last = self._items[-1][0] if self._items else seq
+        return last, [(topic, message) for _, topic, message in items]
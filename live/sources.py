@@ -0,0 +1,68 @@
+"""
+Источники свечей для live.engine.
+
+Источник — асинхронный итератор dict'ов с datetime и OHLCV (время
+по возрастанию). Биржевой WebSocket подключается своим классом
+с тем же интерфейсом: async def __aiter__ -> свечи.
+"""
+
+import abc
+import asyncio
+
+import pandas as pd
+
+from storage.ohlcv import TIME_COLUMN, load_ohlcv
+from storage.resample import OHLCV_COLUMNS
+
+
+class CandleSource(abc.ABC):
+    """
+    Базовый источник: подклассы реализуют bars() — async-генератор свечей
+    """
+
+    @abc.abstractmethod
+    def bars(self):
+        """
+        Асинхронный итератор свечей (dict'ы с datetime и OHLCV)
+        """
+
+    def __aiter__(self):
+        return self.bars()
+
+
+class ReplaySource(CandleSource):
+    """
+    Проигрывание истории как живого потока (для тестов и демо).
+    speed — во сколько раз быстрее реального времени (интервалы между
+    свечами берутся из datetime); delay — фиксированная пауза между
+    свечами в секундах (имеет приоритет); оба None — без пауз.
+    start — с какой позиции кадра начинать.
+    """
+
+    def __init__(self, df, speed=None, delay=None, start=0, time_column=TIME_COLUMN):
+        self.df = df
+        self.speed = speed
+        self.delay = delay
+        self.start = start
+        self.time_column = time_column
+
+    @classmethod
+    def from_csv(cls, path, **kwargs):
+        return cls(load_ohlcv(path), **kwargs)
+
+    def _pauses(self):
+        times = self.df[self.time_column].iloc[self.start :]
+        if self.delay is not None:
+            return [0.0] + [self.delay] * (len(times) - 1)
+        if self.speed is None:
+            return [0.0] * len(times)
+        gaps = pd.Series(times).diff().dt.total_seconds().fillna(0.0)
+        return (gaps / self.speed).tolist()
+
+    async def bars(self):
+        columns = [self.time_column] + OHLCV_COLUMNS
+        rows = self.df[columns].iloc[self.start :].to_dict("records")
+        for pause, bar in zip(self._pauses(), rows):
+            # Даже без паузы отдаём управление циклу событий
+            await asyncio.sleep(pause)
+            yield bar
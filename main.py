@@ -1,91 +1,23 @@
-import pandas as pd
+import sys
 
-from analysis import indicators
-from analysis.indicators import (compute_atr, compute_bollinger_bands,
-                                 compute_macd, compute_stochastic)
-from patterns import candlestick, chart
+from analysis.backtest import backtest_results
+from pipeline import run_pipeline
+from storage.cache import from_env
+from storage.ohlcv import load_ohlcv
 from visualization.plotter import plot_patterns
 
-# 1. Загрузка данных
-df = pd.read_csv("data/df_high.csv", parse_dates=["datetime"])
+# 1. Загрузка данных (колоночное хранилище рядом с CSV, memmap)
+df = load_ohlcv("data/df_high.csv")
 
-# 2. Добавляем индикаторы (EMA20, EMA50, SMA, RSI, средний объём и др.)
-df = indicators.add_basic_indicators(
-    df, ema_periods=[20, 50], sma_periods=[20, 50], rsi_period=14
-)
-
-# === ATR 14 ===
-df["atr_14"] = compute_atr(df)
-
-# === MACD ===
-df["macd"], df["macd_signal"], df["macd_hist"] = compute_macd(df)
-
-# === Bollinger Bands ===
-df["bb_upper"], df["bb_ma"], df["bb_lower"] = compute_bollinger_bands(df)
-
-# === Stochastic Oscillator ===
-df["stoch_k"], df["stoch_d"] = compute_stochastic(df)
-
-# 3. Поиск паттернов
-candle_patterns = candlestick.find_all_patterns(df)
-chart_patterns = chart.find_all_patterns(df)
-
-# 4. Подтверждение паттернов (по классике, по уровням)
-confirmed_candles = candlestick.confirm_candlestick_patterns(df, candle_patterns)
-confirmed_chart = chart.confirm_chart_patterns(df, chart_patterns)
-
-# 5. Фильтрация свечных паттернов по объёму, RSI и тренду (TA-правила)
-filtered_candle_patterns = []
-for p in confirmed_candles:
-    idx = p["index"] if isinstance(p["index"], int) else df.index.get_loc(p["index"])
-    row = df.iloc[idx]
-    # Используем MACD, Bollinger, Stoch
-    macd_ok = (
-        row["macd"] > row["macd_signal"]
-        if p["direction"] == "bullish"
-        else row["macd"] < row["macd_signal"]
-    )
-    boll_ok = (
-        (row["close"] < row["bb_lower"])
-        if p["direction"] == "bullish"
-        else (row["close"] > row["bb_upper"])
-    )
-    stoch_ok = (
-        (row["stoch_k"] < 20) if p["direction"] == "bullish" else (row["stoch_k"] > 80)
-    )
-    if p["direction"] == "bullish":
-        trend_down = row["close"] < row["ema_20"] and row["ema_20"] < row["ema_50"]
-        high_volume = indicators.is_high_volume(row, factor=1.3)
-        rsi_ok = indicators.is_bullish_rsi(row, threshold=35)
-        if trend_down and high_volume and rsi_ok and macd_ok and boll_ok and stoch_ok:
-            filtered_candle_patterns.append(p)
-    elif p["direction"] == "bearish":
-        trend_up = row["close"] > row["ema_20"] and row["ema_20"] > row["ema_50"]
-        high_volume = indicators.is_high_volume(row, factor=1.3)
-        rsi_ok = indicators.is_bearish_rsi(row, threshold=65)
-        if trend_up and high_volume and rsi_ok and macd_ok and boll_ok and stoch_ok:
-            filtered_candle_patterns.append(p)
-# 6. Фильтрация фигурных паттернов по объёму и RSI (по желанию — можно сложнее!)
-filtered_chart_patterns = []
-for p in confirmed_chart:
-    idx = p["indices"][-1]  # подтверждение по последней точке фигуры
-    row = df.iloc[idx]
-    t = p["type"].lower()
-    if t == "doublebottom":
-        high_volume = indicators.is_high_volume(row, factor=1.3)
-        rsi_ok = row["rsi"] < 40
-        if high_volume and rsi_ok:
-            filtered_chart_patterns.append(p)
-    elif t == "doubletop":
-        high_volume = indicators.is_high_volume(row, factor=1.3)
-        rsi_ok = row["rsi"] > 60
-        if high_volume and rsi_ok:
-            filtered_chart_patterns.append(p)
-    else:
-        # Для остальных фигур фильтруем только по объёму (или дополни по своему правилу)
-        high_volume = indicators.is_high_volume(row, factor=1.3)
-        if high_volume:
-            filtered_chart_patterns.append(p)
+# 2-6. Индикаторы (EMA, SMA, RSI, ATR, MACD, Bollinger, Stochastic),
+# поиск паттернов, подтверждение по уровням и TA-фильтры (pipeline.py).
+# Результаты кэшируются на диске (storage.cache): повторный запуск на той же
+# истории читает готовое. PIPELINE_CACHE=<каталог> | off или флаг --no-cache
+cache = None if "--no-cache" in sys.argv[1:] else from_env()
+result = run_pipeline(df, cache=cache)
 
 # 7. Визуализация только сильных сигналов!
-plot_patterns(df, filtered_candle_patterns, filtered_chart_patterns)
+plot_patterns(df, result["filtered_candles"], result["filtered_chart"])
+
+# 8. Бэктест подтверждённых и отфильтрованных сигналов по типам и направлениям
+print(backtest_results(df, result).to_string())
@@ -1,350 +1,374 @@
-def confirm_candlestick_patterns(df, patterns, lookahead=1):
+import numpy as np
+import pandas as pd
+
+from patterns.confirm import forward_extremes
+from patterns.table import as_table, candle_table, concat_tables, select
+
+
+def candle_features(df):
+    """
+    Геометрия свечей одним проходом по numpy-массивам:
+    тело, верхняя/нижняя тень и диапазон для каждой свечи.
+    Считается один раз на DataFrame и переиспользуется всеми детекторами.
+    Колонки df могут быть и numpy-массивами (patterns.streaming).
+    """
+    open = np.asarray(df["open"], dtype=np.float64)
+    high = np.asarray(df["high"], dtype=np.float64)
+    low = np.asarray(df["low"], dtype=np.float64)
+    close = np.asarray(df["close"], dtype=np.float64)
+    f = {
+        "open": open,
+        "high": high,
+        "low": low,
+        "close": close,
+        "body": np.abs(close - open),
+        "upper_shadow": high - np.maximum(open, close),
+        "lower_shadow": np.minimum(open, close) - low,
+        "range": high - low,
+    }
+    # Сдвинутые на 1 и 2 свечи массивы для многосвечных паттернов
+    for lag in (1, 2):
+        for col in ("open", "high", "low", "close", "body"):
+            f[f"{col}_{lag}"] = _lag(f[col], lag)
+    return f
+
+
+def _lag(values, lag):
+    """
+    Аналог Series.shift(lag) для numpy: первые lag значений = NaN
+    """
+    if lag == 0:
+        return values
+    out = np.full(len(values), np.nan)
+    if lag < len(values):
+        out[lag:] = values[:-lag]
+    return out
+
+
+def _mask_to_patterns(df, mask, name, direction, columnar=False):
+    """
+    Булева маска по свечам -> список паттернов в прежнем формате
+    (или таблица patterns.table при columnar=True)
+    """
+    positions = np.flatnonzero(mask)
+    if columnar:
+        return candle_table(df, positions, name, direction)
+    labels = df.index[positions].tolist()
+    return [{"type": name, "index": i, "direction": direction} for i in labels]
+
+
+def _masks_to_patterns(df, name, bullish, bearish, columnar=False):
+    """
+    Две маски (bullish/bearish) -> паттерны в порядке свечей
+    """
+    positions = np.flatnonzero(bullish | bearish)
+    is_bullish = bullish[positions]
+    if columnar:
+        directions = pd.Categorical.from_codes(
+            is_bullish.astype(np.int8), ["bearish", "bullish"]
+        )
+        return candle_table(df, positions, name, directions)
+    return [
+        {"type": name, "index": i, "direction": "bullish" if b else "bearish"}
+        for i, b in zip(df.index[positions].tolist(), is_bullish.tolist())
+    ]
+
+
+def confirm_mask(df, positions, directions, lookahead=1, window=1):
+    """
+    Пакетное подтверждение по массиву позиций сигнальных свечей:
+    - bullish: закрытие любой из свечей [i+lookahead, i+lookahead+window-1]
+      выше high сигнальной
+    - bearish: закрытие любой из этих свечей ниже low сигнальной
+    Возвращает булеву маску той же длины, что positions.
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    directions = np.asarray(directions)
+    fwd_max, fwd_min, valid = forward_extremes(df["close"], lookahead, window)
+    high = df["high"].to_numpy(dtype=np.float64)
+    low = df["low"].to_numpy(dtype=np.float64)
+    bullish = directions == "bullish"
+    bearish = directions == "bearish"
+    # neutral: можно не подтверждать, либо своё правило
+    confirmed = (bullish & (fwd_max[positions] > high[positions])) | (
+        bearish & (fwd_min[positions] < low[positions])
+    )
+    return confirmed & valid[positions]  # Нет следующей свечи -> не подтверждён
+
+
+def confirm_candlestick_patterns(df, patterns, lookahead=1, window=1):
     """
     Подтверждение свечных паттернов:
     - bullish: следующая свеча закрытие > high сигнальной
     - bearish: следующая свеча закрытие < low сигнальной
+    window > 1 — подтверждение любой из window свечей начиная с lookahead.
+    Принимает список dict'ов или таблицу, возвращает в том же виде.
+    """
+    table = as_table(df, patterns, chart=False)
+    confirmed = confirm_mask(
+        df, table["position"], table["direction"], lookahead=lookahead, window=window
+    )
+    return select(patterns, confirmed)
+
+
+# Типы паттернов в порядке find_all_patterns (порядок строк результата;
+# внутри типа строки идут по позиции свечи)
+PATTERN_TYPES = (
+    "Hammer",
+    "InvertedHammer",
+    "Engulfing",
+    "Doji",
+    "MorningStar",
+    "EveningStar",
+    "ShootingStar",
+    "HangingMan",
+    "Harami",
+    "ThreeWhiteSoldiers",
+    "ThreeBlackCrows",
+    "PiercingLine",
+    "DarkCloudCover",
+    "SpinningTop",
+    "Marubozu",
+    "TweezerTop",
+    "TweezerBottom",
+)
+
+
+def find_all_patterns(df, columnar=False):
+    """
+    Все свечные паттерны. columnar=True — одна таблица patterns.table
+    вместо списка dict'ов (порядок строк тот же).
     """
-    confirmed = []
-    for p in patterns:
-        idx = (
-            p["index"] if isinstance(p["index"], int) else df.index.get_loc(p["index"])
+    kw = {"features": candle_features(df), "columnar": columnar}
+    results = [
+        detect_hammer(df, **kw),
+        detect_inverted_hammer(df, **kw),
+        detect_engulfing(df, **kw),
+        detect_doji(df, **kw),
+        detect_morning_star(df, **kw),
+        detect_evening_star(df, **kw),
+        detect_shooting_star(df, **kw),
+        detect_hanging_man(df, **kw),
+        detect_harami(df, **kw),
+        detect_three_white_soldiers(df, **kw),
+        detect_three_black_crows(df, **kw),
+        detect_piercing_line(df, **kw),
+        detect_dark_cloud_cover(df, **kw),
+        detect_spinning_top(df, **kw),
+        detect_marubozu(df, **kw),
+        detect_tweezer_top(df, **kw),
+        detect_tweezer_bottom(df, **kw),
+    ]
+    if columnar:
+        return concat_tables(results)
+    return [p for patterns in results for p in patterns]
+
+
+def _long_lower_shadow(f, body_ratio, shadow_ratio):
+    body = f["body"]
+    return (
+        (body > 0)
+        & (f["lower_shadow"] > shadow_ratio * body)
+        & (f["upper_shadow"] < body_ratio * body)
+    )
+
+
+def _long_upper_shadow(f, body_ratio, shadow_ratio):
+    body = f["body"]
+    return (
+        (body > 0)
+        & (f["upper_shadow"] > shadow_ratio * body)
+        & (f["lower_shadow"] < body_ratio * body)
+    )
+
+
+def detect_hammer(df, body_ratio=0.33, shadow_ratio=2, features=None, columnar=False):
+    f = features if features is not None else candle_features(df)
+    mask = _long_lower_shadow(f, body_ratio, shadow_ratio)
+    return _mask_to_patterns(df, mask, "Hammer", "bullish", columnar)
+
+
+def detect_inverted_hammer(
+    df, body_ratio=0.33, shadow_ratio=2, features=None, columnar=False
+):
+    f = features if features is not None else candle_features(df)
+    mask = _long_upper_shadow(f, body_ratio, shadow_ratio)
+    return _mask_to_patterns(df, mask, "InvertedHammer", "bullish", columnar)
+
+
+def detect_engulfing(df, features=None, columnar=False):
+    f = features if features is not None else candle_features(df)
+    prev_body = f["close_1"] - f["open_1"]
+    curr_body = f["close"] - f["open"]
+    # Bullish engulfing
+    bullish = (
+        (prev_body < 0)
+        & (curr_body > 0)
+        & (f["open"] < f["close_1"])
+        & (f["close"] > f["open_1"])
+    )
+    # Bearish engulfing
+    bearish = (
+        (prev_body > 0)
+        & (curr_body < 0)
+        & (f["open"] > f["close_1"])
+        & (f["close"] < f["open_1"])
+    )
+    return _masks_to_patterns(df, "Engulfing", bullish, bearish, columnar)
+
+
+def detect_doji(df, body_to_range=0.05, features=None, columnar=False):
+    f = features if features is not None else candle_features(df)
+    rng = f["range"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mask = (rng > 0) & (f["body"] / rng < body_to_range)
+    return _mask_to_patterns(df, mask, "Doji", "neutral", columnar)
+
+
+def detect_morning_star(df, features=None, columnar=False):
+    f = features if features is not None else candle_features(df)
+    o1, c1 = f["open_2"], f["close_2"]
+    o3, c3 = f["open"], f["close"]
+    mask = (c1 < o1) & (f["body_1"] < f["body_2"]) & (c3 > o3) & (c3 > (o1 + c1) / 2)
+    return _mask_to_patterns(df, mask, "MorningStar", "bullish", columnar)
+
+
+def detect_evening_star(df, features=None, columnar=False):
+    f = features if features is not None else candle_features(df)
+    o1, c1 = f["open_2"], f["close_2"]
+    o3, c3 = f["open"], f["close"]
+    mask = (c1 > o1) & (f["body_1"] < f["body_2"]) & (c3 < o3) & (c3 < (o1 + c1) / 2)
+    return _mask_to_patterns(df, mask, "EveningStar", "bearish", columnar)
+
+
+def detect_shooting_star(
+    df, body_ratio=0.33, shadow_ratio=2, features=None, columnar=False
+):
+    f = features if features is not None else candle_features(df)
+    mask = _long_upper_shadow(f, body_ratio, shadow_ratio)
+    return _mask_to_patterns(df, mask, "ShootingStar", "bearish", columnar)
+
+
+def detect_hanging_man(
+    df, body_ratio=0.33, shadow_ratio=2, features=None, columnar=False
+):
+    f = features if features is not None else candle_features(df)
+    mask = _long_lower_shadow(f, body_ratio, shadow_ratio)
+    return _mask_to_patterns(df, mask, "HangingMan", "bearish", columnar)
+
+
+def detect_harami(df, features=None, columnar=False):
+    f = features if features is not None else candle_features(df)
+    prev_body = f["close_1"] - f["open_1"]
+    curr_body = f["close"] - f["open"]
+    # Bullish Harami
+    bullish = (
+        (prev_body < 0)
+        & (curr_body > 0)
+        & (f["open"] > f["close_1"])
+        & (f["close"] < f["open_1"])
+    )
+    # Bearish Harami
+    bearish = (
+        (prev_body > 0)
+        & (curr_body < 0)
+        & (f["open"] < f["close_1"])
+        & (f["close"] > f["open_1"])
+    )
+    return _masks_to_patterns(df, "Harami", bullish, bearish, columnar)
+
+
+def detect_three_white_soldiers(df, features=None, columnar=False):
+    f = features if features is not None else candle_features(df)
+    c1, o1 = f["close_2"], f["open_2"]
+    c2, o2 = f["close_1"], f["open_1"]
+    c3, o3 = f["close"], f["open"]
+    mask = (c1 > o1) & (c2 > o2) & (c3 > o3) & (c2 > c1) & (c3 > c2)
+    return _mask_to_patterns(df, mask, "ThreeWhiteSoldiers", "bullish", columnar)
+
+
+def detect_three_black_crows(df, features=None, columnar=False):
+    f = features if features is not None else candle_features(df)
+    c1, o1 = f["close_2"], f["open_2"]
+    c2, o2 = f["close_1"], f["open_1"]
+    c3, o3 = f["close"], f["open"]
+    mask = (c1 < o1) & (c2 < o2) & (c3 < o3) & (c2 < c1) & (c3 < c2)
+    return _mask_to_patterns(df, mask, "ThreeBlackCrows", "bearish", columnar)
+
+
+def detect_piercing_line(df, features=None, columnar=False):
+    f = features if features is not None else candle_features(df)
+    prev_body = f["close_1"] - f["open_1"]
+    curr_body = f["close"] - f["open"]
+    midpoint = (f["open_1"] + f["close_1"]) / 2
+    mask = (
+        (prev_body < 0)
+        & (curr_body > 0)
+        & (f["open"] < f["close_1"])
+        & (f["close"] > midpoint)
+        & (f["close"] < f["open_1"])
+    )
+    return _mask_to_patterns(df, mask, "PiercingLine", "bullish", columnar)
+
+
+def detect_dark_cloud_cover(df, features=None, columnar=False):
+    f = features if features is not None else candle_features(df)
+    prev_body = f["close_1"] - f["open_1"]
+    curr_body = f["close"] - f["open"]
+    midpoint = (f["open_1"] + f["close_1"]) / 2
+    mask = (
+        (prev_body > 0)
+        & (curr_body < 0)
+        & (f["open"] > f["close_1"])
+        & (f["close"] < midpoint)
+        & (f["close"] > f["open_1"])
+    )
+    return _mask_to_patterns(df, mask, "DarkCloudCover", "bearish", columnar)
+
+
+def detect_spinning_top(df, min_body=0.2, max_body=0.5, features=None, columnar=False):
+    f = features if features is not None else candle_features(df)
+    rng = f["range"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel_body = f["body"] / rng
+        rel_upper = f["upper_shadow"] / rng
+        rel_lower = f["lower_shadow"] / rng
+    mask = (
+        (rng > 0)
+        & (min_body < rel_body)
+        & (rel_body < max_body)
+        & (rel_upper > 0.2)
+        & (rel_lower > 0.2)
+    )
+    return _mask_to_patterns(df, mask, "SpinningTop", "neutral", columnar)
+
+
+def detect_marubozu(df, shadow_ratio=0.03, features=None, columnar=False):
+    f = features if features is not None else candle_features(df)
+    rng = f["range"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mask = (
+            (rng > 0)
+            & (f["upper_shadow"] / rng < shadow_ratio)
+            & (f["lower_shadow"] / rng < shadow_ratio)
         )
-        if idx + lookahead >= len(df):
-            continue  # Нет следующей свечи
-        next_row = df.iloc[idx + lookahead]
-        row = df.iloc[idx]
-        if p["direction"] == "bullish":
-            if next_row["close"] > row["high"]:
-                confirmed.append(p)
-        elif p["direction"] == "bearish":
-            if next_row["close"] < row["low"]:
-                confirmed.append(p)
-        elif p["direction"] == "neutral":
-            # Можно не подтверждать, либо своё правило
-            pass
-    return confirmed
-
-
-def find_all_patterns(df):
-    patterns = []
-    patterns += detect_hammer(df)
-    patterns += detect_inverted_hammer(df)
-    patterns += detect_engulfing(df)
-    patterns += detect_doji(df)
-    patterns += detect_morning_star(df)
-    patterns += detect_evening_star(df)
-    patterns += detect_shooting_star(df)
-    patterns += detect_hanging_man(df)
-    patterns += detect_harami(df)
-    patterns += detect_three_white_soldiers(df)
-    patterns += detect_three_black_crows(df)
-    patterns += detect_piercing_line(df)
-    patterns += detect_dark_cloud_cover(df)
-    patterns += detect_spinning_top(df)
-    patterns += detect_marubozu(df)
-    patterns += detect_tweezer_top(df)
-    patterns += detect_tweezer_bottom(df)
-    return patterns
-
-
-def detect_hammer(df, body_ratio=0.33, shadow_ratio=2):
-    patterns = []
-    for idx, row in df.iterrows():
-        open, high, low, close = row["open"], row["high"], row["low"], row["close"]
-        body = abs(close - open)
-        lower_shadow = min(open, close) - low
-        upper_shadow = high - max(open, close)
-        if (
-            body > 0
-            and lower_shadow > shadow_ratio * body
-            and upper_shadow < body_ratio * body
-        ):
-            patterns.append({"type": "Hammer", "index": idx, "direction": "bullish"})
-    return patterns
-
-
-def detect_inverted_hammer(df, body_ratio=0.33, shadow_ratio=2):
-    patterns = []
-    for i, row in df.iterrows():
-        open, high, low, close = row["open"], row["high"], row["low"], row["close"]
-        body = abs(close - open)
-        upper_shadow = high - max(open, close)
-        lower_shadow = min(open, close) - low
-        if (
-            body > 0
-            and upper_shadow > shadow_ratio * body
-            and lower_shadow < body_ratio * body
-        ):
-            patterns.append(
-                {"type": "InvertedHammer", "index": i, "direction": "bullish"}
-            )
-    return patterns
-
-
-def detect_engulfing(df):
-    patterns = []
-    for i in range(1, len(df)):
-        prev = df.iloc[i - 1]
-        curr = df.iloc[i]
-        prev_body = prev["close"] - prev["open"]
-        curr_body = curr["close"] - curr["open"]
-        # Bullish engulfing
-        if prev_body < 0 and curr_body > 0:
-            if curr["open"] < prev["close"] and curr["close"] > prev["open"]:
-                patterns.append(
-                    {"type": "Engulfing", "index": df.index[i], "direction": "bullish"}
-                )
-        # Bearish engulfing
-        if prev_body > 0 and curr_body < 0:
-            if curr["open"] > prev["close"] and curr["close"] < prev["open"]:
-                patterns.append(
-                    {"type": "Engulfing", "index": df.index[i], "direction": "bearish"}
-                )
-    return patterns
-
-
-def detect_doji(df, body_to_range=0.05):
-    patterns = []
-    for i, row in df.iterrows():
-        open, high, low, close = row["open"], row["high"], row["low"], row["close"]
-        body = abs(close - open)
-        rng = high - low
-        if rng > 0 and body / rng < body_to_range:
-            patterns.append({"type": "Doji", "index": i, "direction": "neutral"})
-    return patterns
-
-
-def detect_morning_star(df):
-    patterns = []
-    for i in range(2, len(df)):
-        o1, c1 = df.iloc[i - 2][["open", "close"]]
-        o2, c2 = df.iloc[i - 1][["open", "close"]]
-        o3, c3 = df.iloc[i][["open", "close"]]
-        if (
-            (c1 < o1)
-            and (abs(c2 - o2) < abs(c1 - o1))
-            and (c3 > o3)
-            and (c3 > (o1 + c1) / 2)
-        ):
-            patterns.append(
-                {"type": "MorningStar", "index": df.index[i], "direction": "bullish"}
-            )
-    return patterns
-
-
-def detect_evening_star(df):
-    patterns = []
-    for i in range(2, len(df)):
-        o1, c1 = df.iloc[i - 2][["open", "close"]]
-        o2, c2 = df.iloc[i - 1][["open", "close"]]
-        o3, c3 = df.iloc[i][["open", "close"]]
-        if (
-            (c1 > o1)
-            and (abs(c2 - o2) < abs(c1 - o1))
-            and (c3 < o3)
-            and (c3 < (o1 + c1) / 2)
-        ):
-            patterns.append(
-                {"type": "EveningStar", "index": df.index[i], "direction": "bearish"}
-            )
-    return patterns
-
-
-def detect_shooting_star(df, body_ratio=0.33, shadow_ratio=2):
-    patterns = []
-    for i, row in df.iterrows():
-        open, high, low, close = row["open"], row["high"], row["low"], row["close"]
-        body = abs(close - open)
-        upper_shadow = high - max(open, close)
-        lower_shadow = min(open, close) - low
-        if (
-            body > 0
-            and upper_shadow > shadow_ratio * body
-            and lower_shadow < body_ratio * body
-        ):
-            patterns.append(
-                {"type": "ShootingStar", "index": i, "direction": "bearish"}
-            )
-    return patterns
-
-
-def detect_hanging_man(df, body_ratio=0.33, shadow_ratio=2):
-    patterns = []
-    for i, row in df.iterrows():
-        open, high, low, close = row["open"], row["high"], row["low"], row["close"]
-        body = abs(close - open)
-        lower_shadow = min(open, close) - low
-        upper_shadow = high - max(open, close)
-        if (
-            body > 0
-            and lower_shadow > shadow_ratio * body
-            and upper_shadow < body_ratio * body
-        ):
-            patterns.append({"type": "HangingMan", "index": i, "direction": "bearish"})
-    return patterns
-
-
-def detect_harami(df):
-    patterns = []
-    for i in range(1, len(df)):
-        prev = df.iloc[i - 1]
-        curr = df.iloc[i]
-        prev_body = prev["close"] - prev["open"]
-        curr_body = curr["close"] - curr["open"]
-        # Bullish Harami
-        if prev_body < 0 and curr_body > 0:
-            if curr["open"] > prev["close"] and curr["close"] < prev["open"]:
-                patterns.append(
-                    {"type": "Harami", "index": df.index[i], "direction": "bullish"}
-                )
-        # Bearish Harami
-        if prev_body > 0 and curr_body < 0:
-            if curr["open"] < prev["close"] and curr["close"] > prev["open"]:
-                patterns.append(
-                    {"type": "Harami", "index": df.index[i], "direction": "bearish"}
-                )
-    return patterns
-
-
-def detect_three_white_soldiers(df):
-    patterns = []
-    for i in range(2, len(df)):
-        c1, o1 = df.iloc[i - 2][["close", "open"]]
-        c2, o2 = df.iloc[i - 1][["close", "open"]]
-        c3, o3 = df.iloc[i][["close", "open"]]
-        if (c1 > o1) and (c2 > o2) and (c3 > o3):
-            if (c2 > c1) and (c3 > c2):
-                patterns.append(
-                    {
-                        "type": "ThreeWhiteSoldiers",
-                        "index": df.index[i],
-                        "direction": "bullish",
-                    }
-                )
-    return patterns
-
-
-def detect_three_black_crows(df):
-    patterns = []
-    for i in range(2, len(df)):
-        c1, o1 = df.iloc[i - 2][["close", "open"]]
-        c2, o2 = df.iloc[i - 1][["close", "open"]]
-        c3, o3 = df.iloc[i][["close", "open"]]
-        if (c1 < o1) and (c2 < o2) and (c3 < o3):
-            if (c2 < c1) and (c3 < c2):
-                patterns.append(
-                    {
-                        "type": "ThreeBlackCrows",
-                        "index": df.index[i],
-                        "direction": "bearish",
-                    }
-                )
-    return patterns
-
-
-def detect_piercing_line(df):
-    patterns = []
-    for i in range(1, len(df)):
-        prev = df.iloc[i - 1]
-        curr = df.iloc[i]
-        prev_body = prev["close"] - prev["open"]
-        curr_body = curr["close"] - curr["open"]
-        if prev_body < 0 and curr_body > 0:
-            midpoint = (prev["open"] + prev["close"]) / 2
-            if (
-                curr["open"] < prev["close"]
-                and curr["close"] > midpoint
-                and curr["close"] < prev["open"]
-            ):
-                patterns.append(
-                    {
-                        "type": "PiercingLine",
-                        "index": df.index[i],
-                        "direction": "bullish",
-                    }
-                )
-    return patterns
-
-
-def detect_dark_cloud_cover(df):
-    patterns = []
-    for i in range(1, len(df)):
-        prev = df.iloc[i - 1]
-        curr = df.iloc[i]
-        prev_body = prev["close"] - prev["open"]
-        curr_body = curr["close"] - curr["open"]
-        if prev_body > 0 and curr_body < 0:
-            midpoint = (prev["open"] + prev["close"]) / 2
-            if (
-                curr["open"] > prev["close"]
-                and curr["close"] < midpoint
-                and curr["close"] > prev["open"]
-            ):
-                patterns.append(
-                    {
-                        "type": "DarkCloudCover",
-                        "index": df.index[i],
-                        "direction": "bearish",
-                    }
-                )
-    return patterns
-
-
-def detect_spinning_top(df, min_body=0.2, max_body=0.5):
-    patterns = []
-    for i, row in df.iterrows():
-        open, high, low, close = row["open"], row["high"], row["low"], row["close"]
-        rng = high - low
-        body = abs(close - open)
-        upper = high - max(open, close)
-        lower = min(open, close) - low
-        if rng > 0:
-            rel_body = body / rng
-            rel_upper = upper / rng
-            rel_lower = lower / rng
-            if min_body < rel_body < max_body and rel_upper > 0.2 and rel_lower > 0.2:
-                patterns.append(
-                    {"type": "SpinningTop", "index": i, "direction": "neutral"}
-                )
-    return patterns
-
-
-def detect_marubozu(df, shadow_ratio=0.03):
-    patterns = []
-    for i, row in df.iterrows():
-        open, high, low, close = row["open"], row["high"], row["low"], row["close"]
-        upper_shadow = high - max(open, close)
-        lower_shadow = min(open, close) - low
-        rng = high - low
-        if (
-            rng > 0
-            and upper_shadow / rng < shadow_ratio
-            and lower_shadow / rng < shadow_ratio
-        ):
-            direction = "bullish" if close > open else "bearish"
-            patterns.append({"type": "Marubozu", "index": i, "direction": direction})
-    return patterns
-
-
-def detect_tweezer_top(df, lookback=1):
-    patterns = []
-    for i in range(lookback, len(df)):
-        prev = df.iloc[i - lookback]
-        curr = df.iloc[i]
-        if abs(prev["high"] - curr["high"]) < 1e-8:
-            patterns.append(
-                {"type": "TweezerTop", "index": df.index[i], "direction": "bearish"}
-            )
-    return patterns
-
-
-def detect_tweezer_bottom(df, lookback=1):
-    patterns = []
-    for i in range(lookback, len(df)):
-        prev = df.iloc[i - lookback]
-        curr = df.iloc[i]
-        if abs(prev["low"] - curr["low"]) < 1e-8:
-            patterns.append(
-                {"type": "TweezerBottom", "index": df.index[i], "direction": "bullish"}
-            )
-    return patterns
+    bullish = f["close"] > f["open"]
+    return _masks_to_patterns(df, "Marubozu", mask & bullish, mask & ~bullish, columnar)
+
+
+def detect_tweezer_top(df, lookback=1, features=None, columnar=False):
+    f = features if features is not None else candle_features(df)
+    prev_high = f.get(f"high_{lookback}")
+    if prev_high is None:
+        prev_high = _lag(f["high"], lookback)
+    mask = np.abs(prev_high - f["high"]) < 1e-8
+    return _mask_to_patterns(df, mask, "TweezerTop", "bearish", columnar)
+
+
+def detect_tweezer_bottom(df, lookback=1, features=None, columnar=False):
+    f = features if features is not None else candle_features(df)
+    prev_low = f.get(f"low_{lookback}")
+    if prev_low is None:
+        prev_low = _lag(f["low"], lookback)
+    mask = np.abs(prev_low - f["low"]) < 1e-8
+    return _mask_to_patterns(df, mask, "TweezerBottom", "bullish", columnar)
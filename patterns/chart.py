@@ -1,199 +1,298 @@
 import numpy as np
-from scipy.signal import argrelextrema
 
+from patterns.confirm import forward_extremes
+from patterns.swings import Swings
+from patterns.table import as_table, chart_points, chart_table, concat_tables, select
 
-def confirm_chart_patterns(df, patterns, lookahead=1):
+
+def _emit(name, points, direction, columnar=False):
+    """
+    Точки найденных фигур -> список dict'ов (старый формат)
+    или таблица patterns.table при columnar=True.
+    direction — строка или список строк по фигурам.
+    """
+    if columnar:
+        return chart_table(name, direction, points)
+    if isinstance(direction, str):
+        direction = [direction] * len(points)
+    return [
+        {"type": name, "indices": idxs, "direction": d}
+        for idxs, d in zip(points, direction)
+    ]
+
+
+# --- Правила подтверждения (пробоя) фигур ---
+# Правило получает high/low всего кадра, матрицу точек фигур одного типа
+# (n, MAX_POINTS; -1 = нет точки) и их направления, и возвращает два уровня:
+# upper — фигура подтверждена закрытием выше, lower — закрытием ниже.
+# NaN = такого пробоя у фигуры нет.
+CONFIRM_RULES = {}
+FAMILY_RULES = {}
+
+
+def register_confirm_rule(*names, family=False):
+    """
+    Регистрирует правило пробоя для типов фигур (без учёта регистра).
+    family=True — правило для всех типов, в имени которых есть подстрока
+    (например, "wedge" для RisingWedge/FallingWedge).
+    """
+
+    def decorator(rule):
+        registry = FAMILY_RULES if family else CONFIRM_RULES
+        for name in names:
+            registry[name.lower()] = rule
+        return rule
+
+    return decorator
+
+
+def get_confirm_rule(name):
+    name = name.lower()
+    if name in CONFIRM_RULES:
+        return CONFIRM_RULES[name]
+    for key, rule in FAMILY_RULES.items():
+        if key in name:
+            return rule
+    return _confirm_last_point
+
+
+def _at(values, points, fill):
+    """
+    values[points] с заполнением fill на месте отсутствующих точек (-1)
+    """
+    return np.where(points >= 0, values[np.maximum(points, 0)], fill)
+
+
+def _max_high(high, points):
+    return _at(high, points, -np.inf).max(axis=1)
+
+
+def _min_low(low, points):
+    return _at(low, points, np.inf).min(axis=1)
+
+
+def _nan(points):
+    return np.full(len(points), np.nan)
+
+
+@register_confirm_rule("DoubleTop", "TripleTop")
+def _confirm_top_neckline(high, low, points, directions):
+    # Шея — low средней точки
+    return _nan(points), low[points[:, 1]]
+
+
+@register_confirm_rule("DoubleBottom", "TripleBottom")
+def _confirm_bottom_neckline(high, low, points, directions):
+    return high[points[:, 1]], _nan(points)
+
+
+@register_confirm_rule("HeadAndShoulders")
+def _confirm_head_and_shoulders(high, low, points, directions):
+    # Шея — среднее low левого и правого плеча
+    neckline = (low[points[:, 0]] + low[points[:, 2]]) / 2
+    return _nan(points), neckline
+
+
+@register_confirm_rule("InverseHeadAndShoulders")
+def _confirm_inverse_head_and_shoulders(high, low, points, directions):
+    neckline = (high[points[:, 0]] + high[points[:, 2]]) / 2
+    return neckline, _nan(points)
+
+
+@register_confirm_rule("AscendingTriangle", "CupAndHandle", "RoundingBottom")
+def _confirm_resistance(high, low, points, directions):
+    # Пробой горизонтального сопротивления — максимум high вершин
+    return _max_high(high, points), _nan(points)
+
+
+@register_confirm_rule("DescendingTriangle")
+def _confirm_support(high, low, points, directions):
+    # Пробой поддержки — минимум low
+    return _nan(points), _min_low(low, points)
+
+
+@register_confirm_rule("SymmetricalTriangle", "Rectangle")
+def _confirm_range(high, low, points, directions):
+    # Пробой любой из сторон — закрытие выше max(highs) или ниже min(lows)
+    return _max_high(high, points), _min_low(low, points)
+
+
+@register_confirm_rule("Channel")
+def _confirm_channel(high, low, points, directions):
+    # Пробой верхней или нижней границы (up/down направление)
+    upper = np.where(directions == "up", _max_high(high, points[:, :2]), np.nan)
+    lower = np.where(directions == "down", _min_low(low, points[:, 2:]), np.nan)
+    return upper, lower
+
+
+@register_confirm_rule("wedge", "flag", "pennant", family=True)
+def _confirm_directional_range(high, low, points, directions):
+    # Клин, флаг, вымпел: пробой по направлению фигуры
+    upper = np.where(directions == "bullish", _max_high(high, points), np.nan)
+    lower = np.where(directions == "bearish", _min_low(low, points), np.nan)
+    return upper, lower
+
+
+def _confirm_last_point(high, low, points, directions):
+    # Любая другая фигура: пробой high/low последней точки
+    last = points[np.arange(len(points)), (points >= 0).sum(axis=1) - 1]
+    upper = np.where(directions == "bullish", high[last], np.nan)
+    lower = np.where(directions == "bearish", low[last], np.nan)
+    return upper, lower
+
+
+def confirm_chart_patterns(df, patterns, lookahead=1, window=1):
     """
     Подтверждение ВСЕХ фигурных паттернов (канонично для ТА).
     Показывает только те фигуры, где был пробой и закрытие за ключевой линией!
+    Фигуры одного типа проверяются вместе правилом из CONFIRM_RULES.
+    window > 1 — пробой любой из window свечей начиная с lookahead.
+    Принимает список dict'ов или таблицу, возвращает в том же виде.
     """
-    confirmed = []
-    for p in patterns:
-        name = p["type"].lower()
-        idxs = p["indices"]
-        last_idx = idxs[-1]
-        if last_idx + lookahead >= len(df):
+    table = as_table(df, patterns, chart=True)
+    confirmed = np.zeros(len(table), dtype=bool)
+    if not len(table):
+        return select(patterns, confirmed)
+    high = df["high"].to_numpy(dtype=np.float64)
+    low = df["low"].to_numpy(dtype=np.float64)
+    fwd_max, fwd_min, valid = forward_extremes(df["close"], lookahead, window)
+    points = chart_points(table)
+    positions = table["position"].to_numpy()
+    directions = table["direction"].astype(str).to_numpy()
+    types = table["type"].astype("category")
+    codes = types.cat.codes.to_numpy()
+    for code, name in enumerate(types.cat.categories):
+        rows = np.flatnonzero(codes == code)
+        if not len(rows):
             continue
-        next_close = df["close"].iloc[last_idx + lookahead]
-
-        # --- Double Top ---
-        if name == "doubletop":
-            neckline = df["low"].iloc[idxs[1]]
-            if next_close < neckline:
-                confirmed.append(p)
-        # --- Double Bottom ---
-        elif name == "doublebottom":
-            neckline = df["high"].iloc[idxs[1]]
-            if next_close > neckline:
-                confirmed.append(p)
-        # --- Triple Top ---
-        elif name == "tripletop":
-            neckline = df["low"].iloc[idxs[1]]
-            if next_close < neckline:
-                confirmed.append(p)
-        # --- Triple Bottom ---
-        elif name == "triplebottom":
-            neckline = df["high"].iloc[idxs[1]]
-            if next_close > neckline:
-                confirmed.append(p)
-        # --- Head & Shoulders ---
-        elif name == "headandshoulders":
-            l_shoulder, head, r_shoulder = idxs
-            left_low = df["low"].iloc[l_shoulder]
-            right_low = df["low"].iloc[r_shoulder]
-            neckline = (left_low + right_low) / 2
-            if next_close < neckline:
-                confirmed.append(p)
-        # --- Inverse Head & Shoulders ---
-        elif name == "inverseheadandshoulders":
-            l_shoulder, head, r_shoulder = idxs
-            left_high = df["high"].iloc[l_shoulder]
-            right_high = df["high"].iloc[r_shoulder]
-            neckline = (left_high + right_high) / 2
-            if next_close > neckline:
-                confirmed.append(p)
-        # --- Ascending Triangle ---
-        elif name == "ascendingtriangle":
-            # Пробой горизонтального сопротивления — максимум двух high вершин
-            highs = [df["high"].iloc[i] for i in idxs]
-            resistance = max(highs)
-            if next_close > resistance:
-                confirmed.append(p)
-        # --- Descending Triangle ---
-        elif name == "descendingtriangle":
-            # Пробой поддержки — минимум двух low
-            lows = [df["low"].iloc[i] for i in idxs]
-            support = min(lows)
-            if next_close < support:
-                confirmed.append(p)
-        # --- Symmetrical Triangle ---
-        elif name == "symmetricaltriangle":
-            # Пробой любой из сторон — закрытие выше max(highs) или ниже min(lows)
-            highs = [df["high"].iloc[i] for i in idxs]
-            lows = [df["low"].iloc[i] for i in idxs]
-            if next_close > max(highs) or next_close < min(lows):
-                confirmed.append(p)
-        # --- Channel ---
-        elif name == "channel":
-            # Пробой верхней или нижней границы (up/down направление)
-            highs = [df["high"].iloc[i] for i in idxs[:2]]
-            lows = [df["low"].iloc[i] for i in idxs[2:]]
-            if p.get("direction") == "up" and next_close > max(highs):
-                confirmed.append(p)
-            elif p.get("direction") == "down" and next_close < min(lows):
-                confirmed.append(p)
-        # --- Rectangle (боковик) ---
-        elif name == "rectangle":
-            highs = [df["high"].iloc[i] for i in idxs]
-            lows = [df["low"].iloc[i] for i in idxs]
-            upper = max(highs)
-            lower = min(lows)
-            if next_close > upper or next_close < lower:
-                confirmed.append(p)
-        # --- Wedge (клин) ---
-        elif "wedge" in name:
-            highs = [df["high"].iloc[i] for i in idxs]
-            lows = [df["low"].iloc[i] for i in idxs]
-            if p.get("direction") == "bullish" and next_close > max(highs):
-                confirmed.append(p)
-            elif p.get("direction") == "bearish" and next_close < min(lows):
-                confirmed.append(p)
-        # --- Flag/Pennant (флаг/вымпел) ---
-        elif "flag" in name or "pennant" in name:
-            highs = [df["high"].iloc[i] for i in idxs]
-            lows = [df["low"].iloc[i] for i in idxs]
-            if p.get("direction") == "bullish" and next_close > max(highs):
-                confirmed.append(p)
-            elif p.get("direction") == "bearish" and next_close < min(lows):
-                confirmed.append(p)
-        # --- Cup and Handle ---
-        elif name == "cupandhandle":
-            highs = [df["high"].iloc[i] for i in idxs]
-            resistance = max(highs)
-            if next_close > resistance:
-                confirmed.append(p)
-        # --- Rounding Bottom ---
-        elif name == "roundingbottom":
-            highs = [df["high"].iloc[i] for i in idxs]
-            if next_close > max(highs):
-                confirmed.append(p)
-        # --- Любая другая фигура: пробой high/low последней точки ---
-        else:
-            high = df["high"].iloc[last_idx]
-            low = df["low"].iloc[last_idx]
-            if p.get("direction") == "bullish" and next_close > high:
-                confirmed.append(p)
-            elif p.get("direction") == "bearish" and next_close < low:
-                confirmed.append(p)
-    return confirmed
-
-
-def find_all_patterns(df):
-    patterns = []
-    patterns += detect_double_top(df)
-    patterns += detect_double_bottom(df)
-    patterns += detect_head_and_shoulders(df)
-    patterns += detect_inverse_head_and_shoulders(df)
-    patterns += detect_triple_top(df)
-    patterns += detect_triple_bottom(df)
-    patterns += detect_ascending_triangle(df)
-    patterns += detect_descending_triangle(df)
-    patterns += detect_symmetrical_triangle(df)
-    patterns += detect_channel(df)
-    # patterns += detect_flag_pennant(df)   # Можно добавить по желанию
-    # patterns += detect_wedge(df)
-    # patterns += detect_rectangle(df)
-    # patterns += detect_cup_and_handle(df)
-    # patterns += detect_rounding_bottom(df)
-    return patterns
+        rule = get_confirm_rule(name)
+        upper, lower = rule(high, low, points[rows], directions[rows])
+        pos = positions[rows]
+        confirmed[rows] = valid[pos] & ((fwd_max[pos] > upper) | (fwd_min[pos] < lower))
+    return select(patterns, confirmed)
+
+
+# order экстремумов детекторов по умолчанию: экстремум подтверждается
+# через order свечей после него
+CHART_ORDER = 5
+# Типы фигур в порядке find_all_patterns (порядок строк результата)
+PATTERN_TYPES = (
+    "DoubleTop",
+    "DoubleBottom",
+    "HeadAndShoulders",
+    "InverseHeadAndShoulders",
+    "TripleTop",
+    "TripleBottom",
+    "AscendingTriangle",
+    "DescendingTriangle",
+    "SymmetricalTriangle",
+    "Channel",
+)
+
+
+def find_all_patterns(df, columnar=False, since=None):
+    """
+    Все фигурные паттерны. columnar=True — одна таблица patterns.table
+    вместо списка dict'ов (порядок строк тот же).
+    since — только фигуры, у которых хотя бы одна точка >= since
+    (для пересчёта хвоста после дописывания свечей). Channel строится
+    по всей истории и возвращается всегда.
+    """
+    kw = {"swings": Swings(df), "since": since, "columnar": columnar}
+    results = [
+        detect_double_top(df, **kw),
+        detect_double_bottom(df, **kw),
+        detect_head_and_shoulders(df, **kw),
+        detect_inverse_head_and_shoulders(df, **kw),
+        detect_triple_top(df, **kw),
+        detect_triple_bottom(df, **kw),
+        detect_ascending_triangle(df, **kw),
+        detect_descending_triangle(df, **kw),
+        detect_symmetrical_triangle(df, **kw),
+        detect_channel(df, **kw),
+        # detect_flag_pennant(df),   # Можно добавить по желанию
+        # detect_wedge(df),
+        # detect_rectangle(df),
+        # detect_cup_and_handle(df),
+        # detect_rounding_bottom(df),
+    ]
+    if columnar:
+        return concat_tables(results)
+    return [p for patterns in results for p in patterns]
+
+
+def _tail(indices, since, width):
+    """
+    Экстремумы для фигур из width подряд идущих экстремумов,
+    последний из которых >= since (since=None — все)
+    """
+    if since is None:
+        return indices
+    first = np.searchsorted(indices, since)
+    return indices[max(first - width + 1, 0) :]
 
 
 # --- Double Top ---
-def detect_double_top(df, order=5, threshold=0.005):
+def detect_double_top(
+    df, order=5, threshold=0.005, swings=None, since=None, columnar=False
+):
     highs = df["high"].values
-    indices = argrelextrema(highs, np.greater, order=order)[0]
-    patterns = []
+    sw = swings if swings is not None else Swings(df)
+    indices = sw.maxima(order)
+    indices = _tail(indices, since, 2)
+    points = _double_top_points(highs, df["low"].values, indices, threshold)
+    return _emit("DoubleTop", points, "bearish", columnar)
+
+
+def _double_top_points(highs, lows, indices, threshold):
+    points = []
     for i in range(len(indices) - 1):
         idx1, idx2 = indices[i], indices[i + 1]
         price1, price2 = highs[idx1], highs[idx2]
         if abs(price1 - price2) / price1 < threshold:
             # Находим локальный минимум между двумя вершинами
-            min_idx = np.argmin(df["low"].values[idx1 : idx2 + 1]) + idx1
-            patterns.append(
-                {
-                    "type": "DoubleTop",
-                    "indices": [idx1, min_idx, idx2],
-                    "direction": "bearish",
-                }
-            )
-    return patterns
+            min_idx = np.argmin(lows[idx1 : idx2 + 1]) + idx1
+            points.append([idx1, min_idx, idx2])
+    return points
 
 
 # --- Double Bottom ---
-def detect_double_bottom(df, order=5, threshold=0.005):
+def detect_double_bottom(
+    df, order=5, threshold=0.005, swings=None, since=None, columnar=False
+):
     lows = df["low"].values
-    indices = argrelextrema(lows, np.less, order=order)[0]
-    patterns = []
+    sw = swings if swings is not None else Swings(df)
+    indices = sw.minima(order)
+    indices = _tail(indices, since, 2)
+    points = _double_bottom_points(df["high"].values, lows, indices, threshold)
+    return _emit("DoubleBottom", points, "bullish", columnar)
+
+
+def _double_bottom_points(highs, lows, indices, threshold):
+    points = []
     for i in range(len(indices) - 1):
         idx1, idx2 = indices[i], indices[i + 1]
         price1, price2 = lows[idx1], lows[idx2]
         if abs(price1 - price2) / price1 < threshold:
-            max_idx = np.argmax(df["high"].values[idx1 : idx2 + 1]) + idx1
-            patterns.append(
-                {
-                    "type": "DoubleBottom",
-                    "indices": [idx1, max_idx, idx2],
-                    "direction": "bullish",
-                }
-            )
-    return patterns
+            max_idx = np.argmax(highs[idx1 : idx2 + 1]) + idx1
+            points.append([idx1, max_idx, idx2])
+    return points
 
 
 # --- Head & Shoulders ---
-def detect_head_and_shoulders(df, order=5, threshold=0.02):
+def detect_head_and_shoulders(
+    df, order=5, threshold=0.02, swings=None, since=None, columnar=False
+):
     highs = df["high"].values
-    indices = argrelextrema(highs, np.greater, order=order)[0]
-    patterns = []
+    sw = swings if swings is not None else Swings(df)
+    indices = sw.maxima(order)
+    indices = _tail(indices, since, 3)
+    points = _head_and_shoulders_points(highs, indices, threshold)
+    return _emit("HeadAndShoulders", points, "bearish", columnar)
+
+
+def _head_and_shoulders_points(highs, indices, threshold):
+    points = []
     for i in range(len(indices) - 2):
         low, high, radius = (
             highs[indices[i]],
@@ -201,78 +300,81 @@ def detect_head_and_shoulders(df, order=5, threshold=0.02):
             highs[indices[i + 2]],
         )
         if high > low and high > radius and abs(low - radius) / high < threshold:
-            patterns.append(
-                {
-                    "type": "HeadAndShoulders",
-                    "indices": [indices[i], indices[i + 1], indices[i + 2]],
-                    "direction": "bearish",
-                }
-            )
-    return patterns
+            points.append([indices[i], indices[i + 1], indices[i + 2]])
+    return points
 
 
 # --- Inverse Head & Shoulders ---
-def detect_inverse_head_and_shoulders(df, order=5, threshold=0.02):
+def detect_inverse_head_and_shoulders(
+    df, order=5, threshold=0.02, swings=None, since=None, columnar=False
+):
     lows = df["low"].values
-    indices = argrelextrema(lows, np.less, order=order)[0]
-    patterns = []
+    sw = swings if swings is not None else Swings(df)
+    indices = sw.minima(order)
+    indices = _tail(indices, since, 3)
+    points = _inverse_head_and_shoulders_points(lows, indices, threshold)
+    return _emit("InverseHeadAndShoulders", points, "bullish", columnar)
+
+
+def _inverse_head_and_shoulders_points(lows, indices, threshold):
+    points = []
     for i in range(len(indices) - 2):
         low, high, radius = lows[indices[i]], lows[indices[i + 1]], lows[indices[i + 2]]
         if high < low and high < radius and abs(low - radius) / high < threshold:
-            patterns.append(
-                {
-                    "type": "InverseHeadAndShoulders",
-                    "indices": [indices[i], indices[i + 1], indices[i + 2]],
-                    "direction": "bullish",
-                }
-            )
-    return patterns
+            points.append([indices[i], indices[i + 1], indices[i + 2]])
+    return points
 
 
 # --- Triple Top ---
-def detect_triple_top(df, order=5, threshold=0.01):
+def detect_triple_top(
+    df, order=5, threshold=0.01, swings=None, since=None, columnar=False
+):
     highs = df["high"].values
-    indices = argrelextrema(highs, np.greater, order=order)[0]
-    patterns = []
-    for i in range(len(indices) - 2):
-        p1, p2, p3 = highs[indices[i]], highs[indices[i + 1]], highs[indices[i + 2]]
-        avg = np.mean([p1, p2, p3])
-        if max(abs(p1 - avg), abs(p2 - avg), abs(p3 - avg)) / avg < threshold:
-            patterns.append(
-                {
-                    "type": "TripleTop",
-                    "indices": [indices[i], indices[i + 1], indices[i + 2]],
-                    "direction": "bearish",
-                }
-            )
-    return patterns
+    sw = swings if swings is not None else Swings(df)
+    indices = sw.maxima(order)
+    indices = _tail(indices, since, 3)
+    points = _triple_points(highs, indices, threshold)
+    return _emit("TripleTop", points, "bearish", columnar)
 
 
 # --- Triple Bottom ---
-def detect_triple_bottom(df, order=5, threshold=0.01):
+def detect_triple_bottom(
+    df, order=5, threshold=0.01, swings=None, since=None, columnar=False
+):
     lows = df["low"].values
-    indices = argrelextrema(lows, np.less, order=order)[0]
-    patterns = []
+    sw = swings if swings is not None else Swings(df)
+    indices = sw.minima(order)
+    indices = _tail(indices, since, 3)
+    points = _triple_points(lows, indices, threshold)
+    return _emit("TripleBottom", points, "bullish", columnar)
+
+
+def _triple_points(prices, indices, threshold):
+    # Три экстремума почти на одном уровне (вершины или основания)
+    points = []
     for i in range(len(indices) - 2):
-        p1, p2, p3 = lows[indices[i]], lows[indices[i + 1]], lows[indices[i + 2]]
+        p1, p2, p3 = prices[indices[i]], prices[indices[i + 1]], prices[indices[i + 2]]
         avg = np.mean([p1, p2, p3])
         if max(abs(p1 - avg), abs(p2 - avg), abs(p3 - avg)) / avg < threshold:
-            patterns.append(
-                {
-                    "type": "TripleBottom",
-                    "indices": [indices[i], indices[i + 1], indices[i + 2]],
-                    "direction": "bullish",
-                }
-            )
-    return patterns
+            points.append([indices[i], indices[i + 1], indices[i + 2]])
+    return points
 
 
 # --- Ascending Triangle ---
-def detect_ascending_triangle(df, order=5, threshold=0.005):
+def detect_ascending_triangle(
+    df, order=5, threshold=0.005, swings=None, since=None, columnar=False
+):
     highs = df["high"].values
     lows = df["low"].values
-    max_idx = argrelextrema(highs, np.greater, order=order)[0]
-    patterns = []
+    sw = swings if swings is not None else Swings(df)
+    max_idx = sw.maxima(order)
+    max_idx = _tail(max_idx, since, 2)
+    points = _ascending_triangle_points(highs, lows, max_idx, threshold)
+    return _emit("AscendingTriangle", points, "bullish", columnar)
+
+
+def _ascending_triangle_points(highs, lows, max_idx, threshold):
+    points = []
     # Ищем горизонтальную линию сопротивления + восходящая поддержка
     for i in range(len(max_idx) - 1):
         y1, y2 = highs[max_idx[i]], highs[max_idx[i + 1]]
@@ -280,45 +382,55 @@ def detect_ascending_triangle(df, order=5, threshold=0.005):
             # Линия поддержки: min между max_idx[i] и max_idx[i+1] растёт
             lows_segment = lows[max_idx[i] : max_idx[i + 1] + 1]
             if len(lows_segment) > 2 and lows_segment[0] < lows_segment[-1]:
-                patterns.append(
-                    {
-                        "type": "AscendingTriangle",
-                        "indices": [max_idx[i], max_idx[i + 1]],
-                        "direction": "bullish",
-                    }
-                )
-    return patterns
+                points.append([max_idx[i], max_idx[i + 1]])
+    return points
 
 
 # --- Descending Triangle ---
-def detect_descending_triangle(df, order=5, threshold=0.005):
+def detect_descending_triangle(
+    df, order=5, threshold=0.005, swings=None, since=None, columnar=False
+):
     highs = df["high"].values
     lows = df["low"].values
-    min_idx = argrelextrema(lows, np.less, order=order)[0]
-    patterns = []
+    sw = swings if swings is not None else Swings(df)
+    min_idx = sw.minima(order)
+    min_idx = _tail(min_idx, since, 2)
+    points = _descending_triangle_points(highs, lows, min_idx, threshold)
+    return _emit("DescendingTriangle", points, "bearish", columnar)
+
+
+def _descending_triangle_points(highs, lows, min_idx, threshold):
+    points = []
     # Ищем горизонтальную поддержку + падающее сопротивление
     for i in range(len(min_idx) - 1):
         y1, y2 = lows[min_idx[i]], lows[min_idx[i + 1]]
         if abs(y1 - y2) / y1 < threshold:
             highs_segment = highs[min_idx[i] : min_idx[i + 1] + 1]
             if len(highs_segment) > 2 and highs_segment[0] > highs_segment[-1]:
-                patterns.append(
-                    {
-                        "type": "DescendingTriangle",
-                        "indices": [min_idx[i], min_idx[i + 1]],
-                        "direction": "bearish",
-                    }
-                )
-    return patterns
+                points.append([min_idx[i], min_idx[i + 1]])
+    return points
 
 
 # --- Symmetrical Triangle ---
-def detect_symmetrical_triangle(df, order=5, threshold=0.02):
+def detect_symmetrical_triangle(
+    df, order=5, threshold=0.02, swings=None, since=None, columnar=False
+):
     highs = df["high"].values
     lows = df["low"].values
-    max_idx = argrelextrema(highs, np.greater, order=order)[0]
-    min_idx = argrelextrema(lows, np.less, order=order)[0]
-    patterns = []
+    sw = swings if swings is not None else Swings(df)
+    max_idx = sw.maxima(order)
+    min_idx = sw.minima(order)
+    if since is not None:
+        # i-я пара вершин идёт с i-й парой оснований: режем оба списка
+        # с первой пары, где хотя бы одна точка >= since
+        first = min(np.searchsorted(max_idx, since), np.searchsorted(min_idx, since))
+        max_idx, min_idx = max_idx[max(first - 1, 0) :], min_idx[max(first - 1, 0) :]
+    points = _symmetrical_triangle_points(highs, lows, max_idx, min_idx)
+    return _emit("SymmetricalTriangle", points, "neutral", columnar)
+
+
+def _symmetrical_triangle_points(highs, lows, max_idx, min_idx):
+    points = []
     # Для простоты ищем схождение high и low по расстоянию между экстремумами
     for i in range(min(len(max_idx), len(min_idx)) - 1):
         segment_high = highs[max_idx[i] : max_idx[i + 1] + 1]
@@ -327,47 +439,46 @@ def detect_symmetrical_triangle(df, order=5, threshold=0.02):
             if (segment_high[0] > segment_high[-1]) and (
                 segment_low[0] < segment_low[-1]
             ):
-                patterns.append(
-                    {
-                        "type": "SymmetricalTriangle",
-                        "indices": [
-                            max_idx[i],
-                            max_idx[i + 1],
-                            min_idx[i],
-                            min_idx[i + 1],
-                        ],
-                        "direction": "neutral",
-                    }
-                )
-    return patterns
+                points.append([max_idx[i], max_idx[i + 1], min_idx[i], min_idx[i + 1]])
+    return points
 
 
 # --- Channel (Up/Down) ---
-def detect_channel(df, order=5, min_length=10, threshold=0.01):
+def detect_channel(
+    df, order=5, min_length=10, threshold=0.01, swings=None, since=None, columnar=False
+):
     highs = df["high"].values
     lows = df["low"].values
-    max_idx = argrelextrema(highs, np.greater, order=order)[0]
-    min_idx = argrelextrema(lows, np.less, order=order)[0]
-    patterns = []
+    sw = swings if swings is not None else Swings(df)
+    max_idx = sw.maxima(order)
+    min_idx = sw.minima(order)
+    points, directions = [], []
     if len(max_idx) > 1 and len(min_idx) > 1:
-        # Прямые линии поддержки и сопротивления (почти параллельны)
-        top_slope = (highs[max_idx[-1]] - highs[max_idx[0]]) / (
-            max_idx[-1] - max_idx[0]
-        )
-        bot_slope = (lows[min_idx[-1]] - lows[min_idx[0]]) / (min_idx[-1] - min_idx[0])
-        if abs(top_slope - bot_slope) / (abs(top_slope) + 1e-8) < threshold:
-            if (
-                abs(max_idx[-1] - max_idx[0]) > min_length
-                and abs(min_idx[-1] - min_idx[0]) > min_length
-            ):
-                patterns.append(
-                    {
-                        "type": "Channel",
-                        "indices": [max_idx[0], max_idx[-1], min_idx[0], min_idx[-1]],
-                        "direction": "up" if top_slope > 0 else "down",
-                    }
-                )
-    return patterns
+        tops = [(max_idx[0], highs[max_idx[0]]), (max_idx[-1], highs[max_idx[-1]])]
+        bottoms = [(min_idx[0], lows[min_idx[0]]), (min_idx[-1], lows[min_idx[-1]])]
+        direction = _channel_direction(tops, bottoms, min_length, threshold)
+        # since не применяется: канал — одна фигура от первого до последнего
+        # экстремума, новые свечи заменяют её целиком
+        if direction is not None:
+            points.append([max_idx[0], max_idx[-1], min_idx[0], min_idx[-1]])
+            directions.append(direction)
+    return _emit("Channel", points, directions, columnar)
+
+
+def _channel_direction(tops, bottoms, min_length, threshold):
+    """
+    tops/bottoms — (позиция, цена) первой и последней вершины/основания.
+    Возвращает "up"/"down" для канала или None.
+    """
+    (top0, top0_price), (top1, top1_price) = tops
+    (bot0, bot0_price), (bot1, bot1_price) = bottoms
+    # Прямые линии поддержки и сопротивления (почти параллельны)
+    top_slope = (top1_price - top0_price) / (top1 - top0)
+    bot_slope = (bot1_price - bot0_price) / (bot1 - bot0)
+    if abs(top_slope - bot_slope) / (abs(top_slope) + 1e-8) < threshold:
+        if abs(top1 - top0) > min_length and abs(bot1 - bot0) > min_length:
+            return "up" if top_slope > 0 else "down"
+    return None
 
 
 # --- Другие паттерны реализовать при необходимости ---
@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+
+def forward_extremes(close, lookahead=1, window=1):
+    """
+    Для каждой свечи i — max и min закрытия на свечах
+    [i + lookahead, i + lookahead + window - 1] (одним проходом по кадру).
+    valid[i] = False, если свечи i + lookahead ещё нет.
+    На хвосте окно укорачивается до доступных свечей.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    span = lookahead + window - 1
+    hi = np.concatenate([close, np.full(span, -np.inf)])
+    lo = np.concatenate([close, np.full(span, np.inf)])
+    # Скользящий max/min по окну, заканчивающемуся на i + span
+    fwd_max = pd.Series(hi).rolling(window, min_periods=1).max().to_numpy()
+    fwd_min = pd.Series(lo).rolling(window, min_periods=1).min().to_numpy()
+    valid = np.arange(n) + lookahead < n
+    return fwd_max[span : span + n], fwd_min[span : span + n], valid
@@ -0,0 +1,254 @@
+"""
+Стриминговый детектор паттернов для живых свечей.
+
+Новая свеча может породить только паттерны, которые заканчиваются
+на последних свечах, поэтому детектор хранит лишь хвост истории:
+- свечные паттерны — последние 3 свечи (звёзды, три солдата/вороны);
+- фигуры — свечи от самого старого ещё нужного экстремума
+  и минимум 2 * order последних свечей (подтверждение экстремума).
+
+Экстремум на свече c считается подтверждённым, когда после неё прошло
+order свечей: дальше argrelextrema (mode="clip") его уже не изменит.
+Фигуры строятся только по подтверждённым экстремумам, поэтому
+предварительные экстремумы у правого края (которые батчевый
+chart.find_all_patterns видит на неполной истории) не публикуются.
+
+update(bar) возвращает только новые записи в старом формате dict'ов;
+позиции — сквозные номера свечей с начала потока (как iloc в батче).
+"""
+
+from collections import deque
+
+import numpy as np
+
+from patterns import candlestick, chart
+from patterns.swings import MAXIMA, MINIMA, SwingIndex
+
+# Свечей в хвосте для свечных паттернов (самые длинные — из 3 свечей)
+CANDLE_TAIL = 3
+
+
+class _CandleTail:
+    """
+    Хвост из CANDLE_TAIL свечей для candlestick.find_all_patterns:
+    index и колонки numpy без DataFrame (его сборка на каждой свече
+    обходилась дороже самих детекторов)
+    """
+
+    def __init__(self, bars):
+        self.index = np.array([label for label, _ in bars], dtype=object)
+        self._columns = {
+            c: np.array([b[c] for _, b in bars], dtype=np.float64)
+            for c in ("open", "high", "low", "close")
+        }
+
+    def __getitem__(self, column):
+        return self._columns[column]
+
+
+class StreamingPatternDetector:
+    """
+    Инкрементальные candlestick.find_all_patterns + chart.find_all_patterns.
+    Пороги фигур совпадают с умолчаниями детекторов patterns.chart.
+    """
+
+    def __init__(self, order=5, candles=True, charts=True):
+        self.order = order
+        self.candles = candles
+        self.charts = charts
+        self.count = 0
+        self._tail = deque(maxlen=CANDLE_TAIL)
+        # Буферы high/low с позиции self._base
+        self._base = 0
+        self._highs = []
+        self._lows = []
+        # Подтверждение экстремумов по мере поступления свечей
+        self._max_index = SwingIndex(order=order, comparator=MAXIMA[1])
+        self._min_index = SwingIndex(order=order, comparator=MINIMA[1])
+        # Подтверждённые экстремумы (сквозные позиции); из начала списков
+        # удалено *_dropped штук, но счёт пар треугольника сквозной
+        self._maxima = []
+        self._minima = []
+        self._max_dropped = 0
+        self._min_dropped = 0
+        self._sym_done = 0
+        # Первые экстремумы для канала: (позиция, цена)
+        self._first_max = None
+        self._first_min = None
+
+    def update(self, bar, label=None):
+        """
+        Добавляет свечу (dict с open/high/low/close) и возвращает
+        (новые свечные паттерны, новые фигуры).
+        label — метка свечи для поля "index" (по умолчанию её позиция).
+        """
+        position = self.count
+        self.count += 1
+        label = position if label is None else label
+        new_candles, new_charts = [], []
+        if self.candles:
+            new_candles = self._update_candles(bar, label)
+        if self.charts:
+            new_charts = self._update_charts(bar, position)
+        return new_candles, new_charts
+
+    def seed(self, df):
+        """
+        Прогоняет историю через детектор; возвращает все найденные паттерны
+        """
+        candles, charts = [], []
+        columns = ["open", "high", "low", "close"]
+        values = zip(*(df[c].to_numpy(dtype=np.float64) for c in columns))
+        for label, row in zip(df.index, values):
+            new_candles, new_charts = self.update(dict(zip(columns, row)), label)
+            candles.extend(new_candles)
+            charts.extend(new_charts)
+        return candles, charts
+
+    # --- Свечные паттерны ---
+    def _update_candles(self, bar, label):
+        self._tail.append((label, bar))
+        tail = _CandleTail(self._tail)
+        # Паттерны на более ранних свечах уже были выданы раньше
+        return [p for p in candlestick.find_all_patterns(tail) if p["index"] == label]
+
+    # --- Фигуры ---
+    def _update_charts(self, bar, position):
+        self._highs.append(float(bar["high"]))
+        self._lows.append(float(bar["low"]))
+        is_max = len(self._max_index.append(bar["high"])) > 0
+        is_min = len(self._min_index.append(bar["low"])) > 0
+        c = position - self.order
+        highs = np.asarray(self._highs)
+        lows = np.asarray(self._lows)
+        patterns = []
+        if is_max:
+            self._maxima.append(c)
+            if self._first_max is None:
+                self._first_max = (c, highs[c - self._base])
+            patterns += self._on_maximum(highs, lows)
+        if is_min:
+            self._minima.append(c)
+            if self._first_min is None:
+                self._first_min = (c, lows[c - self._base])
+            patterns += self._on_minimum(highs, lows)
+        if is_max or is_min:
+            patterns += self._on_extremum(highs, lows)
+        self._trim()
+        return patterns
+
+    def _local(self, positions):
+        return np.asarray(positions, dtype=np.int64) - self._base
+
+    def _globalize(self, points):
+        return [[int(i) + self._base for i in idxs] for idxs in points]
+
+    def _on_maximum(self, highs, lows):
+        pair = self._local(self._maxima[-2:])
+        triple = self._local(self._maxima[-3:])
+        patterns = chart._emit(
+            "DoubleTop",
+            self._globalize(chart._double_top_points(highs, lows, pair, 0.005)),
+            "bearish",
+        )
+        patterns += chart._emit(
+            "HeadAndShoulders",
+            self._globalize(chart._head_and_shoulders_points(highs, triple, 0.02)),
+            "bearish",
+        )
+        patterns += chart._emit(
+            "TripleTop",
+            self._globalize(chart._triple_points(highs, triple, 0.01)),
+            "bearish",
+        )
+        patterns += chart._emit(
+            "AscendingTriangle",
+            self._globalize(chart._ascending_triangle_points(highs, lows, pair, 0.005)),
+            "bullish",
+        )
+        return patterns
+
+    def _on_minimum(self, highs, lows):
+        pair = self._local(self._minima[-2:])
+        triple = self._local(self._minima[-3:])
+        patterns = chart._emit(
+            "DoubleBottom",
+            self._globalize(chart._double_bottom_points(highs, lows, pair, 0.005)),
+            "bullish",
+        )
+        patterns += chart._emit(
+            "InverseHeadAndShoulders",
+            self._globalize(
+                chart._inverse_head_and_shoulders_points(lows, triple, 0.02)
+            ),
+            "bullish",
+        )
+        patterns += chart._emit(
+            "TripleBottom",
+            self._globalize(chart._triple_points(lows, triple, 0.01)),
+            "bullish",
+        )
+        patterns += chart._emit(
+            "DescendingTriangle",
+            self._globalize(
+                chart._descending_triangle_points(highs, lows, pair, 0.005)
+            ),
+            "bearish",
+        )
+        return patterns
+
+    def _on_extremum(self, highs, lows):
+        # Треугольник: i-я пара вершин с i-й парой оснований
+        patterns = []
+        total_max = self._max_dropped + len(self._maxima)
+        total_min = self._min_dropped + len(self._minima)
+        while self._sym_done + 1 < min(total_max, total_min):
+            i = self._sym_done
+            max_pair = self._maxima[i - self._max_dropped : i - self._max_dropped + 2]
+            min_pair = self._minima[i - self._min_dropped : i - self._min_dropped + 2]
+            points = chart._symmetrical_triangle_points(
+                highs, lows, self._local(max_pair), self._local(min_pair)
+            )
+            patterns += chart._emit(
+                "SymmetricalTriangle", self._globalize(points), "neutral"
+            )
+            self._sym_done += 1
+        # Канал: первые и последние экстремумы (как detect_channel на истории)
+        if total_max > 1 and total_min > 1:
+            last_max, last_min = self._maxima[-1], self._minima[-1]
+            direction = chart._channel_direction(
+                [self._first_max, (last_max, highs[last_max - self._base])],
+                [self._first_min, (last_min, lows[last_min - self._base])],
+                min_length=10,
+                threshold=0.01,
+            )
+            if direction is not None:
+                points = [[self._first_max[0], last_max, self._first_min[0], last_min]]
+                patterns += chart._emit("Channel", points, direction)
+        return patterns
+
+    def _trim(self):
+        # Для пар и троек нужны 2 последних экстремума, для треугольника —
+        # ещё не использованные с позиции self._sym_done
+        keep_max = max(
+            min(self._max_dropped + len(self._maxima) - 2, self._sym_done),
+            self._max_dropped,
+        )
+        keep_min = max(
+            min(self._min_dropped + len(self._minima) - 2, self._sym_done),
+            self._min_dropped,
+        )
+        del self._maxima[: keep_max - self._max_dropped]
+        del self._minima[: keep_min - self._min_dropped]
+        self._max_dropped, self._min_dropped = keep_max, keep_min
+        # Свечи: окно подтверждения экстремума и отрезки от старейшего экстремума
+        oldest = self.count - 1 - 2 * self.order
+        if self._maxima:
+            oldest = min(oldest, self._maxima[0])
+        if self._minima:
+            oldest = min(oldest, self._minima[0])
+        drop = oldest - self._base
+        if drop > 0:
+            del self._highs[:drop]
+            del self._lows[:drop]
+            self._base = oldest
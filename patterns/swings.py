@@ -0,0 +1,125 @@
+"""
+Индекс точек разворота (локальных экстремумов) для фигурных паттернов.
+
+SwingIndex повторяет argrelextrema(values, comparator, order, mode="clip"):
+экстремум на свече c подтверждён, когда после неё прошло order свечей,
+а последние order свечей дают только предварительные экстремумы
+(их батчевый argrelextrema тоже возвращает, но новые свечи могут их отменить).
+append() дописывает свечи и подтверждает экстремумы инкрементально,
+храня лишь последние 2 * order + 1 значений.
+
+Swings — кэш SwingIndex по (колонка, order) для одного кадра: все детекторы
+patterns.chart в одном find_all_patterns используют одни и те же экстремумы.
+Для живых свечей SwingIndex.append используется напрямую
+(patterns.streaming).
+"""
+
+import numpy as np
+from scipy.signal import argrelextrema
+
+# Колонка и сравнение для вершин и оснований
+MAXIMA = ("high", np.greater)
+MINIMA = ("low", np.less)
+
+
+class SwingIndex:
+    """
+    Экстремумы одного ряда (high или low) при заданном order
+    """
+
+    def __init__(self, values=(), order=5, comparator=np.greater):
+        self.order = order
+        self.comparator = comparator
+        values = np.asarray(values, dtype=np.float64)
+        self.count = len(values)
+        indices = argrelextrema(values, comparator, order=order)[0]
+        self._confirmed = [indices[indices + order <= self.count - 1]]
+        # Хвост значений с позиции self._base (для подтверждения и хвоста)
+        self._base = max(self.count - self._window_size(), 0)
+        self._tail = values[self._base :].tolist()
+
+    def _window_size(self):
+        return 2 * self.order + 1
+
+    @property
+    def confirmed(self):
+        """
+        Подтверждённые экстремумы (позиции), которые новые свечи не изменят
+        """
+        if len(self._confirmed) > 1:
+            self._confirmed = [np.concatenate(self._confirmed).astype(np.int64)]
+        return self._confirmed[0]
+
+    @property
+    def provisional(self):
+        """
+        Предварительные экстремумы на последних order свечах
+        """
+        values = np.asarray(self._tail)
+        n = self.count
+        out = []
+        for c in range(max(n - self.order, 1), n - 1):
+            local = c - self._base
+            left = values[max(local - self.order, 0) : local]
+            right = values[local + 1 :]
+            if self._is_extremum(values[local], left, right):
+                out.append(c)
+        return np.asarray(out, dtype=np.int64)
+
+    @property
+    def indices(self):
+        """
+        То же, что argrelextrema по всей истории: подтверждённые + предварительные
+        """
+        return np.concatenate([self.confirmed, self.provisional])
+
+    def _is_extremum(self, value, left, right):
+        return bool(self.comparator(value, left).all()) and bool(
+            self.comparator(value, right).all()
+        )
+
+    def append(self, values):
+        """
+        Дописывает новые значения; возвращает новые подтверждённые экстремумы
+        """
+        new = []
+        for value in np.atleast_1d(np.asarray(values, dtype=np.float64)).tolist():
+            self._tail.append(value)
+            self.count += 1
+            c = self.count - 1 - self.order
+            if c >= 1:
+                local = c - self._base
+                left = self._tail[max(local - self.order, 0) : local]
+                right = self._tail[local + 1 :]
+                if self._is_extremum(self._tail[local], left, right):
+                    new.append(c)
+            drop = len(self._tail) - self._window_size()
+            if drop > 0:
+                del self._tail[:drop]
+                self._base += drop
+        new = np.asarray(new, dtype=np.int64)
+        self._confirmed.append(new)
+        return new
+
+
+class Swings:
+    """
+    Кэш индексов экстремумов кадра по (колонка, order)
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._cache = {}
+
+    def get(self, column, comparator, order=5):
+        key = (column, comparator, order)
+        if key not in self._cache:
+            values = self.df[column].to_numpy(dtype=np.float64)
+            self._cache[key] = SwingIndex(values, order, comparator)
+        return self._cache[key]
+
+    def maxima(self, order=5):
+        return self.get(*MAXIMA, order=order).indices
+
+    def minima(self, order=5):
+        return self.get(*MINIMA, order=order).indices
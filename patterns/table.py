@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Колоночный формат паттернов: одна строка = один паттерн.
+#   type, direction — categorical
+#   position        — int64, позиция (iloc) сигнальной свечи
+#   index           — метка df.index сигнальной свечи (только свечные паттерны)
+#   p0..p3          — int64 позиции точек фигуры, -1 = нет точки (только фигуры)
+MAX_POINTS = 4
+POINT_COLUMNS = [f"p{k}" for k in range(MAX_POINTS)]
+CANDLE_COLUMNS = ["type", "direction", "position", "index"]
+CHART_COLUMNS = ["type", "direction", "position"] + POINT_COLUMNS
+
+
+def _categorical(values, n):
+    if isinstance(values, str):
+        return pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), [values])
+    # dtype=str: у пустого списка категории того же типа, что у непустых
+    return pd.Categorical(pd.Index(values, dtype=str))
+
+
+def candle_table(df, positions, types, directions):
+    """
+    Таблица свечных паттернов по позициям свечей.
+    types/directions — строка (одна на все строки) или массив строк.
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    n = len(positions)
+    return pd.DataFrame(
+        {
+            "type": _categorical(types, n),
+            "direction": _categorical(directions, n),
+            "position": positions,
+            "index": df.index[positions],
+        }
+    )
+
+
+def chart_table(types, directions, points):
+    """
+    Таблица фигурных паттернов.
+    points — список списков позиций точек (разной длины, до MAX_POINTS)
+    или готовый int64-массив (n, MAX_POINTS), дополненный -1.
+    """
+    if isinstance(points, np.ndarray):
+        block = points.astype(np.int64, copy=False)
+    else:
+        block = np.full((len(points), MAX_POINTS), -1, dtype=np.int64)
+        for row, idxs in enumerate(points):
+            block[row, : len(idxs)] = idxs
+    n = len(block)
+    counts = (block >= 0).sum(axis=1)
+    data = {
+        "type": _categorical(types, n),
+        "direction": _categorical(directions, n),
+        # Сигнальная точка фигуры — последняя из её точек
+        "position": block[np.arange(n), np.maximum(counts - 1, 0)],
+    }
+    for k, col in enumerate(POINT_COLUMNS):
+        data[col] = block[:, k]
+    return pd.DataFrame(data)
+
+
+def empty_candle_table(df):
+    return candle_table(df, [], [], [])
+
+
+def empty_chart_table():
+    return chart_table([], [], [])
+
+
+def is_table(patterns):
+    return isinstance(patterns, pd.DataFrame)
+
+
+def is_chart_table(table):
+    return POINT_COLUMNS[0] in table.columns
+
+
+def concat_tables(tables):
+    """
+    Склейка таблиц с объединением категорий (без перехода в object)
+    """
+    tables = [t for t in tables if len(t.columns)]
+    if not tables:
+        return pd.DataFrame()
+    out = {}
+    for col in tables[0].columns:
+        parts = [t[col] for t in tables]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            out[col] = union_categoricals([p.array for p in parts])
+        else:
+            out[col] = np.concatenate([p.to_numpy() for p in parts])
+            if col == "index":
+                out[col] = pd.Index(out[col])
+    return pd.DataFrame(out)
+
+
+def take(table, mask):
+    """
+    Подмножество строк таблицы по булевой маске (или массиву позиций строк)
+    """
+    return table[np.asarray(mask)].reset_index(drop=True)
+
+
+def chart_points(table):
+    """
+    int64-матрица точек фигур (n, MAX_POINTS), -1 = нет точки
+    """
+    return table[POINT_COLUMNS].to_numpy(dtype=np.int64)
+
+
+def iter_dicts(table):
+    """
+    Совместимый вид: те же dict'ы, что возвращали детекторы раньше
+    """
+    types = table["type"].astype(str).tolist()
+    directions = table["direction"].astype(str).tolist()
+    if is_chart_table(table):
+        block = chart_points(table).tolist()
+        for t, d, idxs in zip(types, directions, block):
+            yield {"type": t, "indices": [i for i in idxs if i >= 0], "direction": d}
+    else:
+        for t, i, d in zip(types, table["index"].tolist(), directions):
+            yield {"type": t, "index": i, "direction": d}
+
+
+def to_dicts(table):
+    return list(iter_dicts(table))
+
+
+def from_dicts(df, patterns, chart=None):
+    """
+    Список dict'ов (старый формат) -> таблица.
+    chart=None — определяется по наличию ключа "indices".
+    """
+    if chart is None:
+        chart = bool(patterns) and "indices" in patterns[0]
+    types = [p["type"] for p in patterns]
+    directions = [p.get("direction", "neutral") for p in patterns]
+    if chart:
+        return chart_table(types, directions, [p["indices"] for p in patterns])
+    labels = [p["index"] for p in patterns]
+    positions = [
+        i if isinstance(i, (int, np.integer)) else df.index.get_loc(i) for i in labels
+    ]
+    return candle_table(df, positions, types, directions)
+
+
+def as_table(df, patterns, chart=None):
+    """
+    Принимает и таблицу, и список dict'ов; всегда возвращает таблицу
+    """
+    if is_table(patterns):
+        return patterns
+    return from_dicts(df, patterns, chart=chart)
+
+
+def select(patterns, mask):
+    """
+    Отбор паттернов по булевой маске с сохранением формата входа:
+    таблица -> таблица, список dict'ов -> список тех же dict'ов
+    """
+    if is_table(patterns):
+        return take(patterns, mask)
+    return [p for p, keep in zip(patterns, np.asarray(mask).tolist()) if keep]
@@ -0,0 +1,268 @@
+"""
+Пайплайн индикаторы -> паттерны -> подтверждение -> фильтр как функция
+и пакетный прогон по (символ, таймфрейм) на пуле процессов.
+
+Воркер сам загружает свои данные (storage.ohlcv, memmap) и возвращает
+только таблицы паттернов, поэтому в главный процесс кадры не передаются;
+число задач в полёте ограничено (2 на процесс), а воркеры перезапускаются
+каждые max_tasks_per_child задач — память пула не растёт с числом пар.
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from analysis import filters, registry
+from analysis.registry import PIPELINE_INDICATORS
+from patterns import candlestick, chart
+from patterns.chart import CHART_ORDER
+from patterns.streaming import CANDLE_TAIL
+from patterns.table import chart_points, concat_tables, take
+from storage.ohlcv import load_ohlcv, to_epoch
+from storage.resample import resample_ohlcv
+
+# Таблицы, которые возвращает run_pipeline и собирает run_batch
+RESULT_TABLES = [
+    "candle_patterns",
+    "chart_patterns",
+    "confirmed_candles",
+    "confirmed_chart",
+    "filtered_candles",
+    "filtered_chart",
+]
+DATA_PATH = "data/{symbol}_{timeframe}.csv"
+# Ошибки загрузки входных данных: нет файла, не разбирается CSV
+# (ParserError/EmptyDataError — подклассы ValueError), нет колонки
+LOAD_ERRORS = (OSError, ValueError, KeyError)
+# Разгон индикаторов при дописывании свечей: вклад начального значения
+# EWM (span <= 50, MACD signal поверх EMA 26) затухает ниже точности float64.
+# Скользящие суммы pandas копят округление вдоль всего ряда, поэтому хвост
+# совпадает с полным пересчётом до ~1e-11 относительной ошибки (rolling std)
+INDICATOR_WARMUP = 1000
+# Компактный режим: индикаторы считаются в float64 и хранятся в float32,
+# |x32 - x64| <= 2**-24 * |x64| (~6e-8 относительной ошибки: для цены 1e5 —
+# до 0.006, для RSI — до 6e-6). OHLCV остаются float64, поэтому детекторы
+# и подтверждение дают те же паттерны; TA-фильтр может разойтись только
+# на сравнениях, где разница меньше этой границы.
+COMPACT_DTYPE = np.float32
+
+
+def add_indicators(df, graph=None, dtype=None, backend=None):
+    """
+    Все индикаторы, которые нужны фильтрам и графику (in-place, возвращает df).
+    Общие узлы (rolling mean для sma_20/bb_ma, сдвиг close в ATR)
+    считаются один раз — см. analysis.registry.
+    backend — скользящие окна ядрами analysis.kernels ("numba" — быстрый путь).
+    """
+    return registry.add_indicators(
+        df, PIPELINE_INDICATORS, graph=graph, dtype=dtype, backend=backend
+    )
+
+
+def _indicator_frame(df):
+    graph = registry.IndicatorGraph()
+    return pd.DataFrame(graph.compute(df, PIPELINE_INDICATORS))
+
+
+def _extend_indicators(df, cached, rows):
+    # Хвост считается с разгоном INDICATOR_WARMUP свечей до границы;
+    # результат совпадает с полным пересчётом лишь до ~1e-11 (скользящие
+    # суммы, EWM), поэтому в кэше он идёт под ключом exact_extend=False
+    start = max(rows - INDICATOR_WARMUP, 0)
+    tail = _indicator_frame(df.iloc[start:])
+    return pd.concat([cached, tail.iloc[rows - start :]])
+
+
+def _find_candles(df):
+    return candlestick.find_all_patterns(df, columnar=True)
+
+
+def _extend_candles(df, table, rows):
+    # Свечной паттерн на свече i зависит только от свечей i-2..i
+    start = max(rows - CANDLE_TAIL + 1, 0)
+    tail = _find_candles(df.iloc[start:])
+    tail = take(tail, tail["position"].to_numpy() >= rows - start)
+    tail["position"] += start
+    merged = concat_tables([table, tail])
+    # Порядок строк как при полном пересчёте: по детекторам, внутри
+    # детектора — по позиции свечи
+    rank = pd.Categorical(merged["type"].astype(str), candlestick.PATTERN_TYPES).codes
+    order = np.lexsort((merged["position"].to_numpy(), rank))
+    return merged.iloc[order].reset_index(drop=True)
+
+
+def _find_charts(df, since=None):
+    return chart.find_all_patterns(df, columnar=True, since=since)
+
+
+def _extend_charts(df, table, rows):
+    # Экстремумы старше rows - order уже не изменятся, и фигуры только
+    # из таких точек остаются прежними; остальные ищутся заново.
+    # Channel зависит от последнего экстремума всей истории — его всегда
+    # заново выдаёт find_all_patterns(since=...)
+    since = rows - CHART_ORDER
+    types = table["type"].astype(str).to_numpy()
+    keep = take(table, (chart_points(table).max(axis=1) < since) & (types != "Channel"))
+    merged = concat_tables([keep, _find_charts(df, since=since)])
+    # Порядок строк как при полном пересчёте: по детекторам, внутри
+    # детектора старые фигуры раньше новых
+    rank = pd.Categorical(merged["type"].astype(str), chart.PATTERN_TYPES).codes
+    return merged.iloc[np.argsort(rank, kind="stable")].reset_index(drop=True)
+
+
+def detect(df, cache=None, dtype=None):
+    """
+    Индикаторы (в df) + таблицы свечных паттернов и фигур.
+    cache — storage.cache.DiskCache: результаты берутся с диска, при
+    дописывании свечей индикаторы и свечные паттерны считаются по хвосту.
+    Фигуры — по экстремумам у правого края (chart.find_all_patterns(since=...)).
+    dtype — тип хранения колонок индикаторов (см. run_pipeline(compact=True)).
+    """
+    if cache is None:
+        add_indicators(df, dtype=dtype)
+        return _find_candles(df), _find_charts(df)
+    columns = cache.cached(
+        "indicators",
+        df,
+        PIPELINE_INDICATORS,
+        _indicator_frame,
+        extend=_extend_indicators,
+        exact_extend=False,
+    )
+    registry.assign_columns(
+        df, {name: columns[name].to_numpy() for name in columns.columns}, dtype
+    )
+    candle_patterns = cache.cached(
+        "candle_patterns", df, None, _find_candles, extend=_extend_candles
+    )
+    chart_patterns = cache.cached(
+        "chart_patterns", df, None, _find_charts, extend=_extend_charts
+    )
+    return candle_patterns, chart_patterns
+
+
+def run_pipeline(df, lookahead=1, window=1, cache=None, compact=False, **thresholds):
+    """
+    Полный прогон по одному кадру OHLCV. Возвращает dict таблиц
+    patterns.table (ключи RESULT_TABLES); индикаторы добавляются в df.
+    thresholds — пороги analysis.filters (DEFAULT_THRESHOLDS).
+    cache — storage.cache.DiskCache (см. detect).
+    compact=True — экономия памяти (см. COMPACT_DTYPE): время в int64,
+    индикаторы в float32.
+    """
+    dtype = None
+    if compact:
+        to_epoch(df)
+        dtype = COMPACT_DTYPE
+    candle_patterns, chart_patterns = detect(df, cache=cache, dtype=dtype)
+    confirmed_candles = candlestick.confirm_candlestick_patterns(
+        df, candle_patterns, lookahead=lookahead, window=window
+    )
+    confirmed_chart = chart.confirm_chart_patterns(
+        df, chart_patterns, lookahead=lookahead, window=window
+    )
+    return {
+        "candle_patterns": candle_patterns,
+        "chart_patterns": chart_patterns,
+        "confirmed_candles": confirmed_candles,
+        "confirmed_chart": confirmed_chart,
+        "filtered_candles": filters.filter_candle_patterns(
+            df, confirmed_candles, **thresholds
+        ),
+        "filtered_chart": filters.filter_chart_patterns(
+            df, confirmed_chart, **thresholds
+        ),
+    }
+
+
+def _tag(table, symbol, timeframe):
+    # Колонки символа/таймфрейма (categorical) в начало таблицы
+    if not len(table.columns):
+        return table
+    n = len(table)
+    tagged = pd.DataFrame(
+        {
+            "symbol": pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), [symbol]),
+            "timeframe": pd.Categorical.from_codes(
+                np.zeros(n, dtype=np.int8), [timeframe]
+            ),
+        }
+    )
+    return pd.concat([tagged, table], axis=1)
+
+
+class JobInputError(Exception):
+    """
+    Данные задачи не загрузились (нет файла, битый CSV, нет колонок)
+    """
+
+    def __init__(self, path, error):
+        super().__init__(path, error)
+        self.path = path
+        self.error = error
+
+    def __str__(self):
+        return f"{self.path}: {self.error}"
+
+
+def run_job(symbol, timeframe, path=DATA_PATH, base_timeframe=None, **kwargs):
+    """
+    Одна задача пакетного прогона: загрузка + run_pipeline, таблицы
+    с колонками symbol/timeframe. Кадр с индикаторами не возвращается.
+    base_timeframe — грузить этот таймфрейм и ресемплить в timeframe.
+    Ошибки загрузки — JobInputError с путём файла.
+    """
+    source = path.format(symbol=symbol, timeframe=base_timeframe or timeframe)
+    try:
+        df = load_ohlcv(source)
+        if base_timeframe is not None and timeframe != base_timeframe:
+            df = resample_ohlcv(df, timeframe)
+    except LOAD_ERRORS as exc:
+        raise JobInputError(source, f"{type(exc).__name__}: {exc}") from exc
+    result = run_pipeline(df, **kwargs)
+    return {name: _tag(table, symbol, timeframe) for name, table in result.items()}
+
+
+def merge_results(results):
+    """
+    Список результатов run_job -> одна таблица на каждый ключ RESULT_TABLES
+    """
+    return {name: concat_tables([r[name] for r in results]) for name in RESULT_TABLES}
+
+
+def run_batch(jobs, path=DATA_PATH, max_workers=None, max_tasks_per_child=50, **kwargs):
+    """
+    Прогон пайплайна по списку (символ, таймфрейм) на пуле процессов.
+    Возвращает (dict объединённых таблиц, {(символ, таймфрейм): JobInputError}).
+    Ошибки загрузки данных собираются по задачам, любые другие исключения
+    (ошибки в коде пайплайна) пробрасываются.
+    Порядок строк — порядок jobs, независимо от порядка завершения задач.
+    """
+    jobs = list(jobs)
+    max_workers = max_workers or os.cpu_count() or 1
+    results, errors = {}, {}
+    with ProcessPoolExecutor(
+        max_workers=max_workers, max_tasks_per_child=max_tasks_per_child
+    ) as pool:
+        pending = {}
+        queue = iter(jobs)
+        while True:
+            # Не больше 2 задач на процесс в полёте
+            for job in queue:
+                future = pool.submit(run_job, *job, path=path, **kwargs)
+                pending[future] = job
+                if len(pending) >= 2 * max_workers:
+                    break
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = pending.pop(future)
+                try:
+                    results[job] = future.result()
+                except JobInputError as exc:
+                    errors[job] = exc
+    merged = merge_results([results[job] for job in jobs if job in results])
+    return merged, errors
@@ -0,0 +1,67 @@
+"""
+Перебор параметров детекторов и TA-фильтра (analysis.sweep):
+
+    python run_sweep.py data/df_high.csv --output sweep.csv
+    python run_sweep.py data/df_high.csv --random 200 --workers 8
+"""
+
+import argparse
+
+from analysis.sweep import grid, random_points, run_sweep
+from storage.ohlcv import load_ohlcv
+
+# Сетка по умолчанию: пропорции тени молота, order/threshold фигур
+# и константы фильтра (объём 1.3, RSI 35/65, Stochastic 20/80)
+SPACE = {
+    "hammer.body_ratio": [0.25, 0.33, 0.5],
+    "hammer.shadow_ratio": [1.5, 2, 3],
+    "order": [3, 5, 8],
+    "double_top.threshold": [0.003, 0.005, 0.01],
+    "channel.threshold": [0.005, 0.01, 0.02],
+    "volume_factor": [1.0, 1.3, 1.6],
+    "rsi_bullish": [30, 35, 40],
+    "rsi_bearish": [60, 65, 70],
+    "stoch_oversold": [20, 30],
+    "stoch_overbought": [70, 80],
+}
+# Границы для случайного поиска: (low, high) — равномерно, список — выбор
+RANDOM_SPACE = {
+    "hammer.body_ratio": (0.2, 0.6),
+    "hammer.shadow_ratio": (1.5, 3.5),
+    "order": (3, 10),
+    "double_top.threshold": (0.002, 0.02),
+    "channel.threshold": (0.005, 0.03),
+    "volume_factor": (0.8, 2.0),
+    "rsi_bullish": (25, 45),
+    "rsi_bearish": (55, 75),
+    "stoch_oversold": (10, 30),
+    "stoch_overbought": (70, 90),
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Перебор параметров паттернов")
+    parser.add_argument("csv_path")
+    parser.add_argument("--random", type=int, default=None, help="число точек")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--sort-by", default="expectancy_r")
+    parser.add_argument("--min-signals", type=int, default=30)
+    parser.add_argument("--stage", default="filtered")
+    parser.add_argument("--output", default=None, help="CSV с рейтингом")
+    args = parser.parse_args()
+
+    if args.random:
+        points = random_points(RANDOM_SPACE, args.random, seed=args.seed)
+    else:
+        points = grid(SPACE)
+    table = run_sweep(
+        load_ohlcv(args.csv_path),
+        points,
+        max_workers=args.workers,
+        sort_by=args.sort_by,
+        min_signals=args.min_signals,
+        stage=args.stage,
+    )
+    if args.output:
+        table.to_csv(args.output, index=False)
+    print(table.head(20).to_string())
@@ -0,0 +1,186 @@
+"""
+Персистентный кэш результатов (колонки индикаторов, таблицы паттернов).
+
+Ключ записи — хэш (имя, отпечаток входного OHLCV, параметры): одинаковые
+данные с теми же параметрами на любом запуске дают ту же запись, поэтому
+перезапуск на неизменной истории — это чтение готовых файлов.
+
+Дописывание свечей: для (имя, параметры) хранится «родословная» —
+последние записи с числом строк и отпечатком. Если новый кадр начинается
+с уже посчитанного префикса (отпечаток df.iloc[:n] совпал), вызывается
+extend(df, старое значение, n) и пересчитывается только хвост. Если
+такой пересчёт лишь приближает полный (exact_extend=False: скользящие
+суммы с разгоном), результат хранится под отдельным ключом: запись
+под основным ключом — всегда полный пересчёт, и при поиске он главнее.
+
+Размер кэша ограничен max_bytes: при превышении удаляются записи,
+к которым дольше всего не обращались (LRU по mtime файла).
+
+main.py и dashboard.py берут кэш через from_env(): каталог из переменной
+PIPELINE_CACHE (по умолчанию .cache), PIPELINE_CACHE=off — без кэша.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+from analysis.registry import fingerprint
+from storage.resample import OHLCV_COLUMNS
+
+# Сколько последних записей помнить в родословной (разные символы/префиксы)
+LINEAGE_SIZE = 16
+CACHE_ENV = "PIPELINE_CACHE"
+DEFAULT_ROOT = ".cache"
+# Метка ключа результатов приближённого extend (см. exact_extend)
+EXTENDED = "extended"
+# Значения CACHE_ENV, выключающие кэш
+DISABLED = ("", "0", "off", "false", "no")
+
+
+class DiskCache:
+    def __init__(self, root=".cache", max_bytes=512 * 2**20):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    # --- Ключи ---
+    @staticmethod
+    def key(name, data_print, params):
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(repr((name, data_print, params)).encode())
+        return digest.hexdigest()
+
+    def _path(self, key, suffix=".pkl"):
+        return os.path.join(self.root, key + suffix)
+
+    # --- Записи ---
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return default
+        os.utime(path)  # отметка для LRU
+        return value
+
+    def put(self, key, value):
+        self._write(self._path(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        self.evict()
+
+    def _write(self, path, data):
+        # Атомарная запись: читатели не увидят недописанный файл
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def entries(self):
+        """
+        [(mtime, размер, путь)] записей кэша
+        """
+        out = []
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(".pkl"):
+                stat = entry.stat()
+                out.append((stat.st_mtime, stat.st_size, entry.path))
+        return out
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """
+        Удаляет самые давно использованные записи сверх max_bytes
+        """
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    # --- Родословная для дописывания ---
+    def _lineage_path(self, name, params):
+        return self._path(self.key(name, None, params), ".lineage.json")
+
+    def _lineage(self, name, params):
+        try:
+            with open(self._lineage_path(name, params), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def _add_lineage(self, name, params, rows, data_print, key):
+        records = [r for r in self._lineage(name, params) if r["key"] != key]
+        records.append({"rows": rows, "print": data_print, "key": key})
+        data = json.dumps(records[-LINEAGE_SIZE:]).encode()
+        self._write(self._lineage_path(name, params), data)
+
+    def cached(
+        self,
+        name,
+        df,
+        params,
+        compute,
+        extend=None,
+        columns=OHLCV_COLUMNS,
+        exact_extend=True,
+    ):
+        """
+        Результат compute(df) из кэша или с вычислением и сохранением.
+        extend(df, значение, n) — пересчёт хвоста, если df продолжает
+        ранее посчитанный кадр из n строк. columns — входные колонки df.
+        exact_extend=False — extend совпадает с compute лишь приближённо:
+        его результат пишется под отдельным ключом (основной — только
+        для compute).
+        """
+        data_print = fingerprint(df, columns)
+        key = self.key(name, data_print, params)
+        extended_key = (
+            key if exact_extend else self.key(name, data_print, (params, EXTENDED))
+        )
+        for candidate in dict.fromkeys([key, extended_key]):
+            value = self.get(candidate)
+            if value is not None:
+                return value
+        if extend is not None:
+            value = self._extend(name, df, params, extend, columns)
+            if value is not None:
+                key = extended_key
+        if value is None:
+            value = compute(df)
+        self.put(key, value)
+        self._add_lineage(name, params, len(df), data_print, key)
+        return value
+
+    def _extend(self, name, df, params, extend, columns):
+        records = sorted(self._lineage(name, params), key=lambda r: -r["rows"])
+        for record in records:
+            rows = record["rows"]
+            if not 0 < rows < len(df):
+                continue
+            if fingerprint(df.iloc[:rows], columns) != record["print"]:
+                continue
+            value = self.get(record["key"])
+            if value is not None:
+                return extend(df, value, rows)
+        return None
+
+
+def from_env(default=DEFAULT_ROOT, environ=None):
+    """
+    DiskCache в каталоге из PIPELINE_CACHE (нет переменной — default)
+    или None, если кэш выключен (PIPELINE_CACHE=off / 0 / пусто)
+    """
+    environ = os.environ if environ is None else environ
+    root = environ.get(CACHE_ENV, default)
+    if root.strip().lower() in DISABLED:
+        return None
+    return DiskCache(root)
@@ -0,0 +1,208 @@
+"""
+Колоночное хранилище OHLCV на диске.
+
+Каталог хранилища: по одному .npy на колонку + meta.json.
+Время хранится как int64 (эпоха в единицах исходного datetime64,
+например "us"), остальные колонки — в своих dtype (float64).
+Загрузка идёт через np.load(mmap_mode="r"): выбор диапазона времени
+ищет границы бинарным поиском по колонке времени и читает с диска
+только нужные срезы.
+
+load_store возвращает такой же кадр, как
+pd.read_csv(path, parse_dates=["datetime"]): колонка datetime, RangeIndex.
+
+write_store собирает хранилище во временном каталоге рядом и подменяет
+каталог переименованием: параллельные процессы (run_batch с общим
+base_timeframe) видят либо готовое хранилище, либо никакого.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+META_FILE = "meta.json"
+TIME_COLUMN = "datetime"
+STORE_SUFFIX = ".npystore"
+# Недописанное или битое хранилище: нет файла, обрезанный .npy (EOFError,
+# ValueError у np.load/memmap), испорченный meta.json (ValueError)
+STORE_ERRORS = (OSError, ValueError, EOFError)
+# Попыток чтения в load_ohlcv (хранилище могут заменять параллельно)
+STORE_ATTEMPTS = 3
+
+
+def _column_file(store_dir, column):
+    return os.path.join(store_dir, f"{column}.npy")
+
+
+def read_meta(store_dir):
+    with open(os.path.join(store_dir, META_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _replace_dir(built, store_dir):
+    # Готовый каталог встаёт на место одним rename; прежний сначала
+    # отодвигается (открытые memmap'ы его файлов остаются рабочими)
+    stale = tempfile.mkdtemp(dir=os.path.dirname(store_dir) or ".")
+    try:
+        try:
+            os.replace(store_dir, os.path.join(stale, "store"))
+        except FileNotFoundError:
+            pass  # прежнего нет (или его уже отодвинул другой процесс)
+        try:
+            os.replace(built, store_dir)
+        except OSError:
+            # Другой процесс успел поставить своё хранилище — оставляем его
+            if not os.path.exists(os.path.join(store_dir, META_FILE)):
+                raise
+            shutil.rmtree(built, ignore_errors=True)
+    finally:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def write_store(df, store_dir, time_column=TIME_COLUMN):
+    """
+    Сохраняет кадр OHLCV в колоночное хранилище (перезаписывает каталог
+    атомарно). Свечи должны идти по возрастанию времени.
+    """
+    times = df[time_column]
+    if not times.is_monotonic_increasing:
+        raise ValueError(f"Колонка {time_column} должна быть отсортирована")
+    store_dir = os.path.normpath(store_dir)
+    parent = os.path.dirname(store_dir) or "."
+    os.makedirs(parent, exist_ok=True)
+    built = tempfile.mkdtemp(dir=parent, prefix=os.path.basename(store_dir) + ".")
+    try:
+        unit = np.datetime_data(times.dtype)[0]
+        columns = {}
+        for col in df.columns:
+            if col == time_column:
+                values = times.to_numpy().view(np.int64)
+            else:
+                values = df[col].to_numpy()
+            np.save(_column_file(built, col), values)
+            columns[col] = str(values.dtype)
+        meta = {
+            "rows": len(df),
+            "time_column": time_column,
+            "time_unit": unit,
+            "columns": columns,
+        }
+        with open(os.path.join(built, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        _replace_dir(built, store_dir)
+    except BaseException:
+        shutil.rmtree(built, ignore_errors=True)
+        raise
+    return meta
+
+
+def csv_to_store(csv_path, store_dir=None, time_column=TIME_COLUMN):
+    """
+    CSV -> колоночное хранилище (по умолчанию рядом с CSV: <имя>.npystore)
+    """
+    if store_dir is None:
+        store_dir = os.path.splitext(csv_path)[0] + STORE_SUFFIX
+    df = pd.read_csv(csv_path, parse_dates=[time_column])
+    write_store(df, store_dir, time_column=time_column)
+    return store_dir
+
+
+def open_columns(store_dir, columns=None):
+    """
+    Колонки хранилища как read-only memmap'ы (без чтения данных)
+    """
+    meta = read_meta(store_dir)
+    columns = list(meta["columns"]) if columns is None else columns
+    return {c: np.load(_column_file(store_dir, c), mmap_mode="r") for c in columns}
+
+
+def _to_epoch(value, unit):
+    stamp = pd.Timestamp(value).to_datetime64()
+    return stamp.astype(f"datetime64[{unit}]").astype(np.int64)
+
+
+def time_slice(store_dir, start=None, end=None):
+    """
+    Срез строк [lo, hi) для времени start <= t <= end (границы включительно)
+    """
+    meta = read_meta(store_dir)
+    times = open_columns(store_dir, [meta["time_column"]])[meta["time_column"]]
+    unit = meta["time_unit"]
+    lo = 0 if start is None else np.searchsorted(times, _to_epoch(start, unit))
+    hi = (
+        len(times)
+        if end is None
+        else np.searchsorted(times, _to_epoch(end, unit), side="right")
+    )
+    return slice(int(lo), int(hi))
+
+
+def load_store(store_dir, start=None, end=None, columns=None, epoch=False):
+    """
+    Кадр из хранилища; start/end — границы по времени (включительно).
+    columns — подмножество колонок (колонка времени добавляется всегда).
+    epoch=True — время остаётся int64 (см. to_epoch).
+    """
+    meta = read_meta(store_dir)
+    time_column = meta["time_column"]
+    if columns is not None and time_column not in columns:
+        columns = [time_column] + list(columns)
+    mapped = open_columns(store_dir, columns)
+    rows = time_slice(store_dir, start, end)
+    data = {}
+    for col, values in mapped.items():
+        # np.array копирует только выбранный срез
+        part = np.array(values[rows])
+        if col == time_column and not epoch:
+            part = part.view(f"datetime64[{meta['time_unit']}]")
+        data[col] = part
+    return pd.DataFrame(data)
+
+
+def _meta_stamp(meta_path):
+    # (inode, mtime) meta.json: меняется при каждой замене хранилища
+    try:
+        stat = os.stat(meta_path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime
+
+
+def load_ohlcv(csv_path, start=None, end=None, columns=None, epoch=False):
+    """
+    Загрузка OHLCV по пути к CSV: при первом вызове (или если CSV новее)
+    строит хранилище рядом с CSV, дальше читает его через memmap.
+    Битое хранилище (STORE_ERRORS) считается промахом и строится заново.
+    """
+    store_dir = os.path.splitext(csv_path)[0] + STORE_SUFFIX
+    meta_path = os.path.join(store_dir, META_FILE)
+    failed = None
+    for attempt in range(STORE_ATTEMPTS):
+        stamp = _meta_stamp(meta_path)
+        # Нет, устарело или то же хранилище, что не прочиталось, — строим
+        if stamp is None or stamp == failed or stamp[1] < os.path.getmtime(csv_path):
+            csv_to_store(csv_path, store_dir)
+            stamp = _meta_stamp(meta_path)
+        try:
+            return load_store(
+                store_dir, start=start, end=end, columns=columns, epoch=epoch
+            )
+        except STORE_ERRORS:
+            # Другой процесс мог заменить хранилище посреди чтения: тогда
+            # на следующей попытке читается уже его хранилище
+            if attempt == STORE_ATTEMPTS - 1:
+                raise
+            failed = stamp
+
+
+def to_epoch(df, time_column=TIME_COLUMN):
+    """
+    datetime64 -> int64 эпоха в тех же единицах (на месте, без копии данных)
+    """
+    if time_column in df.columns and df[time_column].dtype.kind == "M":
+        df[time_column] = df[time_column].to_numpy().view(np.int64)
+    return df
@@ -0,0 +1,133 @@
+"""
+Ресемплинг OHLCV в старшие таймфреймы (15m -> 1h/4h/1d).
+
+resample_ohlcv — батч: свечи группируются по началу интервала
+(отсчёт от эпохи, как origin="start_day" у pandas для таймфреймов,
+делящих сутки), границы групп находятся по отсортированному времени,
+агрегаты — np.*.reduceat за один проход: первый open, max high,
+min low, последний close, сумма volume.
+
+Пропуски: интервалы без базовых свечей по умолчанию просто отсутствуют;
+fill_gaps="nan" вставляет их с NaN (как pandas resample, volume = 0),
+fill_gaps="ffill" — плоскими свечами по предыдущему close.
+
+Resampler — то же инкрементально: незакрытая старшая свеча обновляется
+за O(1) на каждую базовую свечу.
+"""
+
+import numpy as np
+import pandas as pd
+
+from storage.ohlcv import TIME_COLUMN
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+def _step(timeframe, unit):
+    """
+    Длина таймфрейма ("15m", "1h", "4h", "1d", pd.Timedelta) в единицах unit
+    """
+    delta = pd.Timedelta(timeframe).to_timedelta64()
+    return int(delta.astype(f"timedelta64[{unit}]").astype(np.int64))
+
+
+def bucket_starts(times, timeframe):
+    """
+    Начало интервала таймфрейма для каждой метки времени (int64 той же единицы)
+    """
+    times = np.asarray(times)
+    unit = np.datetime_data(times.dtype)[0]
+    step = _step(timeframe, unit)
+    return (times.view(np.int64) // step) * step, unit, step
+
+
+def resample_ohlcv(df, timeframe, time_column=TIME_COLUMN, fill_gaps=None):
+    """
+    Агрегация OHLCV в таймфрейм timeframe; df отсортирован по времени.
+    Возвращает кадр с теми же колонками OHLCV и RangeIndex.
+    """
+    buckets, unit, step = bucket_starts(df[time_column].to_numpy(), timeframe)
+    if not len(buckets):
+        return df.iloc[:0][[time_column] + OHLCV_COLUMNS].reset_index(drop=True)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)]
+    values = {c: df[c].to_numpy(dtype=np.float64) for c in OHLCV_COLUMNS}
+    data = {
+        time_column: buckets[starts],
+        "open": values["open"][starts],
+        "high": np.maximum.reduceat(values["high"], starts),
+        "low": np.minimum.reduceat(values["low"], starts),
+        "close": values["close"][ends - 1],
+        "volume": np.add.reduceat(values["volume"], starts),
+    }
+    if fill_gaps is not None:
+        data = _fill_gaps(data, time_column, step, fill_gaps)
+    data[time_column] = data[time_column].view(f"datetime64[{unit}]")
+    return pd.DataFrame(data)
+
+
+def _fill_gaps(data, time_column, step, how):
+    times = data[time_column]
+    full = np.arange(times[0], times[-1] + step, step, dtype=np.int64)
+    rows = (times - times[0]) // step
+    out = {time_column: full}
+    for col in OHLCV_COLUMNS:
+        column = np.full(len(full), 0.0 if col == "volume" else np.nan)
+        column[rows] = data[col]
+        out[col] = column
+    if how == "ffill":
+        # Пустой интервал — плоская свеча по последнему close
+        present = np.zeros(len(full), dtype=bool)
+        present[rows] = True
+        last = np.maximum.accumulate(np.where(present, np.arange(len(full)), 0))
+        prev_close = out["close"][last]
+        for col in ["open", "high", "low", "close"]:
+            out[col] = np.where(present, out[col], prev_close)
+    elif how != "nan":
+        raise ValueError(f"fill_gaps: ожидается None, 'nan' или 'ffill', не {how!r}")
+    return out
+
+
+class Resampler:
+    """
+    Инкрементальный ресемплинг: update(bar) за O(1).
+    bar — dict с datetime и OHLCV базовой свечи (время по возрастанию).
+    """
+
+    def __init__(self, timeframe, time_column=TIME_COLUMN):
+        self.timeframe = timeframe
+        self.time_column = time_column
+        self.current = None
+        self._unit = None
+        self._step = None
+        self._bucket = None
+
+    def update(self, bar):
+        """
+        Обновляет незакрытую свечу (self.current). Возвращает закрытую
+        старшую свечу, если bar начал новый интервал, иначе None.
+        """
+        stamp = np.datetime64(pd.Timestamp(bar[self.time_column]).to_datetime64())
+        if self._step is None:
+            self._unit = np.datetime_data(stamp.dtype)[0]
+            self._step = _step(self.timeframe, self._unit)
+        value = int(stamp.astype(f"datetime64[{self._unit}]").astype(np.int64))
+        bucket = value // self._step * self._step
+        if bucket != self._bucket:
+            closed = self.current
+            self._bucket = bucket
+            self.current = {
+                self.time_column: pd.Timestamp(bucket, unit=self._unit),
+                "open": float(bar["open"]),
+                "high": float(bar["high"]),
+                "low": float(bar["low"]),
+                "close": float(bar["close"]),
+                "volume": float(bar["volume"]),
+            }
+            return closed
+        current = self.current
+        current["high"] = max(current["high"], float(bar["high"]))
+        current["low"] = min(current["low"], float(bar["low"]))
+        current["close"] = float(bar["close"])
+        current["volume"] += float(bar["volume"])
+        return None
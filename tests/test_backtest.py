@@ -0,0 +1,69 @@
+"""
+Вход бэктеста по фигурам — не раньше подтверждения последнего экстремума.
+"""
+
+import numpy as np
+import pytest
+
+from analysis.backtest import backtest, summarize
+from benchmarks.synthetic import synthetic_ohlcv
+from patterns.chart import CHART_ORDER
+from patterns.table import chart_points
+from pipeline import run_pipeline
+
+
+@pytest.fixture(scope="module")
+def random_walk():
+    # Без возврата к среднему: у сигналов не должно быть преимущества
+    df = synthetic_ohlcv(20_000, seed=0, reversion=0.0)
+    return df, run_pipeline(df)
+
+
+@pytest.mark.parametrize("lookahead", [1, 3, 8])
+def test_chart_entry_after_order(random_walk, lookahead):
+    df, result = random_walk
+    table = result["chart_patterns"]
+    trades = backtest(df, table, lookahead=lookahead, order=CHART_ORDER)
+    expected = np.maximum(
+        table["position"].to_numpy() + lookahead,
+        chart_points(table).max(axis=1) + CHART_ORDER,
+    )
+    inside = expected < len(df)
+    np.testing.assert_array_equal(trades["entry"], np.where(inside, expected, -1))
+
+
+def test_candle_entry_unchanged(random_walk):
+    df, result = random_walk
+    table = result["candle_patterns"]
+    trades = backtest(df, table, lookahead=2, window=2, order=CHART_ORDER)
+    expected = table["position"].to_numpy() + 3
+    np.testing.assert_array_equal(
+        trades["entry"], np.where(expected < len(df), expected, -1)
+    )
+
+
+def test_random_walk_chart_expectancy(random_walk):
+    df, result = random_walk
+    trades = backtest(df, result["chart_patterns"], order=CHART_ORDER)
+    assert abs(summarize(trades, by=())["expectancy_r"].iloc[0]) < 0.2
+
+
+def test_channel_and_neutral_directions(random_walk):
+    df, _ = random_walk
+    patterns = [
+        {"type": "Channel", "indices": [100, 110, 120, 130], "direction": "up"},
+        {"type": "Channel", "indices": [100, 110, 120, 130], "direction": "down"},
+        {
+            "type": "SymmetricalTriangle",
+            "indices": [100, 110, 120, 130],
+            "direction": "neutral",
+        },
+    ]
+    trades = backtest(df, patterns)
+    up, down, neutral = trades.to_dict("records")
+    # Канал торгуется по направлению: up — лонг, down — шорт
+    assert up["ret_5"] == pytest.approx(-down["ret_5"])
+    assert not np.isnan(up["r"]) and not np.isnan(down["r"])
+    # У neutral нет направления — ни исхода, ни mfe/mae
+    for key in ("ret_5", "mfe", "mae", "outcome", "r"):
+        assert np.isnan(neutral[key])
@@ -0,0 +1,73 @@
+"""
+Дисковый кэш пайплайна: выбор каталога и тёплый прогон как холодный.
+"""
+
+import pandas as pd
+import pytest
+
+from analysis.registry import fingerprint
+from benchmarks.synthetic import synthetic_ohlcv
+from pipeline import run_pipeline
+from storage.cache import CACHE_ENV, EXTENDED, DiskCache, from_env
+
+BARS = 20_000
+
+
+def test_from_env_default(tmp_path):
+    cache = from_env(default=str(tmp_path / "c"), environ={})
+    assert isinstance(cache, DiskCache)
+    assert cache.root == str(tmp_path / "c")
+
+
+@pytest.mark.parametrize("value", ["off", "0", "", "OFF"])
+def test_from_env_disabled(value):
+    assert from_env(environ={CACHE_ENV: value}) is None
+
+
+def test_from_env_directory(tmp_path):
+    cache = from_env(environ={CACHE_ENV: str(tmp_path / "d")})
+    assert cache.root == str(tmp_path / "d")
+
+
+@pytest.fixture(scope="module")
+def frames():
+    full = synthetic_ohlcv(BARS, seed=2)
+    cold = full.copy()
+    return full, cold, run_pipeline(cold)
+
+
+@pytest.mark.parametrize("split", [15_000, BARS - 7, BARS - 1])
+def test_extended_tables_match_cold(tmp_path, frames, split):
+    full, _, cold = frames
+    cache = DiskCache(str(tmp_path))
+    run_pipeline(full.iloc[:split].copy(), cache=cache)
+    warm = run_pipeline(full.copy(), cache=cache)
+    for name, table in cold.items():
+        assert warm[name].equals(table), name
+
+
+def test_approximate_extend_keyed_separately(tmp_path):
+    df = pd.DataFrame({"close": [1.0, 2.0, 3.0, 4.0]})
+    cache = DiskCache(str(tmp_path))
+
+    def compute(frame):
+        return frame["close"] * 2
+
+    def extend(frame, value, rows):
+        return pd.concat([value, frame["close"].iloc[rows:] * 2 + 1e-12])
+
+    def cached(frame):
+        return cache.cached(
+            "x", frame, {}, compute, extend, ["close"], exact_extend=False
+        )
+
+    cached(df.iloc[:2])
+    extended = cached(df)
+    key = cache.key("x", fingerprint(df, ["close"]), {})
+    assert cache.get(key) is None
+    extended_key = cache.key("x", fingerprint(df, ["close"]), ({}, EXTENDED))
+    assert cache.get(extended_key).equals(extended)
+    # Полный пересчёт пишется под основной ключ и вытесняет приближённый
+    exact = compute(df)
+    cache.put(key, exact)
+    assert cached(df).equals(exact)
@@ -0,0 +1,117 @@
+"""
+Ядра analysis.kernels против compute_* из analysis.indicators:
+"python"/"numba" — побитово, "numpy" — до относительной ошибки 1e-12.
+Цены округлены (повторы значений в окнах) и содержат NaN.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import kernels, registry
+from analysis.indicators import compute_atr, compute_rsi, compute_stochastic
+
+EXACT_BACKENDS = [
+    "python",
+    pytest.param(
+        "numba",
+        marks=pytest.mark.skipif(not kernels.HAVE_NUMBA, reason="нет numba"),
+    ),
+]
+WINDOWS = [2, 3, 14]
+
+
+def _frame(seed, n=300, decimals=1, nans=True):
+    rng = np.random.default_rng(seed)
+    close = np.round(100 + np.cumsum(rng.normal(size=n)), decimals)
+    high = close + np.round(rng.random(n), decimals)
+    low = close - np.round(rng.random(n), decimals)
+    # Плоский участок: одинаковые значения во всём окне
+    close[50:80] = close[50]
+    high[50:80] = close[50]
+    low[50:80] = close[50]
+    if nans:
+        close[[5, 120]] = np.nan
+        high[[7, 200]] = np.nan
+        low[201] = np.nan
+    return pd.DataFrame({"high": high, "low": low, "close": close})
+
+
+FRAMES = [_frame(seed, decimals=seed % 3) for seed in range(3)]
+
+
+def _assert_close(actual, expected):
+    np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize("backend", EXACT_BACKENDS)
+@pytest.mark.parametrize("window", WINDOWS)
+@pytest.mark.parametrize("df", FRAMES)
+def test_exact_backends(df, window, backend):
+    np.testing.assert_array_equal(
+        compute_rsi(df["close"], window, backend=backend),
+        compute_rsi(df["close"], window),
+    )
+    np.testing.assert_array_equal(
+        compute_atr(df, window, backend=backend), compute_atr(df, window)
+    )
+    for actual, expected in zip(
+        compute_stochastic(df, window, backend=backend), compute_stochastic(df, window)
+    ):
+        np.testing.assert_array_equal(actual, expected)
+
+
+@pytest.mark.parametrize("window", WINDOWS)
+@pytest.mark.parametrize("df", FRAMES)
+def test_numpy_backend(df, window):
+    _assert_close(
+        compute_rsi(df["close"], window, backend="numpy"),
+        compute_rsi(df["close"], window),
+    )
+    _assert_close(compute_atr(df, window, backend="numpy"), compute_atr(df, window))
+    for actual, expected in zip(
+        compute_stochastic(df, window, backend="numpy"), compute_stochastic(df, window)
+    ):
+        _assert_close(actual, expected)
+
+
+@pytest.mark.parametrize("window", WINDOWS)
+def test_rsi_wilder_backends(window):
+    close = _frame(0, nans=False)["close"].to_numpy()
+    expected = kernels.rsi_wilder(close, window, backend="python")
+    _assert_close(kernels.rsi_wilder(close, window, backend="numpy"), expected)
+    if kernels.HAVE_NUMBA:
+        np.testing.assert_array_equal(
+            kernels.rsi_wilder(close, window, backend="numba"), expected
+        )
+
+
+@pytest.mark.parametrize("length", [0, 1, 2])
+def test_short_input(length):
+    df = _frame(0).iloc[:length]
+    for backend in ("python", "numpy"):
+        np.testing.assert_array_equal(
+            compute_atr(df, 3, backend=backend), compute_atr(df, 3)
+        )
+
+
+@pytest.mark.parametrize("backend", EXACT_BACKENDS)
+def test_indicator_graph_backend(backend):
+    df = _frame(1)
+    df["volume"] = 1.0
+    expected = registry.IndicatorGraph().compute(df, registry.PIPELINE_INDICATORS)
+    actual = registry.IndicatorGraph(backend=backend).compute(
+        df, registry.PIPELINE_INDICATORS
+    )
+    for name, values in expected.items():
+        np.testing.assert_array_equal(actual[name], values, err_msg=name)
+
+
+def test_stoch_k_flat_window_python_floats():
+    # Питоновские float делят как numba с error_model="python": деление
+    # на ноль в плоском окне должно быть обработано в самом цикле
+    out = kernels.LOOPS["stoch_k"](
+        [1.0, 2.0, 0.5], [1.0, 1.0, 1.0], [1.0, 1.0, 1.0], [0.0] * 3
+    )
+    assert np.isnan(out[0])
+    assert out[1:] == [np.inf, -np.inf]
@@ -0,0 +1,50 @@
+"""
+Хранилище OHLCV: подмена каталога целиком и битое хранилище как промах.
+"""
+
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import synthetic_ohlcv
+from storage.ohlcv import STORE_SUFFIX, load_ohlcv
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = str(tmp_path / "X_15m.csv")
+    synthetic_ohlcv(50_000).to_csv(path, index=False)
+    return path
+
+
+def _store(csv_path):
+    return os.path.splitext(csv_path)[0] + STORE_SUFFIX
+
+
+def test_truncated_store_is_rebuilt(csv_path):
+    expected = load_ohlcv(csv_path)
+    column = os.path.join(_store(csv_path), "close.npy")
+    with open(column, "r+b") as f:
+        f.truncate(os.path.getsize(column) // 2)
+    pd.testing.assert_frame_equal(load_ohlcv(csv_path), expected)
+
+
+def _load(args):
+    csv_path, i = args
+    if i % 4 == 0:
+        shutil.rmtree(_store(csv_path), ignore_errors=True)
+    return len(load_ohlcv(csv_path))
+
+
+def test_concurrent_loads_share_store(csv_path):
+    # Несколько задач run_batch с общим базовым CSV строят хранилище разом
+    with ProcessPoolExecutor(max_workers=3) as pool:
+        rows = set(pool.map(_load, [(csv_path, i) for i in range(24)]))
+    assert rows == {50_000}
+    assert sorted(os.listdir(os.path.dirname(csv_path))) == [
+        "X_15m.csv",
+        "X_15m" + STORE_SUFFIX,
+    ]
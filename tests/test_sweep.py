@@ -0,0 +1,44 @@
+"""
+Перебор на случайном блуждании: преимущества нет ни у одной точки.
+"""
+
+import pytest
+
+from analysis.backtest import summarize
+from analysis.sweep import SweepContext, grid, run_sweep
+from benchmarks.synthetic import synthetic_ohlcv
+from patterns.table import chart_points
+
+ORDERS = [3, 5, 8]
+
+
+@pytest.fixture(scope="module")
+def random_walk():
+    # Без возврата к среднему: ожидание любого сигнала ~0R
+    return synthetic_ohlcv(60_000, seed=0, reversion=0.0)
+
+
+@pytest.mark.parametrize("order", ORDERS)
+def test_chart_expectancy_near_zero(random_walk, order):
+    # Вход по фигуре — после подтверждения экстремумов с order точки
+    context = SweepContext(random_walk.copy(), stage="confirmed")
+    candles, charts, trades = context.confirmed({}, order, {"lookahead": 1})
+    chart_trades = trades.iloc[len(candles) :]
+    assert len(chart_trades) == len(charts) > 100
+    inside = chart_trades["entry"].to_numpy() >= 0
+    known = chart_points(charts).max(axis=1) + order
+    assert (chart_trades["entry"].to_numpy()[inside] >= known[inside]).all()
+    assert abs(summarize(chart_trades, by=())["expectancy_r"].iloc[0]) < 0.15
+
+
+def test_random_walk_ranks_near_zero(random_walk):
+    space = {"order": ORDERS, "lookahead": [1, 3], "volume_factor": [1.0, 1.3]}
+    table = run_sweep(random_walk.copy(), grid(space), max_workers=1)
+    assert len(table) == 12
+    assert abs(table["expectancy_r"].iloc[0]) < 0.15
+
+
+@pytest.mark.parametrize("key", ["order", "lookahead"])
+def test_point_params_rejected_in_backtest_kwargs(random_walk, key):
+    with pytest.raises(TypeError, match=key):
+        run_sweep(random_walk.copy(), [{}], max_workers=1, **{key: 3})
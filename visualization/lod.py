@@ -0,0 +1,184 @@
+"""
+Уровень детализации (LOD) для больших кадров в plot_patterns.
+
+Видимый диапазон делится на max_points корзин подряд идущих свечей:
+- свечи агрегируются в OHLC корзины (первый open, max high, min low,
+  последний close, сумма volume), x — время первой свечи корзины;
+- линии прореживаются с сохранением экстремумов: "minmax" — минимум
+  и максимум каждой корзины (в порядке времени), "lttb" — Largest
+  Triangle Three Buckets (одна точка на корзину, форма кривой);
+- столбики (MACD hist) — значение с наибольшим модулем в корзине.
+
+Маркеры паттернов сюда не попадают — plot_patterns рисует их по
+исходному кадру в полном разрешении.
+"""
+
+import numpy as np
+import pandas as pd
+
+from storage.ohlcv import TIME_COLUMN
+from storage.resample import OHLCV_COLUMNS
+
+LINE_METHODS = ("minmax", "lttb")
+
+
+def visible_slice(df, x_range=None, time_column=TIME_COLUMN):
+    """
+    Позиции [start, stop) свечей df в диапазоне x_range (включительно)
+    """
+    if x_range is None:
+        return 0, len(df)
+    times = df[time_column].to_numpy()
+    lo, hi = (np.asarray(pd.Timestamp(x).to_datetime64(), times.dtype) for x in x_range)
+    return int(np.searchsorted(times, lo)), int(np.searchsorted(times, hi, "right"))
+
+
+def _padded(values, size, fill):
+    # Дополняет до кратного size и режет на корзины (строки)
+    pad = -len(values) % size
+    return np.r_[values, np.full(pad, fill)].reshape(-1, size)
+
+
+def minmax_indices(values, n_buckets):
+    """
+    Позиции минимума и максимума каждой из n_buckets корзин (по возрастанию).
+    NaN не выбираются, если в корзине есть числа.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    offsets = np.arange(0, n, size)
+    lows = np.where(np.isnan(values), np.inf, values)
+    highs = np.where(np.isnan(values), -np.inf, values)
+    argmin = _padded(lows, size, np.inf).argmin(axis=1) + offsets
+    argmax = _padded(highs, size, -np.inf).argmax(axis=1) + offsets
+    return np.unique(np.r_[argmin, argmax])
+
+
+def lttb_indices(values, n_out):
+    """
+    Largest Triangle Three Buckets: позиции n_out точек (первая и последняя
+    всегда сохраняются). x — номер свечи, NaN считаются нулём при выборе точек.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    y = np.where(np.isnan(values), 0.0, values)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    prev = 0
+    for b in range(n_out - 2):
+        start, stop = edges[b], edges[b + 1]
+        # Третья вершина — среднее следующей корзины
+        nxt_start, nxt_stop = stop, edges[b + 2] if b + 2 < n_out - 1 else n
+        nxt_x = (nxt_start + nxt_stop - 1) / 2
+        nxt_y = y[nxt_start:nxt_stop].mean()
+        xs = np.arange(start, stop)
+        area = np.abs(
+            (prev - nxt_x) * (y[start:stop] - y[prev]) - (prev - xs) * (nxt_y - y[prev])
+        )
+        prev = start + int(area.argmax())
+        out[b + 1] = prev
+    return out
+
+
+def absmax_indices(values, n_buckets):
+    """
+    Позиция значения с наибольшим модулем в каждой корзине
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= n_buckets:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    mags = np.where(np.isnan(values), -1.0, np.abs(values))
+    return _padded(mags, size, -1.0).argmax(axis=1) + np.arange(0, n, size)
+
+
+def ohlc_buckets(df, n_buckets, time_column=TIME_COLUMN):
+    """
+    Свечи df, агрегированные в n_buckets корзин подряд идущих свечей
+    """
+    n = len(df)
+    if n <= n_buckets:
+        return df[[time_column] + OHLCV_COLUMNS].reset_index(drop=True)
+    size = -(-n // n_buckets)
+    starts = np.arange(0, n, size)
+    ends = np.r_[starts[1:], n]
+    values = {c: df[c].to_numpy(dtype=np.float64) for c in OHLCV_COLUMNS}
+    return pd.DataFrame(
+        {
+            time_column: df[time_column].to_numpy()[starts],
+            "open": values["open"][starts],
+            "high": np.fmax.reduceat(values["high"], starts),
+            "low": np.fmin.reduceat(values["low"], starts),
+            "close": values["close"][ends - 1],
+            "volume": np.add.reduceat(np.nan_to_num(values["volume"]), starts),
+        }
+    )
+
+
+class LevelOfDetail:
+    """
+    Данные серий для plot_patterns в видимом диапазоне.
+    max_points=None — без прореживания (все свечи диапазона), иначе >= 2
+    (minmax берёт пару точек на корзину).
+    """
+
+    def __init__(
+        self,
+        df,
+        max_points=None,
+        x_range=None,
+        line_method="minmax",
+        time_column=TIME_COLUMN,
+    ):
+        if line_method not in LINE_METHODS:
+            raise ValueError(
+                f"line_method: ожидается одно из {LINE_METHODS}, не {line_method!r}"
+            )
+        if max_points is not None and max_points < 2:
+            raise ValueError(f"max_points: ожидается >= 2 или None, не {max_points!r}")
+        start, stop = visible_slice(df, x_range, time_column)
+        self.df = df.iloc[start:stop] if (start, stop) != (0, len(df)) else df
+        self.max_points = max_points
+        self.line_method = line_method
+        self.time_column = time_column
+        self.reduced = max_points is not None and len(self.df) > max_points
+
+    def candles(self):
+        """
+        Кадр со временем и OHLCV (корзины, если прореживание включено)
+        """
+        if not self.reduced:
+            return self.df
+        return ohlc_buckets(self.df, self.max_points, self.time_column)
+
+    def _pick(self, column, indices):
+        x = self.df[self.time_column].to_numpy()[indices]
+        return x, self.df[column].to_numpy()[indices]
+
+    def line(self, column):
+        """
+        (x, y) линии column
+        """
+        if not self.reduced:
+            return self.df[self.time_column], self.df[column]
+        values = self.df[column].to_numpy()
+        if self.line_method == "lttb":
+            indices = lttb_indices(values, self.max_points)
+        else:
+            indices = minmax_indices(values, self.max_points // 2)
+        return self._pick(column, indices)
+
+    def bars(self, column):
+        """
+        (x, y) столбиков column
+        """
+        if not self.reduced:
+            return self.df[self.time_column], self.df[column]
+        return self._pick(column, absmax_indices(self.df[column], self.max_points))
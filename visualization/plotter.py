@@ -1,8 +1,170 @@
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from patterns.table import as_table, chart_points
+from visualization.lod import LevelOfDetail
 
-def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
+
+def _candle_rows(df, patterns):
+    """
+    (type, direction, позиция свечи) для свечных паттернов —
+    из таблицы patterns.table или из списка dict'ов
+    """
+    table = as_table(df, patterns, chart=False)
+    return list(
+        zip(
+            table["type"].astype(str).tolist(),
+            table["direction"].astype(str).tolist(),
+            table["position"].tolist(),
+        )
+    )
+
+
+def _chart_rows(df, patterns):
+    """
+    (type, direction, позиции точек) для фигурных паттернов
+    """
+    table = as_table(df, patterns, chart=True)
+    points = [[i for i in row if i >= 0] for row in chart_points(table).tolist()]
+    return list(
+        zip(
+            table["type"].astype(str).tolist(),
+            table["direction"].astype(str).tolist(),
+            points,
+        )
+    )
+
+
+# Тип trace для линий и маркеров. У Plotly нет WebGL-версий Candlestick
+# и Bar, поэтому свечи, объём и гистограмма MACD остаются SVG —
+# на больших кадрах их разгружает max_points (visualization.lod).
+RENDER_BACKENDS = {"svg": go.Scatter, "webgl": go.Scattergl}
+
+# Серии, которые зависят от видимого диапазона: имя trace -> (вид, колонка).
+# По ним series_updates пересчитывает данные при зуме/панорамировании.
+LOD_SERIES = {
+    "Candles": ("candles", None),
+    "Volume": ("volume", "volume"),
+    "MACD Hist": ("bars", "macd_hist"),
+    "Bollinger Upper": ("line", "bb_upper"),
+    "Bollinger Lower": ("line", "bb_lower"),
+    "Bollinger MA": ("line", "bb_ma"),
+    "ATR 14": ("line", "atr_14"),
+    "MACD": ("line", "macd"),
+    "MACD Signal": ("line", "macd_signal"),
+    "EMA 20": ("line", "ema_20"),
+    "EMA 50": ("line", "ema_50"),
+    "SMA 20": ("line", "sma_20"),
+    "SMA 50": ("line", "sma_50"),
+    "Volume MA20": ("line", "volume_ma_20"),
+    "RSI": ("line", "rsi"),
+    "%K": ("line", "stoch_k"),
+    "%D": ("line", "stoch_d"),
+}
+
+
+def series_traces(fig):
+    """
+    [(номер trace, имя)] серий LOD_SERIES в фигуре plot_patterns
+    """
+    return [(i, t.name) for i, t in enumerate(fig.data) if t.name in LOD_SERIES]
+
+
+def series_updates(df, traces, max_points=None, x_range=None, line_method="minmax"):
+    """
+    {номер trace: {свойство: данные}} серий traces (см. series_traces)
+    для диапазона x_range — частичное обновление уже построенной фигуры
+    """
+    lod = LevelOfDetail(df, max_points, x_range, line_method)
+    candles = lod.candles()
+    updates = {}
+    for i, name in traces:
+        kind, column = LOD_SERIES[name]
+        if kind == "candles":
+            updates[i] = {"x": candles["datetime"]}
+            for col in ["open", "high", "low", "close"]:
+                updates[i][col] = candles[col]
+        elif kind == "volume":
+            updates[i] = {"x": candles["datetime"], "y": candles[column]}
+        else:
+            x, y = getattr(lod, kind)(column)
+            updates[i] = {"x": x, "y": y}
+    return updates
+
+
+def _group_rows(rows):
+    """
+    {(type, direction): [позиции]} в порядке первого появления группы
+    """
+    groups = {}
+    for name, direction, positions in rows:
+        groups.setdefault((name, direction), []).append(positions)
+    return groups
+
+
+def marker_y(direction, idx, highs, lows, offset):
+    """
+    Высота маркера: под low для бычьих, над high для медвежьих,
+    посередине свечи — иначе (direction, idx и offset — числа или массивы)
+    """
+    direction = np.asarray(direction)
+    low, high = lows[idx], highs[idx]
+    return np.select(
+        [direction == "bullish", direction == "bearish"],
+        [low * (1 - offset), high * (1 + offset)],
+        (low + high) / 2,
+    )
+
+
+def _marker_colors(colors):
+    """
+    Цвета точек -> свойства marker: коды цветов и дискретная шкала.
+    Числовой marker.color Plotly проверяет массивом целиком, а список
+    строк — по одной (на тысячах маркеров это основное время построения)
+    """
+    palette = list(dict.fromkeys(colors)) or ["dodgerblue"]
+    codes = {color: i for i, color in enumerate(palette)}
+    top = max(len(palette) - 1, 1)
+    scale = [[i / top, color] for i, color in enumerate(palette)]
+    if len(palette) == 1:
+        scale.append([1, palette[0]])
+    return {
+        "color": np.array([codes[color] for color in colors], dtype=np.int64),
+        "colorscale": scale,
+        "cmin": 0,
+        "cmax": top,
+    }
+
+
+# Символ стрелки сигнала по направлению (neutral и прочие — круг)
+ARROW_SYMBOLS = {"bullish": "arrow-bar-up", "bearish": "arrow-bar-down"}
+CANDLE_ARROW_COLORS = {"bullish": "lime", "bearish": "red"}
+
+
+def plot_patterns(
+    df,
+    candle_patterns,
+    chart_patterns,
+    return_fig=True,
+    max_points=None,
+    x_range=None,
+    line_method="minmax",
+    render="svg",
+):
+    # Паттерны: списки dict'ов или таблицы patterns.table
+    # render="webgl" — линии и маркеры через Scattergl (см. RENDER_BACKENDS)
+    if render not in RENDER_BACKENDS:
+        raise ValueError(
+            f"render: ожидается одно из {list(RENDER_BACKENDS)}, не {render!r}"
+        )
+    scatter = RENDER_BACKENDS[render]
+    # max_points — уровень детализации серий в диапазоне x_range
+    # (см. visualization.lod); маркеры паттернов — всегда по всем свечам
+    lod = LevelOfDetail(df, max_points, x_range, line_method)
+    candles = lod.candles()
+    candle_rows = _candle_rows(df, candle_patterns)
+    chart_rows = _chart_rows(df, chart_patterns)
     # --- Создаём subplot: Price+Patterns, Volume, RSI
     fig = make_subplots(
         rows=5,
@@ -29,11 +191,11 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
     # --- 1. Основной свечной график ---
     fig.add_trace(
         go.Candlestick(
-            x=df["datetime"],
-            open=df["open"],
-            high=df["high"],
-            low=df["low"],
-            close=df["close"],
+            x=candles["datetime"],
+            open=candles["open"],
+            high=candles["high"],
+            low=candles["low"],
+            close=candles["close"],
             name="Candles",
         ),
         row=1,
@@ -42,10 +204,11 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
 
     # --- EMA/SMA/ATR линии ---
     if "bb_upper" in df and "bb_lower" in df and "bb_ma" in df:
+        x, y = lod.line("bb_upper")
         fig.add_trace(
-            go.Scatter(
-                x=df["datetime"],
-                y=df["bb_upper"],
+            scatter(
+                x=x,
+                y=y,
                 mode="lines",
                 name="Bollinger Upper",
                 line=dict(width=1, color="gray", dash="dot"),
@@ -53,10 +216,11 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
             row=1,
             col=1,
         )
+        x, y = lod.line("bb_lower")
         fig.add_trace(
-            go.Scatter(
-                x=df["datetime"],
-                y=df["bb_lower"],
+            scatter(
+                x=x,
+                y=y,
                 mode="lines",
                 name="Bollinger Lower",
                 line=dict(width=1, color="gray", dash="dot"),
@@ -64,10 +228,11 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
             row=1,
             col=1,
         )
+        x, y = lod.line("bb_ma")
         fig.add_trace(
-            go.Scatter(
-                x=df["datetime"],
-                y=df["bb_ma"],
+            scatter(
+                x=x,
+                y=y,
                 mode="lines",
                 name="Bollinger MA",
                 line=dict(width=1, color="gray", dash="dash"),
@@ -76,10 +241,11 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
             col=1,
         )
     if "atr_14" in df:
+        x, y = lod.line("atr_14")
         fig.add_trace(
-            go.Scatter(
-                x=df["datetime"],
-                y=df["atr_14"],
+            scatter(
+                x=x,
+                y=y,
                 mode="lines",
                 name="ATR 14",
                 line=dict(width=1, color="green", dash="dash"),
@@ -88,10 +254,11 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
             col=1,
         )
     if "macd" in df and "macd_signal" in df and "macd_hist" in df:
+        x, y = lod.line("macd")
         fig.add_trace(
-            go.Scatter(
-                x=df["datetime"],
-                y=df["macd"],
+            scatter(
+                x=x,
+                y=y,
                 mode="lines",
                 name="MACD",
                 line=dict(width=1.2, color="cyan"),
@@ -99,10 +266,11 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
             row=3,
             col=1,
         )
+        x, y = lod.line("macd_signal")
         fig.add_trace(
-            go.Scatter(
-                x=df["datetime"],
-                y=df["macd_signal"],
+            scatter(
+                x=x,
+                y=y,
                 mode="lines",
                 name="MACD Signal",
                 line=dict(width=1, color="orange", dash="dash"),
@@ -110,10 +278,11 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
             row=3,
             col=1,
         )
+        x, y = lod.bars("macd_hist")
         fig.add_trace(
             go.Bar(
-                x=df["datetime"],
-                y=df["macd_hist"],
+                x=x,
+                y=y,
                 name="MACD Hist",
                 marker_color="magenta",
                 opacity=0.4,
@@ -122,10 +291,11 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
             col=1,
         )
     if "ema_20" in df:
+        x, y = lod.line("ema_20")
         fig.add_trace(
-            go.Scatter(
-                x=df["datetime"],
-                y=df["ema_20"],
+            scatter(
+                x=x,
+                y=y,
                 mode="lines",
                 name="EMA 20",
                 line=dict(width=1.5, color="cyan"),
@@ -134,10 +304,11 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
             col=1,
         )
     if "ema_50" in df:
+        x, y = lod.line("ema_50")
         fig.add_trace(
-            go.Scatter(
-                x=df["datetime"],
-                y=df["ema_50"],
+            scatter(
+                x=x,
+                y=y,
                 mode="lines",
                 name="EMA 50",
                 line=dict(width=1.5, color="orange"),
@@ -146,10 +317,11 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
             col=1,
         )
     if "sma_20" in df:
+        x, y = lod.line("sma_20")
         fig.add_trace(
-            go.Scatter(
-                x=df["datetime"],
-                y=df["sma_20"],
+            scatter(
+                x=x,
+                y=y,
                 mode="lines",
                 name="SMA 20",
                 line=dict(width=1, dash="dot", color="green"),
@@ -158,10 +330,11 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
             col=1,
         )
     if "sma_50" in df:
+        x, y = lod.line("sma_50")
         fig.add_trace(
-            go.Scatter(
-                x=df["datetime"],
-                y=df["sma_50"],
+            scatter(
+                x=x,
+                y=y,
                 mode="lines",
                 name="SMA 50",
                 line=dict(width=1, dash="dot", color="red"),
@@ -176,106 +349,75 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
         "bearish": "orangered",
         "neutral": "dodgerblue",
     }
-    # Добавим стрелки "вверх" для бычьих, "вниз" для медвежьих паттернов
-    for p in candle_patterns:
-        idx = (
-            p["index"] if isinstance(p["index"], int) else df.index.get_loc(p["index"])
-        )
-        x = df["datetime"].iloc[idx]
-
-        if p["direction"] == "bullish":
-            y = df["low"].iloc[idx] * 0.98
-            marker_symbol = "arrow-bar-up"
-            marker_color = "lime"
-        elif p["direction"] == "bearish":
-            y = df["high"].iloc[idx] * 1.02
-            marker_symbol = "arrow-bar-down"
-            marker_color = "red"
-        else:
-            y = (df["low"].iloc[idx] + df["high"].iloc[idx]) / 2
-            marker_symbol = "circle"
-            marker_color = "dodgerblue"
-        # Добавляем стрелку
-        fig.add_trace(
-            go.Scatter(
-                x=[x],
-                y=[y],
-                mode="markers",
-                marker=dict(
-                    symbol=marker_symbol,
-                    size=22,
-                    color=marker_color,
-                    line=dict(width=1, color="black"),
-                ),
-                name=f"{p['type']} signal",
-                showlegend=False,
-                hovertext=f"{p['type']} ({p['direction']})",
-            ),
-            row=1,
-            col=1,
-        )
+    # Маркеры — один trace на (тип, направление): стрелка и ромб каждого
+    # паттерна — точки одного trace (символ, размер и цвет по точкам)
+    candle_groups = _group_rows(candle_rows)
+    chart_groups = _group_rows(chart_rows)
+    times = df["datetime"]
+    highs = df["high"].to_numpy()
+    lows = df["low"].to_numpy()
     pattern_types_in_legend = set()
-    for p in candle_patterns:
-        idx = (
-            p["index"] if isinstance(p["index"], int) else df.index.get_loc(p["index"])
-        )
-        x = df["datetime"].iloc[idx]
-        name = p["type"]
+    for (name, direction), positions in candle_groups.items():
+        idx = np.asarray(positions)
+        y = marker_y(direction, idx, highs, lows, 0.02)
+        n = len(idx)
         show_legend = name not in pattern_types_in_legend
         pattern_types_in_legend.add(name)
-        if p["direction"] == "bullish":
-            y = df["low"].iloc[idx] * 0.98
-            color = pattern_colors["bullish"]
-        elif p["direction"] == "bearish":
-            y = df["high"].iloc[idx] * 1.02
-            color = pattern_colors["bearish"]
-        else:
-            y = (df["low"].iloc[idx] + df["high"].iloc[idx]) / 2
-            color = pattern_colors["neutral"]
-
+        # Стрелка "вверх" для бычьих, "вниз" для медвежьих, ромб — поверх
+        arrow_color = CANDLE_ARROW_COLORS.get(direction, "dodgerblue")
+        color = pattern_colors.get(direction, pattern_colors["neutral"])
         fig.add_trace(
-            go.Scatter(
-                x=[x],
-                y=[y],
+            scatter(
+                x=times.iloc[np.r_[idx, idx]],
+                y=np.r_[y, y],
                 mode="markers",
-                marker=dict(color=color, size=12, symbol="diamond"),
+                marker={
+                    "symbol": [ARROW_SYMBOLS.get(direction, "circle")] * n
+                    + ["diamond"] * n,
+                    "size": [22] * n + [12] * n,
+                    "line": {"width": [1] * n + [0] * n, "color": "black"},
+                    **_marker_colors([arrow_color] * n + [color] * n),
+                },
                 name=name,
                 legendgroup=name,
                 showlegend=show_legend,
-                hovertext=f"{p['type']} ({p['direction']})",
+                hovertext=f"{name} ({direction})",
             ),
             row=1,
             col=1,
         )
 
     # --- 3. Фигурные паттерны ---
-    for pattern in chart_patterns:
-        name = pattern["type"]
+    # Ломаные одной группы — один trace, фигуры разделены None
+    for (name, direction), figures in chart_groups.items():
         show_legend = name not in pattern_types_in_legend
         pattern_types_in_legend.add(name)
-        indices = pattern["indices"]
-        direction = pattern.get("direction", "neutral")
         color = pattern_colors.get(direction, "dodgerblue")
-        x_points = [df["datetime"].iloc[i] for i in indices]
-        # Высота для линий
-        if name.lower().endswith("top") or name.lower().endswith("shoulders"):
-            y_points = [df["high"].iloc[i] for i in indices]
-        elif name.lower().endswith("bottom"):
-            y_points = [df["low"].iloc[i] for i in indices]
-        else:
-            n = len(indices)
-            y_points = [
-                df["high"].iloc[i] if k < n // 2 else df["low"].iloc[i]
-                for k, i in enumerate(indices)
-            ]
+        x_points, y_points = [], []
+        # Время всех точек группы — одной выборкой, не по фигуре
+        stamps = iter(times.iloc[np.concatenate(figures)].tolist())
+        for indices in figures:
+            idx = np.asarray(indices)
+            # Высота для линий
+            if name.lower().endswith("top") or name.lower().endswith("shoulders"):
+                y = highs[idx]
+            elif name.lower().endswith("bottom"):
+                y = lows[idx]
+            else:
+                y = np.where(np.arange(len(idx)) < len(idx) // 2, highs[idx], lows[idx])
+            if x_points:
+                x_points.append(None)
+                y_points.append(None)
+            x_points.extend(next(stamps) for _ in indices)
+            y_points.extend(y.tolist())
 
         fig.add_trace(
-            go.Scatter(
+            scatter(
                 x=x_points,
                 y=y_points,
                 mode="lines+markers",
-                marker=dict(color=color, size=9, symbol="circle"),
-                line=dict(color=color, width=3, dash="dot"),
+                marker={"color": color, "size": 9, "symbol": "circle"},
+                line={"color": color, "width": 3, "dash": "dot"},
                 name=name,
                 legendgroup=name,
                 showlegend=show_legend,
@@ -286,38 +428,23 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
         )
 
     # --- Стрелки для фигурных паттернов (только для подтверждённых) ---
-
-    for p in chart_patterns:
-        name = p["type"]
-        direction = p.get("direction", "neutral")
-        color = pattern_colors.get(direction, "dodgerblue")
-        indices = p["indices"]
-        # По умолчанию ставим стрелку в крайней точке фигуры (например, последняя свеча)
-        idx = indices[-1]
-        x = df["datetime"].iloc[idx]
-        # Для “bullish” — стрелка вверх чуть ниже low, для “bearish” — вниз чуть выше high
-
-        if direction == "bullish":
-            y = df["low"].iloc[idx] * 0.985
-            marker_symbol = "arrow-bar-up"
-        elif direction == "bearish":
-            y = df["high"].iloc[idx] * 1.015
-            marker_symbol = "arrow-bar-down"
-        else:
-            y = (df["low"].iloc[idx] + df["high"].iloc[idx]) / 2
-            marker_symbol = "circle"
+    # Поверх ломаных, один trace на (тип, направление) в группе легенды типа
+    for (name, direction), figures in chart_groups.items():
+        # Стрелка — в крайней точке фигуры (последняя свеча)
+        idx = np.asarray([indices[-1] for indices in figures])
         fig.add_trace(
-            go.Scatter(
-                x=[x],
-                y=[y],
+            scatter(
+                x=times.iloc[idx],
+                y=marker_y(direction, idx, highs, lows, 0.015),
                 mode="markers",
-                marker=dict(
-                    symbol=marker_symbol,
-                    size=26,
-                    color=color,
-                    line=dict(width=2, color="black"),
-                ),
-                name=f"{name} signal",
+                marker={
+                    "symbol": ARROW_SYMBOLS.get(direction, "circle"),
+                    "size": 26,
+                    "color": pattern_colors.get(direction, "dodgerblue"),
+                    "line": {"width": 2, "color": "black"},
+                },
+                name=name,
+                legendgroup=name,
                 showlegend=False,
                 hovertext=f"{name} ({direction})",
             ),
@@ -328,8 +455,8 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
     # --- 4. Объём ---
     fig.add_trace(
         go.Bar(
-            x=df["datetime"],
-            y=df["volume"],
+            x=candles["datetime"],
+            y=candles["volume"],
             name="Volume",
             marker_color="white",
             opacity=0.5,
@@ -338,10 +465,11 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
         col=1,
     )
     if "volume_ma_20" in df:
+        x, y = lod.line("volume_ma_20")
         fig.add_trace(
-            go.Scatter(
-                x=df["datetime"],
-                y=df["volume_ma_20"],
+            scatter(
+                x=x,
+                y=y,
                 mode="lines",
                 name="Volume MA20",
                 line=dict(width=1, color="magenta"),
@@ -352,10 +480,11 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
 
     # --- 5. RSI ---
     if "rsi" in df:
+        x, y = lod.line("rsi")
         fig.add_trace(
-            go.Scatter(
-                x=df["datetime"],
-                y=df["rsi"],
+            scatter(
+                x=x,
+                y=y,
                 mode="lines",
                 name="RSI",
                 line=dict(width=1.2, color="dodgerblue"),
@@ -369,10 +498,11 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
 
     # --- Stochastic Oscillator (ряд 5) ---
     if "stoch_k" in df and "stoch_d" in df:
+        x, y = lod.line("stoch_k")
         fig.add_trace(
-            go.Scatter(
-                x=df["datetime"],
-                y=df["stoch_k"],
+            scatter(
+                x=x,
+                y=y,
                 mode="lines",
                 name="%K",
                 line=dict(width=1.2, color="dodgerblue"),
@@ -380,10 +510,11 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
             row=5,
             col=1,
         )
+        x, y = lod.line("stoch_d")
         fig.add_trace(
-            go.Scatter(
-                x=df["datetime"],
-                y=df["stoch_d"],
+            scatter(
+                x=x,
+                y=y,
                 mode="lines",
                 name="%D",
                 line=dict(width=1.2, color="orange", dash="dash"),
@@ -394,6 +525,8 @@ def plot_patterns(df, candle_patterns, chart_patterns, return_fig=True):
         # Линии перекупленности/перепроданности (обычно 80 и 20)
         fig.add_hline(y=80, line_dash="dot", line_color="red", row=5, col=1)
         fig.add_hline(y=20, line_dash="dot", line_color="green", row=5, col=1)
+    if x_range is not None:
+        fig.update_xaxes(range=list(x_range))
     # --- Оформление ---
     fig.update_layout(
         title="Crypto Chart with Patterns & Indicators",
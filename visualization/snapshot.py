@@ -0,0 +1,152 @@
+"""
+Статический снимок дашборда: пайплайн считается один раз при экспорте,
+дашборд только читает готовые файлы.
+
+Каталог снимка:
+- meta.json        — параметры (max_points, уровни тайлов, серии фигуры);
+- figure.json.gz   — обзорная фигура plot_patterns (все маркеры паттернов,
+                     серии прорежены до max_points);
+- frame.npystore/  — время, OHLCV и индикаторы в колоночном хранилище
+                     storage.ohlcv (memmap, срезы читаются с диска);
+- tiles/           — данные серий по тайлам времени: уровень L режет ряд
+                     на тайлы по max_points * 2**L свечей, каждый прорежен
+                     до max_points (series_updates), npz со сжатием.
+
+Snapshot.updates(x_range): окно до max_points свечей читается из
+frame.npystore целиком, более широкое — из не более чем двух тайлов
+уровня, где тайл не меньше окна. Стоимость ответа ограничена max_points
+и не зависит от длины истории.
+
+Экспорт — export_snapshot.py; модуль не зависит от пайплайна анализа.
+"""
+
+import gzip
+import json
+import os
+
+import numpy as np
+
+from storage.ohlcv import TIME_COLUMN, load_store, time_slice, write_store
+from storage.resample import OHLCV_COLUMNS
+from visualization.plotter import (
+    LOD_SERIES,
+    plot_patterns,
+    series_traces,
+    series_updates,
+)
+
+FIGURE_FILE = "figure.json.gz"
+FRAME_DIR = "frame.npystore"
+TILES_DIR = "tiles"
+META_FILE = "meta.json"
+
+
+def _tile_path(path, level, k):
+    return os.path.join(path, TILES_DIR, f"L{level}_{k}.npz")
+
+
+def _levels(rows, max_points):
+    # Уровни 1..L: на верхнем один тайл покрывает весь ряд
+    level = 1
+    while max_points * 2**level < rows:
+        level += 1
+    return level
+
+
+def export_snapshot(
+    df, candle_patterns, chart_patterns, path, max_points=3000, render="webgl"
+):
+    """
+    Пишет снимок в path. df — кадр после run_pipeline (с индикаторами),
+    паттерны — таблицы для маркеров (обычно отфильтрованные).
+    """
+    os.makedirs(os.path.join(path, TILES_DIR), exist_ok=True)
+    fig = plot_patterns(
+        df,
+        candle_patterns,
+        chart_patterns,
+        max_points=max_points,
+        render=render,
+    )
+    # Зум пользователя сохраняется при частичных обновлениях фигуры
+    fig.update_layout(uirevision="range")
+    with gzip.open(os.path.join(path, FIGURE_FILE), "wt", encoding="utf-8") as f:
+        f.write(fig.to_json())
+
+    series = series_traces(fig)
+    columns = [c for _, c in LOD_SERIES.values() if c is not None and c in df]
+    frame = df[[TIME_COLUMN] + list(dict.fromkeys(OHLCV_COLUMNS + columns))]
+    write_store(frame, os.path.join(path, FRAME_DIR))
+
+    levels = _levels(len(df), max_points)
+    for level in range(1, levels + 1):
+        span = max_points * 2**level
+        for k, start in enumerate(range(0, len(df), span)):
+            updates = series_updates(
+                frame.iloc[start : start + span], series, max_points
+            )
+            arrays = {
+                f"{i}.{prop}": np.asarray(values)
+                for i, props in updates.items()
+                for prop, values in props.items()
+            }
+            np.savez_compressed(_tile_path(path, level, k), **arrays)
+
+    meta = {
+        "rows": len(df),
+        "max_points": max_points,
+        "levels": levels,
+        "render": render,
+        "series": series,
+    }
+    with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class Snapshot:
+    """
+    Чтение снимка: обзорная фигура и данные серий для видимого диапазона
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.max_points = self.meta["max_points"]
+        self.series = [tuple(item) for item in self.meta["series"]]
+        self.frame_dir = os.path.join(path, FRAME_DIR)
+
+    def figure(self):
+        """
+        Обзорная фигура как dict (годится для dcc.Graph(figure=...))
+        """
+        with gzip.open(
+            os.path.join(self.path, FIGURE_FILE), "rt", encoding="utf-8"
+        ) as f:
+            return json.load(f)
+
+    def updates(self, x_range=None):
+        """
+        {номер trace: {свойство: данные}} для x_range (None — весь ряд),
+        как visualization.plotter.series_updates
+        """
+        start, end = x_range if x_range is not None else (None, None)
+        rows = time_slice(self.frame_dir, start, end)
+        count = rows.stop - rows.start
+        if count <= self.max_points:
+            frame = load_store(self.frame_dir, start, end)
+            return series_updates(frame, self.series)
+        level = min(_levels(count, self.max_points), self.meta["levels"])
+        span = self.max_points * 2**level
+        tiles = [
+            np.load(_tile_path(self.path, level, k))
+            for k in range(rows.start // span, (rows.stop - 1) // span + 1)
+        ]
+        updates = {}
+        for key in tiles[0].files:
+            i, prop = key.split(".", 1)
+            updates.setdefault(int(i), {})[prop] = np.concatenate(
+                [tile[key] for tile in tiles]
+            )
+        return updates